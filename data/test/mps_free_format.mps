@@ -0,0 +1,25 @@
+* Free format version of mps_test_file_small, with an integer marker and
+* names that do not fit the fixed format columns.
+NAME TESTPROB
+ROWS
+ N COST
+ L LIMIT_NUMBER_ONE
+ G LIMIT_NUMBER_TWO
+ E MY_EQUALITY
+COLUMNS
+ VARIABLE_ONE COST 1 LIMIT_NUMBER_ONE 1
+ VARIABLE_ONE LIMIT_NUMBER_TWO 1
+ MARKER 'MARKER' 'INTORG'
+ VARIABLE_TWO COST 4 LIMIT_NUMBER_ONE 1
+ VARIABLE_TWO MY_EQUALITY -1
+ MARKER 'MARKER' 'INTEND'
+ VARIABLE_THREE COST 9 LIMIT_NUMBER_TWO 1
+ VARIABLE_THREE MY_EQUALITY 1
+RHS
+ RHS LIMIT_NUMBER_ONE 5 LIMIT_NUMBER_TWO 10
+ RHS MY_EQUALITY 7
+BOUNDS
+ UP BND VARIABLE_ONE 4
+ LO BND VARIABLE_TWO -1
+ UP BND VARIABLE_TWO 1
+ENDATA
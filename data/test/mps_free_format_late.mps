@@ -0,0 +1,52 @@
+* Free format MPS file whose first (many) data lines also fit the fixed
+* format. Only the long names in the COLUMNS section do not.
+NAME          LATE
+ROWS
+ N  obj
+ L  c0
+ L  c1
+ L  c2
+ L  c3
+ L  c4
+ L  c5
+ L  c6
+ L  c7
+ L  c8
+ L  c9
+ L  c10
+ L  c11
+ L  c12
+ L  c13
+ L  c14
+ L  c15
+ L  c16
+ L  c17
+ L  c18
+ L  c19
+ L  c20
+ L  c21
+ L  c22
+ L  c23
+ L  c24
+ L  c25
+ L  c26
+ L  c27
+ L  c28
+ L  c29
+ L  c30
+ L  c31
+ L  c32
+ L  c33
+ L  c34
+ L  c35
+ L  c36
+ L  c37
+ L  c38
+ L  c39
+COLUMNS
+ long_variable_name_0 c0 1 obj 1
+ long_variable_name_1 c1 1 obj 2
+ long_variable_name_2 c2 1 obj 3
+RHS
+ RHS c0 1
+ENDATA
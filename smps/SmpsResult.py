@@ -1,12 +1,24 @@
+import logging
+import warnings
+from itertools import chain
 from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple, Union
 
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+
+from smps.classes import (Block, Distrib, ElementIndex, Indep, NameTable,
+                          NodeTree, Scenario, ScenarioSpace, ScenarioTree)
 from smps.parsers import CoreParser, StochParser, TimeParser
+from .MpsResult import MpsResult
+
+logger = logging.getLogger(__name__)
 
 
-class SmpsResult:
+class SmpsResult(MpsResult):
     """
     Parsing result, containing all the data that was read from the SMPS file
-    triplet.
+    triplet. The CORE data is available as for an MpsResult.
 
     Arguments
     ---------
@@ -26,10 +38,20 @@ class SmpsResult:
     """
 
     def __init__(self, core: CoreParser, time: TimeParser, stoch: StochParser):
+        super().__init__(core)
+
         self._core = core
         self._time = time
         self._stoch = stoch
 
+        self._realized: Optional[Tuple[np.ndarray, np.ndarray, csr_matrix]]
+        self._realized = None
+
+        self._element_index: Optional[Tuple[ElementIndex, csr_matrix]] = None
+
+        self._stages: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._blocks: Dict[Hashable, csr_matrix] = {}
+
     @property
     def core_location(self) -> Path:
         """
@@ -51,6 +73,746 @@ class SmpsResult:
         """
         return self._stoch.file_location()
 
+    @property
+    def num_stages(self) -> int:
+        """
+        See TimeParser.num_stages.
+        """
+        return self._time.num_stages
+
+    @property
+    def stage_names(self) -> List[str]:
+        """
+        See TimeParser.stage_names.
+        """
+        return self._time.stage_names
+
+    @property
+    def constraint_stages(self) -> np.ndarray:
+        """
+        Returns the stage (index) of each constraint, as an integer vector.
+        Stages are derived from the TIME data, either from the IMPLICIT stage
+        offsets or from the EXPLICIT assignments. Computed once, on first call.
+        """
+        return self._assign_stages()[0]
+
+    @property
+    def variable_stages(self) -> np.ndarray:
+        """
+        Returns the stage (index) of each variable, as an integer vector. See
+        ``constraint_stages``.
+        """
+        return self._assign_stages()[1]
+
+    @property
+    def stage_constraints(self) -> List[np.ndarray]:
+        """
+        Returns, for each stage, the (sorted) indices of the constraints in
+        that stage.
+        """
+        stages = self.constraint_stages
+        return [np.flatnonzero(stages == stage)
+                for stage in range(self.num_stages)]
+
+    @property
+    def stage_variables(self) -> List[np.ndarray]:
+        """
+        Returns, for each stage, the (sorted) indices of the variables in that
+        stage.
+        """
+        stages = self.variable_stages
+        return [np.flatnonzero(stages == stage)
+                for stage in range(self.num_stages)]
+
+    @property
+    def first_stage_matrix(self) -> csr_matrix:
+        """
+        Returns the constraint matrix of the first stage, that is, the block
+        of first-stage constraints and variables. This is usually called A.
+        Cached after first call.
+        """
+        return self._block("A",
+                           self.constraint_stages == 0,
+                           self.variable_stages == 0)
+
+    @property
+    def technology_matrix(self) -> csr_matrix:
+        """
+        Returns the block of the later-stage constraints, and the first-stage
+        variables. This is usually called T.
+        """
+        return self._block("T",
+                           self.constraint_stages > 0,
+                           self.variable_stages == 0)
+
+    @property
+    def recourse_matrix(self) -> csr_matrix:
+        """
+        Returns the block of the later-stage constraints, and the later-stage
+        variables. This is usually called W.
+        """
+        return self._block("W",
+                           self.constraint_stages > 0,
+                           self.variable_stages > 0)
+
+    def stage_block(self, constr_stage: int, var_stage: int) -> csr_matrix:
+        """
+        Returns the block of the constraint matrix formed by the constraints of
+        the first stage argument, and the variables of the second. Cached after
+        first call.
+        """
+        return self._block((constr_stage, var_stage),
+                           self.constraint_stages == constr_stage,
+                           self.variable_stages == var_stage)
+
+    def _block(self,
+               key: Hashable,
+               rows: np.ndarray,
+               cols: np.ndarray) -> csr_matrix:
+        """
+        Returns the block of the constraint matrix selected by the given row
+        and column masks. Blocks are cached under the given key.
+        """
+        if key not in self._blocks:
+            row_idcs = np.flatnonzero(rows)
+            col_idcs = np.flatnonzero(cols)
+
+            # Slicing rows is cheap in CSR format, and columns in CSC format.
+            block = self.coefficients[row_idcs, :].tocsc()[:, col_idcs]
+            self._blocks[key] = block.tocsr()
+
+        return self._blocks[key]
+
+    def _assign_stages(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assigns each constraint and variable to a stage.
+
+        Raises
+        ------
+        ValueError
+            When the TIME file defines no periods, or when its data cannot be
+            related to the CORE data.
+        """
+        if self._stages is not None:
+            return self._stages
+
+        if self.num_stages == 0:
+            msg = "The TIME file does not define any periods."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if self._time.time_type == "IMPLICIT":
+            self._stages = self._implicit_stages()
+        else:
+            self._stages = self._explicit_stages()
+
+        return self._stages
+
+    def _implicit_stages(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        In the IMPLICIT format, each period starts at a (var, constr) offset,
+        and the CORE file is ordered by period. The stage of each constraint
+        (variable) is then the number of offsets at or before it, less one.
+        """
+        constr2idx = self._core._constr2idx
+        var2idx = self._core._var2idx
+
+        constr_offsets = []
+        var_offsets = []
+
+        for var, constr in self._time.implicit_offsets:
+            if var not in var2idx or (constr not in constr2idx
+                                      and constr != self.objective_name):
+                msg = f"Offset ({var}, {constr}) is not in the CORE file."
+                logger.error(msg)
+                raise ValueError(msg)
+
+            constr_offsets.append(constr2idx.get(constr))
+            var_offsets.append(var2idx[var])
+
+        num_constrs = len(self.constraint_names)
+        num_vars = len(self.variable_names)
+
+        # Periods without constraints of their own refer to the objective.
+        # Such a period starts where the next period does, or after the last
+        # constraint when there is no next period.
+        start = num_constrs
+
+        for idx in reversed(range(len(constr_offsets))):
+            offset = constr_offsets[idx]
+            start = start if offset is None else offset
+            constr_offsets[idx] = start
+
+        constr_starts = np.array(constr_offsets)
+        var_starts = np.array(var_offsets)
+
+        if np.any(np.diff(constr_starts) < 0) \
+                or np.any(np.diff(var_starts) < 0):
+            msg = "The CORE file is not ordered by the IMPLICIT periods."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        # Anything before the first offset is taken to be in the first stage.
+        constr_stages = np.searchsorted(constr_starts,
+                                        np.arange(num_constrs),
+                                        side="right") - 1
+        var_stages = np.searchsorted(var_starts,
+                                     np.arange(num_vars),
+                                     side="right") - 1
+
+        return np.maximum(constr_stages, 0), np.maximum(var_stages, 0)
+
+    def _explicit_stages(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        In the EXPLICIT format, each constraint and variable is assigned to a
+        period in the ROWS and COLUMNS sections, respectively.
+        """
+        period2idx = {name: idx for idx, name in enumerate(self.stage_names)}
+
+        constrs = [(constr, period)
+                   for constr, period in self._time.explicit_constraints
+                   if constr != self.objective_name]
+
+        for constr, period in self._time.explicit_constraints:
+            if constr == self.objective_name and period2idx.get(period) != 0:
+                msg = (f"Objective {constr} is assigned to {period}, but is"
+                       f" always in the first stage; ignoring.")
+                logger.warning(msg)
+                warnings.warn(msg)
+
+        constr_stages = _explicit_assignment(constrs,
+                                             self._core._constr2idx,
+                                             period2idx,
+                                             "constraint")
+
+        var_stages = _explicit_assignment(self._time.explicit_variables,
+                                          self._core._var2idx,
+                                          period2idx,
+                                          "variable")
+
+        return constr_stages, var_stages
+
+    @property
+    def scenarios(self) -> List[Scenario]:
+        """
+        See StochParser.scenarios.
+        """
+        return self._stoch.scenarios
+
+    @property
+    def scenario_tree(self) -> ScenarioTree:
+        """
+        See StochParser.scenario_tree.
+        """
+        return self._stoch.scenario_tree
+
+    @property
+    def name_table(self) -> NameTable:
+        """
+        Returns the table in which the names of the STOCH file are interned.
+        When the CORE and TIME files were parsed in this process, their names
+        are interned in the same table. See ``read_smps``.
+        """
+        return self._stoch.name_table
+
+    @property
+    def indep_sections(self) -> List[Indep]:
+        """
+        See StochParser.indep_sections.
+        """
+        return self._stoch.indep_sections
+
+    @property
+    def blocks(self) -> List[Block]:
+        """
+        See StochParser.blocks.
+        """
+        return self._stoch.blocks
+
+    @property
+    def distribs(self) -> List[Distrib]:
+        """
+        See StochParser.distribs.
+        """
+        return self._stoch.distribs
+
+    @property
+    def node_tree(self) -> NodeTree:
+        """
+        See StochParser.node_tree.
+        """
+        return self._stoch.node_tree
+
+    @property
+    def scenario_space(self) -> ScenarioSpace:
+        """
+        Returns the (lazy) space of all scenarios implied by the discrete INDEP
+        and BLOCKS sections, that is, the Cartesian product of the outcomes of
+        all independent random elements, and the realisations of all blocks.
+        The INDEP elements come first. See ScenarioSpace.
+
+        Raises
+        ------
+        ValueError
+            When an INDEP section is not discrete.
+        """
+        indep_space = ScenarioSpace.from_indep(self.indep_sections)
+        return indep_space.product(ScenarioSpace.from_blocks(self.blocks))
+
+    def sample_scenarios(self,
+                         n: int,
+                         seed: Optional[int] = None) -> np.ndarray:
+        """
+        Samples n scenarios from the INDEP, BLOCKS and DISTRIB sections,
+        drawing all random elements of each section, all realisations of each
+        block, and all (correlated) draws of each joint distribution, at once
+        (see ``Indep.sample``, ``Block.sample`` and ``Distrib.sample``).
+
+        Parameters
+        ----------
+        n : int
+            Number of scenarios to sample.
+        seed : Optional[int]
+            Seed for the random number generator. Default None.
+
+        Returns
+        -------
+        np.ndarray
+            An (n, k) array of realisations, where k is the total number of
+            random elements. The columns are ordered first by INDEP section,
+            and then by the order of the elements in each section, followed by
+            the elements of each block, and of each joint distribution.
+        """
+        rng = np.random.default_rng(seed)
+        samples = [source.sample(n, rng) for source in self._random_sources()]
+
+        if len(samples) == 0:
+            return np.empty((n, 0))
+
+        return np.hstack(samples)
+
+    @property
+    def random_elements(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (var, constr)-pairs of all random elements of the INDEP,
+        BLOCKS and DISTRIB sections. This is the column order of
+        ``sample_scenarios``, and of the realizations passed to ``realize``.
+        """
+        return [element for source in self._random_sources()
+                for element in source.elements]
+
+    @property
+    def element_index(self) -> ElementIndex:
+        """
+        Returns the index of all stochastic (var, constr)-pairs, that is, the
+        random elements of the INDEP, BLOCKS and DISTRIB sections, and the
+        modifications of the SCENARIOS and NODES sections. Each pair is mapped
+        to its right-hand side slot, objective slot, or position in the data
+        array of ``realization_structure``. Computed once, on first call.
+        """
+        return self._index_elements()[0]
+
+    @property
+    def realization_structure(self) -> csr_matrix:
+        """
+        Returns the sparsity structure shared by the realized constraint
+        matrices (see ``realize``), as a CSR matrix holding the CORE
+        coefficients. This is the structure of the CORE matrix, with (zero)
+        entries for the stochastic coefficients that are not stored in it.
+        Computed once, on first call.
+        """
+        return self._index_elements()[1]
+
+    def realize(self, realizations: np.ndarray
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Applies a batch of realizations of the random elements to the CORE
+        data. Each element modifies the CORE value according to the
+        modification type of its section or block: REPLACE, MULTIPLY or ADD.
+        These are applied in that order, each as a single scatter for the
+        whole batch.
+
+        Parameters
+        ----------
+        realizations : np.ndarray
+            An (n, k) array of values for the k random elements, ordered as
+            ``random_elements``. The output of ``sample_scenarios`` can be
+            used directly.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The right-hand sides, as an (n, num_constraints) array, the
+            objective coefficients, as an (n, num_variables) array, and the
+            constraint matrix data, as an (n, nnz) array. Row i of the latter
+            is the data array of the i-th constraint matrix, in the structure
+            of ``realization_structure``; see ``realized_coefficients``.
+
+        Raises
+        ------
+        ValueError
+            When the number of columns does not match the number of random
+            elements.
+        """
+        realizations = np.atleast_2d(np.asarray(realizations, dtype=float))
+        modifications = np.array([source.modification
+                                  for source in self._random_sources()
+                                  for _ in source.elements], dtype=object)
+
+        if realizations.shape[1] != len(modifications):
+            msg = (f"Expected realizations of {len(modifications)} elements,"
+                   f" but got {realizations.shape[1]}.")
+            logger.error(msg)
+            raise ValueError(msg)
+
+        index = self.element_index
+        rows = index.indices(self.random_elements)
+        kinds = index.kinds[rows]
+        slots = index.slots[rows]
+
+        num_real = len(realizations)
+
+        rhs = np.tile(self._core_rhs(), (num_real, 1))
+        obj = np.tile(np.asarray(self.objective_coefficients, dtype=float),
+                      (num_real, 1))
+        data = np.tile(self.realization_structure.data, (num_real, 1))
+
+        targets = [(rhs, kinds == ElementIndex.RHS, slots),
+                   (obj, kinds == ElementIndex.OBJECTIVE, slots),
+                   (data, kinds == ElementIndex.COEFFICIENT, slots)]
+
+        for target, is_target, idcs in targets:
+            for modification in ["REPLACE", "MULTIPLY", "ADD"]:
+                cols = np.flatnonzero(is_target
+                                      & (modifications == modification))
+                _scatter(target, idcs[cols], realizations[:, cols],
+                         modification)
+
+        return rhs, obj, data
+
+    def realized_coefficients(self, data: np.ndarray) -> csr_matrix:
+        """
+        Returns the constraint matrix of a single realization, given its data
+        array (a row of the data returned by ``realize``). The index arrays of
+        ``realization_structure`` are shared, not copied.
+        """
+        structure = self.realization_structure
+        return csr_matrix((data, structure.indices, structure.indptr),
+                          shape=structure.shape,
+                          copy=False)
+
+    def _core_rhs(self) -> np.ndarray:
+        """
+        Returns the CORE right-hand side, as a vector. This is all zeros when
+        the CORE file does not have an RHS section.
+        """
+        if len(self.rhs) == 0:
+            return np.zeros(len(self.constraint_names))
+
+        return np.asarray(self.rhs, dtype=float)
+
+    def _random_sources(self) -> List[Union[Indep, Block, Distrib]]:
+        return [*self.indep_sections, *self.blocks, *self.distribs]
+
+    def _index_elements(self) -> Tuple[ElementIndex, csr_matrix]:
+        """
+        Builds the element index, and the realization structure. All names are
+        looked-up at once (see ``_modification_keys``), and all coefficient
+        positions are found with a single sorted search.
+        """
+        if self._element_index is not None:
+            return self._element_index
+
+        num_constrs = len(self.constraint_names)
+        num_vars = len(self.variable_names)
+
+        *_, scenario_mods = self._scenario_modifications()
+
+        node_tree = self.node_tree
+        node_mods = zip(node_tree.modification_variables,
+                        node_tree.modification_constraints)
+
+        elements = list(dict.fromkeys(chain(self.random_elements,
+                                            scenario_mods,
+                                            node_mods)))
+
+        keys = self._modification_keys([constr for _, constr in elements],
+                                       [var for var, _ in elements])
+
+        kinds = np.full(len(keys), ElementIndex.UNKNOWN, dtype=np.int8)
+        slots = np.full(len(keys), -1, dtype=np.int64)
+
+        is_rhs = (keys >= 0) & (keys < num_constrs)
+        kinds[is_rhs] = ElementIndex.RHS
+        slots[is_rhs] = keys[is_rhs]
+
+        is_obj = (keys >= num_constrs) & (keys < num_constrs + num_vars)
+        kinds[is_obj] = ElementIndex.OBJECTIVE
+        slots[is_obj] = keys[is_obj] - num_constrs
+
+        is_coeff = keys >= num_constrs + num_vars
+        flat = keys[is_coeff] - num_constrs - num_vars
+
+        structure = self._extended_structure(flat)
+        stored = _flat_positions(structure)
+
+        kinds[is_coeff] = ElementIndex.COEFFICIENT
+        slots[is_coeff] = np.searchsorted(stored, flat)
+
+        self._element_index = ElementIndex(elements, kinds, slots), structure
+        return self._element_index
+
+    def _extended_structure(self, flat: np.ndarray) -> csr_matrix:
+        """
+        Returns the CORE coefficient matrix, with explicit zeros added for the
+        given constraint matrix entries (as c * num_variables + v, for
+        constraint c and variable v) that are not stored in it. The indices of
+        each row are sorted.
+        """
+        # The coefficients are cached and shared, so they are not modified in
+        # place.
+        matrix = self.coefficients.copy()
+        matrix.sum_duplicates()  # also sorts the indices of each row.
+
+        num_vars = matrix.shape[1]
+        stored = _flat_positions(matrix)
+        missing = np.setdiff1d(flat, stored)
+
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        rows = np.concatenate((rows, missing // num_vars))
+        cols = np.concatenate((matrix.indices, missing % num_vars))
+        values = np.concatenate((matrix.data, np.zeros(len(missing))))
+
+        structure = coo_matrix((values, (rows, cols)),
+                               shape=matrix.shape).tocsr()
+        structure.sort_indices()
+
+        return structure
+
+    @property
+    def scenario_probabilities(self) -> np.ndarray:
+        """
+        Returns the probability of each scenario, as a vector.
+        """
+        return np.array([scen.probability for scen in self.scenarios])
+
+    @property
+    def scenario_rhs(self) -> np.ndarray:
+        """
+        Returns the constraint right-hand sides of each scenario, as a
+        (num_scenarios, num_constraints) array. Each row is the CORE right-hand
+        side, with all modifications of the scenario (relative to the root)
+        applied. Computed once, for all scenarios, on first call.
+        """
+        return self._realize_scenarios()[0]
+
+    @property
+    def scenario_objective_coefficients(self) -> np.ndarray:
+        """
+        Returns the objective coefficients of each scenario, as a
+        (num_scenarios, num_variables) array. See ``scenario_rhs``.
+        """
+        return self._realize_scenarios()[1]
+
+    @property
+    def scenario_coefficient_deltas(self) -> csr_matrix:
+        """
+        Returns the changes to the constraint matrix in each scenario, as a
+        sparse (num_scenarios, num_constraints * num_variables) matrix. Row
+        i stores the difference between scenario i's constraint matrix and the
+        CORE matrix, flattened in row-major order: the change to the entry of
+        constraint c and variable v is in column c * num_variables + v. See
+        ``scenario_rhs``.
+        """
+        return self._realize_scenarios()[2]
+
+    def _realize_scenarios(self) -> Tuple[np.ndarray, np.ndarray, csr_matrix]:
+        """
+        Realizes the data of all scenarios in one vectorised pass. Each
+        modification is mapped to its row in the element index, which also
+        serves as the key of the modification when resolving the
+        modifications relative to the root.
+        """
+        if self._realized is not None:
+            return self._realized
+
+        num_constrs = len(self.constraint_names)
+        num_vars = len(self.variable_names)
+        num_scens = len(self.scenarios)
+
+        index = self.element_index
+        structure = self.realization_structure
+
+        scens, pairs, values, elements = self._scenario_modifications()
+        keys = index.indices(elements)[pairs]
+
+        known = index.kinds[keys] != ElementIndex.UNKNOWN
+        scens, keys, values = self.scenario_tree.inherit(scens[known],
+                                                         keys[known],
+                                                         values[known])
+
+        kinds = index.kinds[keys]
+        slots = index.slots[keys]
+
+        rhs = np.tile(self._core_rhs(), (num_scens, 1))
+        is_rhs = kinds == ElementIndex.RHS
+        rhs[scens[is_rhs], slots[is_rhs]] = values[is_rhs]
+
+        obj: np.ndarray = np.tile(self.objective_coefficients, (num_scens, 1))
+        is_obj = kinds == ElementIndex.OBJECTIVE
+        obj[scens[is_obj], slots[is_obj]] = values[is_obj]
+
+        is_coeff = kinds == ElementIndex.COEFFICIENT
+        positions = slots[is_coeff]
+        flat = _flat_positions(structure)[positions]
+        core = structure.data[positions]
+
+        deltas = csr_matrix((values[is_coeff] - core, (scens[is_coeff], flat)),
+                            shape=(num_scens, num_constrs * num_vars))
+        deltas.eliminate_zeros()
+
+        self._realized = rhs, obj, deltas
+        return self._realized
+
+    def _scenario_modifications(self) -> Tuple[np.ndarray, np.ndarray,
+                                               np.ndarray,
+                                               List[Tuple[str, str]]]:
+        """
+        Returns the modifications local to each scenario as arrays of
+        scenario indices, pair indices and values, and the distinct
+        (variable, constraint)-pairs these pair indices refer to, in order of
+        first use. Pairs are formed from the name IDs of the scenario tree, so
+        each distinct pair is turned into names only once.
+        """
+        tree = self.scenario_tree
+        scens, constrs, variables, values = tree.modification_arrays()
+
+        names = tree.names.names
+        combined = variables.astype(np.int64) * len(names) + constrs
+        _, first, inverse = np.unique(combined,
+                                      return_index=True,
+                                      return_inverse=True)
+
+        # np.unique sorts the pairs, but they are needed in order of first use.
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+
+        elements = [(names[variables[idx]], names[constrs[idx]])
+                    for idx in first[order]]
+
+        return scens, rank[inverse.ravel()], values, elements
+
+    def _modification_keys(self,
+                           constrs: List[str],
+                           variables: List[str]) -> np.ndarray:
+        """
+        Maps (constraint, variable)-pairs to integer keys: [0, m) for the
+        right-hand side of each of the m constraints, [m, m + n) for the
+        objective coefficient of each of the n variables, and m + n + c * n + v
+        for the constraint matrix entry of constraint c and variable v.
+        Variables that are not in the CORE file are taken to be the right-hand
+        side. Unknown pairs are mapped to -1.
+        """
+        num_constrs = len(self.constraint_names)
+        num_vars = len(self.variable_names)
+
+        if len(constrs) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Look-ups are done once for each unique name, and then broadcast.
+        constr2idx = self._core._constr2idx
+        var2idx = self._core._var2idx
+
+        obj_idx = -2  # only used as a marker for the objective row.
+        unique_constrs, constr_inv = np.unique(constrs, return_inverse=True)
+        rows = np.array([obj_idx if name == self.objective_name
+                         else constr2idx.get(name, -1)
+                         for name in unique_constrs], dtype=np.int64)
+
+        unique_vars, var_inv = np.unique(variables, return_inverse=True)
+        cols = np.array([var2idx.get(name, -1) for name in unique_vars],
+                        dtype=np.int64)
+
+        rows = rows[constr_inv.ravel()]
+        cols = cols[var_inv.ravel()]
+
+        keys = np.full(len(rows), -1, dtype=np.int64)
+
+        is_rhs = (cols < 0) & (rows >= 0)
+        keys[is_rhs] = rows[is_rhs]
+
+        is_obj = (cols >= 0) & (rows == obj_idx)
+        keys[is_obj] = num_constrs + cols[is_obj]
+
+        is_coeff = (cols >= 0) & (rows >= 0)
+        keys[is_coeff] = num_constrs + num_vars + rows[is_coeff] * num_vars \
+            + cols[is_coeff]
+
+        if np.any(keys < 0):
+            unknown = np.flatnonzero(keys < 0)[0]
+            msg = (f"Modification of ({constrs[unknown]}, {variables[unknown]})"
+                   f" is not understood; skipping.")
+            logger.warning(msg)
+            warnings.warn(msg)
+
+        return keys
+
     # TODO
-    # TODO objective cannot be in any stage other than the first, when parsing
-    #  EXPLICIT time periods.
+
+
+def _flat_positions(matrix: csr_matrix) -> np.ndarray:
+    """
+    Returns the flattened (row-major) position of each stored entry of the
+    given CSR matrix. When the indices of each row are sorted, so are these
+    positions.
+    """
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    return rows.astype(np.int64) * matrix.shape[1] + matrix.indices
+
+
+def _scatter(target: np.ndarray,
+             idcs: np.ndarray,
+             values: np.ndarray,
+             modification: str):
+    """
+    Applies the given modification of the target columns, for all rows at
+    once. Repeated columns are applied one after the other.
+    """
+    if modification == "REPLACE":
+        target[:, idcs] = values
+        return
+
+    # The transposes are views of the same data, which are indexed by column.
+    if modification == "MULTIPLY":
+        np.multiply.at(target.T, idcs, values.T)
+    else:
+        np.add.at(target.T, idcs, values.T)
+
+
+def _explicit_assignment(assignments: List[Tuple[str, str]],
+                         name2idx: Dict[str, int],
+                         period2idx: Dict[str, int],
+                         kind: str) -> np.ndarray:
+    """
+    Turns a list of EXPLICIT (name, period)-assignments into a vector of stage
+    indices. Each name should be assigned to exactly one known period.
+    """
+    stages = np.full(len(name2idx), -1, dtype=int)
+
+    for name, period in assignments:
+        if name not in name2idx or period not in period2idx:
+            msg = f"Assignment of {kind} {name} to {period} is not understood."
+            logger.error(msg)
+            raise ValueError(msg)
+
+    indices = [name2idx[name] for name, _ in assignments]
+    stages[indices] = [period2idx[period] for _, period in assignments]
+
+    if np.any(stages < 0):
+        missing = np.flatnonzero(stages < 0)[0]
+        msg = f"No period is assigned to {kind} with index {missing}."
+        logger.error(msg)
+        raise ValueError(msg)
+
+    return stages
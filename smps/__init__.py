@@ -1,2 +1,4 @@
-from .read_mps import read_mps
-from .read_smps import read_smps
+from .distributions import register_distribution
+from .iter_scenarios import iter_scenarios
+from .read_mps import aread_mps, read_mps
+from .read_smps import aread_smps, read_smps
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Type, TypeVar
+
+from smps import distributions
+from smps.parsers.Parser import Parser, Source
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+P = TypeVar("P", bound=Parser)
+
+_DONE = object()
+
+
+async def run(executor: Optional[Executor],
+              func: Callable[..., T],
+              *args: Any) -> T:
+    """
+    Runs func(*args) in the given executor, without blocking the event loop.
+    When executor is None, the loop's default (thread pool) executor is used.
+    """
+    loop = asyncio.get_event_loop()  # the running loop; works on Py3.6.
+    return await loop.run_in_executor(executor, func, *args)
+
+
+def _open(cls: Type[P], source: Source, kwargs: Dict[str, Any]) -> P:
+    parser = cls(source, **kwargs)
+    parser.load()
+
+    return parser
+
+
+async def open_parser(cls: Type[P], source: Source, **kwargs: Any) -> P:
+    """
+    Creates a parser of the given type for the source (passing it any further
+    keyword arguments), and reads the source into memory. All file-system I/O
+    happens in the default executor, so the event loop is not blocked while
+    the file is read.
+    """
+    return await run(None, _open, cls, source, kwargs)
+
+
+def _parse(parser: P) -> P:
+    parser.parse()
+    return parser
+
+
+def _parse_in_worker(parser: P, samplers: Dict[str, Any]) -> P:
+    # Samplers registered in the main process are not known in the worker
+    # process otherwise, which would reject their DISTRIB sections.
+    distributions._install(samplers)
+    return _parse(parser)
+
+
+def _step(steps: Iterator[None]) -> bool:
+    return next(steps, _DONE) is not _DONE
+
+
+async def parse(parser: P,
+                executor: Optional[Executor] = None,
+                chunked: bool = False) -> P:
+    """
+    Parses the (loaded) parser in the given executor.
+
+    Parameters
+    ----------
+    parser : P
+        The parser to parse.
+    executor : Optional[Executor]
+        Executor in which the parsing work is done. When this is a process
+        pool, the parser is sent to a worker process, along with the DISTRIB
+        samplers registered in this process (see ``register_distribution``),
+        and a parsed copy is returned. Default None, which uses the loop's
+        default executor.
+    chunked : bool
+        When True, the parser's sections are processed in batches (see
+        ``Parser.parse``), each of which is run in the executor separately.
+        Control returns to the event loop between batches, so that a large
+        file does not hold up the executor (and can be cancelled) while it
+        is parsed. This requires a thread pool executor. Default False.
+
+    Returns
+    -------
+    P
+        The parsed parser.
+
+    Raises
+    ------
+    ValueError
+        When parsing chunked in a process pool executor.
+    """
+    if not chunked:
+        if isinstance(executor, ProcessPoolExecutor):
+            samplers = distributions._portable_samplers()
+            return await run(executor, _parse_in_worker, parser, samplers)
+
+        return await run(executor, _parse, parser)
+
+    if isinstance(executor, ProcessPoolExecutor):
+        msg = "Cannot parse chunked in a process pool executor."
+        logger.error(msg)
+        raise ValueError(msg)
+
+    steps = parser._iter_parse()
+
+    while await run(executor, _step, steps):
+        pass
+
+    return parser
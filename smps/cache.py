@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks in which files are read while hashing them.
+_CHUNK_SIZE = 2 ** 20
+
+_SUFFIX = ".smps-cache"
+
+
+@lru_cache(1)
+def _parser_version() -> str:
+    """
+    Returns a digest of the source files of this package. Any change to the
+    parsing code changes this digest, and thereby invalidates all earlier
+    cache entries.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    root = Path(__file__).parent
+
+    for file in sorted(root.rglob("*.py")):
+        if "tests" not in file.relative_to(root).parts:
+            digest.update(file.read_bytes())
+
+    return digest.hexdigest()
+
+
+def cache_key(*files: Union[str, Path, bytes, bytearray, memoryview]) -> str:
+    """
+    Computes a key for the given files, from their contents and the version of
+    the parsers. The key only changes when either of these changes.
+
+    Parameters
+    ----------
+    *files : Union[str, Path, bytes, bytearray, memoryview]
+        File-system locations of the files to be parsed, or their contents in
+        memory, in a fixed order.
+
+    Returns
+    -------
+    str
+        A hexadecimal digest, that can be used as file name.
+    """
+    digest = hashlib.blake2b(_parser_version().encode(), digest_size=20)
+
+    for file in files:
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            digest.update(file)
+        else:
+            with open(file, "rb") as fh:
+                for chunk in iter(lambda: fh.read(_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+
+        # Separates the files, so moving bytes between them changes the key.
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def load(cache_dir: Union[str, Path], key: str) -> Optional[Any]:
+    """
+    Loads the parsing result stored under the given key, if any. Returns None
+    when no such result exists, or if the stored result cannot be read.
+
+    Stored results are unpickled, which can execute arbitrary code. Only load
+    from cache directories that cannot be written to by others.
+    """
+    file = Path(cache_dir) / (key + _SUFFIX)
+
+    if not file.exists():
+        logger.debug(f"No cached result for key {key}.")
+        return None
+
+    try:
+        with open(file, "rb") as fh:
+            return pickle.load(fh)
+    except (EOFError,
+            OSError,
+            pickle.UnpicklingError,
+            AttributeError,
+            ImportError,
+            TypeError,
+            ValueError) as err:
+        # Truncated or stale (e.g., from other package versions) entries.
+        msg = f"Could not read cached result {file}: {err}. Parsing instead."
+        logger.warning(msg)
+        warnings.warn(msg)
+
+        return None
+
+
+def store(cache_dir: Union[str, Path], key: str, result: Any):
+    """
+    Stores the given parsing result under the given key. The result is first
+    written to a temporary file, which then replaces any existing entry. This
+    ensures concurrent readers never see a partially written entry.
+    """
+    directory = Path(cache_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp, directory / (key + _SUFFIX))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    logger.debug(f"Stored result for key {key} in {directory}.")
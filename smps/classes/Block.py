@@ -0,0 +1,204 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from smps.constants import MODIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+
+class Block:
+    """
+    A single block of a (DISCRETE) BLOCKS section, that is, a random vector
+    of elements that are realised jointly. Each realisation starts at a BL
+    line, which gives the probability of that realisation. Elements that are
+    not listed in a realisation take their value from the first realisation.
+    Once complete, the realisations are stored as a (realisation, element)
+    value matrix, and a probability vector.
+
+    Arguments
+    ---------
+    name : str
+        Block name.
+    period : str
+        Period (stage) in which the block is realised.
+    modification : str
+        Type of modification relative to the CORE file. One of MODIFICATIONS.
+        Default "REPLACE".
+    """
+
+    def __init__(self, name: str, period: str, modification: str = "REPLACE"):
+        modification = modification.upper()
+
+        logger.debug(f"Creating Block({name}, {period}, {modification})")
+
+        if modification not in MODIFICATIONS:
+            msg = f"Modification {modification} is not understood."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._name = name
+        self._period = period
+        self._modification = modification
+
+        self._elements: Dict[Tuple[str, str], int] = {}
+        self._probabilities: List[float] = []
+
+        # Entries as (realisation, element, value)-triplets, in the order they
+        # were added. These are turned into a matrix by finalise().
+        self._rows: List[int] = []
+        self._cols: List[int] = []
+        self._values: List[float] = []
+
+        self._matrix: Optional[np.ndarray] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def period(self) -> str:
+        return self._period
+
+    @property
+    def modification(self) -> str:
+        return self._modification
+
+    @property
+    def elements(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (var, constr)-pairs of the elements in this block, in the
+        order they were first added. This is also the column order of
+        ``values`` and ``sample``.
+        """
+        return list(self._elements.keys())
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        """
+        Returns the probability of each realisation, as a vector.
+        """
+        return np.array(self._probabilities, dtype=float)
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Returns the realisations, as a (num_realisations, num_elements) array.
+        """
+        self.finalise()
+
+        assert self._matrix is not None
+        return self._matrix
+
+    def add_realisation(self, probability: float):
+        """
+        Starts a new realisation of this block, with the given probability.
+        Subsequent entries belong to this realisation.
+        """
+        self._probabilities.append(probability)
+        self._matrix = None
+
+    def add_entry(self, var: str, constr: str, value: float):
+        """
+        Adds the value of the given element to the current realisation.
+
+        Raises
+        ------
+        ValueError
+            When no realisation has been started.
+        """
+        if len(self._probabilities) == 0:
+            msg = f"Block {self._name} has no realisation to add entries to."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if (var, constr) not in self._elements:
+            self._elements[var, constr] = len(self._elements)
+
+        self._rows.append(len(self._probabilities) - 1)
+        self._cols.append(self._elements[var, constr])
+        self._values.append(value)
+
+        self._matrix = None
+
+    def finalise(self):
+        """
+        Converts the entries into the realisation matrix. Called when the
+        section has been parsed completely, but also happens on demand.
+
+        Raises
+        ------
+        ValueError
+            When the block has no realisations, or when an element is not
+            given a value in the first realisation.
+        """
+        if self._matrix is not None:
+            return
+
+        if len(self._probabilities) == 0:
+            msg = f"Block {self._name} has no realisations."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        shape = (len(self._probabilities), len(self._elements))
+        matrix = np.full(shape, np.nan)
+        matrix[self._rows, self._cols] = self._values
+
+        if np.any(np.isnan(matrix[0])):
+            missing = self.elements[np.flatnonzero(np.isnan(matrix[0]))[0]]
+            msg = (f"Element {missing} of block {self._name} is not given in"
+                   f" its first realisation.")
+            logger.error(msg)
+            raise ValueError(msg)
+
+        # Elements that are not listed take the value of the first realisation.
+        self._matrix = np.where(np.isnan(matrix), matrix[:1], matrix)
+
+    def sample(self,
+               n: int,
+               rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draws n independent realisations of this block at once, by inverting
+        the distribution function of the realisations.
+
+        Parameters
+        ----------
+        n : int
+            Number of realisations to draw.
+        rng : Optional[np.random.Generator]
+            Random number generator to draw with. When not given, a new,
+            unseeded generator is used. Default None.
+
+        Returns
+        -------
+        np.ndarray
+            An (n, num_elements) array of realisations.
+
+        Raises
+        ------
+        ValueError
+            When the block has no realisations.
+        """
+        self.finalise()
+
+        if rng is None:
+            rng = np.random.default_rng()
+
+        cdf = np.cumsum(self.probabilities)
+        cdf /= cdf[-1]
+
+        idcs = np.searchsorted(cdf, rng.random(n), side="right")
+        return self.values[np.minimum(idcs, len(cdf) - 1)]
+
+    def __len__(self) -> int:
+        """
+        Number of realisations of this block.
+        """
+        return len(self._probabilities)
+
+    def __str__(self) -> str:
+        return f"name={self._name}, period={self._period}"
+
+    def __repr__(self) -> str:
+        return f"Block({self})"
@@ -0,0 +1,63 @@
+import logging
+from collections import OrderedDict
+from typing import (Any, Hashable, ItemsView, Iterator, MutableMapping,
+                    Optional, ValuesView)
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedCache(MutableMapping):
+    """
+    Mapping that holds at most ``max_size`` items. When full, adding a new
+    item evicts the least recently used item. Both look-ups and assignments
+    count as use.
+
+    Arguments
+    ---------
+    max_size : Optional[int]
+        Maximum number of items to hold. When None, the cache is unbounded.
+        Default None.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        if max_size is not None and max_size < 1:
+            msg = f"Cannot bound a cache at {max_size} items."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._max_size = max_size
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    @property
+    def max_size(self) -> Optional[int]:
+        return self._max_size
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self._items[key]
+        self._items.move_to_end(key)
+
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self._items[key] = value
+        self._items.move_to_end(key)
+
+        if self._max_size is not None and len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def __delitem__(self, key: Hashable):
+        del self._items[key]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._items)
+
+    def values(self) -> ValuesView:
+        # Iterating over the values should not count as use, and must not
+        # reorder the items while iterating.
+        return self._items.values()
+
+    def items(self) -> ItemsView:
+        return self._items.items()
+
+    def __len__(self) -> int:
+        return len(self._items)
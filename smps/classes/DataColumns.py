@@ -0,0 +1,269 @@
+import logging
+from itertools import zip_longest
+from typing import (Collection, Dict, Iterator, List, Optional, Sequence,
+                    Tuple, Union)
+
+from .DataLine import DataLine
+from .NameTable import NameTable
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+
+# Column names, in the order of the fields of a data line.
+_FIELDS = ["indicators",
+           "first_names",
+           "second_names",
+           "first_numbers",
+           "third_names",
+           "second_numbers"]
+
+
+def _to_floats(strings: Sequence) -> List[float]:
+    return [float(string) if string else _NAN for string in strings]
+
+
+def _split_free(data_lines: list, indicators: Collection) -> List[tuple]:
+    """
+    Splits each free format data line on white space, just once, and returns
+    the six fields as columns (see DataLine.free_fields). The tokens after the
+    indicator are assigned to fields in order. Unlike free_fields, a third
+    token that is not a number is not yet moved to the third name field: that
+    is left for when the numbers are converted (see DataColumns).
+    """
+    if not data_lines:
+        return [()] * 6
+
+    empty = data_lines[0][:0]
+
+    rows = [line.split() for line in data_lines]
+
+    if not indicators:  # the common case, where lines have no indicator.
+        columns = list(zip_longest(*rows, fillvalue=empty))[:5]
+        columns += [(empty,) * len(rows)] * (5 - len(columns))
+
+        return [(empty,) * len(rows), *columns]
+
+    for tokens in rows:
+        if not tokens or tokens[0] not in indicators:
+            tokens.insert(0, empty)
+
+    columns = list(zip_longest(*rows, fillvalue=empty))[:6]
+    return columns + [(empty,) * len(rows)] * (6 - len(columns))
+
+
+def _to_floats_or_names(strings: Sequence
+                        ) -> Tuple[List[float], Dict[int, str]]:
+    """
+    Converts the strings to floats, as _to_floats does. Strings that are not
+    numbers are returned separately, by their index, and are NaN instead.
+    """
+    try:
+        return _to_floats(strings), {}
+    except ValueError:  # rare: only for e.g. MARKER lines, or TIME periods.
+        numbers = []
+        names = {}
+
+        for idx, string in enumerate(strings):
+            try:
+                numbers.append(float(string) if string else _NAN)
+            except ValueError:
+                numbers.append(_NAN)
+                names[idx] = string
+
+        return numbers, names
+
+
+class DataColumns:
+    """
+    Tokenises a batch of data lines from a single section into columns, in a
+    struct-of-arrays fashion. Each column is split off in one pass over all
+    lines, and only once it is first requested. The column positions are the
+    same as those of DataLine (see http://tiny.cc/lsyxsz):
+        - Columns 2 and 3: indicator field,
+        - Columns 5-12: first name field,
+        - Columns 15-22: second name field,
+        - Columns 25-36: first numeric field,
+        - Columns 40-47: third data name field,
+        - Columns 50-61: second numeric field.
+
+    Empty numeric fields are NaN; empty name fields are empty strings.
+
+    In free format, each line is instead split on white space just once, and
+    all columns are formed from these tokens when the first is requested (see
+    ``DataLine.free_fields``). Bytes lines are then decoded as a whole. This
+    does not limit the length of names.
+
+    Arguments
+    ---------
+    data_lines : Union[List[str], List[bytes]]
+        Raw data lines, to be tokenised. These are assumed to have been
+        stripped of any trailing white space (e.g., line breaks). When these
+        are bytes, only the fields that are requested are decoded.
+    free_format : bool
+        Whether the lines are in free format. Default False (fixed format).
+    indicators : Collection[str]
+        Indicators that may start a free format data line in this section,
+        e.g. the constraint senses in a ROWS section. Default empty.
+    names : Optional[NameTable]
+        When given, the name columns are interned in this table, so that all
+        equal names share a single string object. Default None.
+    """
+
+    def __init__(self,
+                 data_lines: Union[List[str], List[bytes]],
+                 free_format: bool = False,
+                 indicators: Collection[str] = (),
+                 names: Optional[NameTable] = None):
+        logger.debug(f"Creating DataColumns for {len(data_lines)} lines.")
+
+        self._raw = data_lines
+        self._is_bytes = any(isinstance(line, bytes)
+                             for line in data_lines[:1])
+        self._columns: Dict[str, list] = {}
+
+        self._free_format = free_format
+        self._indicators = indicators
+        self._tokens: Dict[str, tuple] = {}  # free format fields, by column.
+        self._names = names
+
+    @property
+    def indicators(self) -> List[str]:
+        if self._free_format:
+            return self._free_column("indicators")
+
+        if "indicators" not in self._columns:
+            names = [line[1:3].strip() for line in self._raw]
+            self._columns["indicators"] = self._to_str(names)
+
+        return self._columns["indicators"]
+
+    @property
+    def first_names(self) -> List[str]:
+        if self._free_format:
+            return self._free_column("first_names")
+
+        if "first_names" not in self._columns:
+            names = [line[4:12].strip() for line in self._raw]
+            self._columns["first_names"] = self._to_str(names)
+
+        return self._columns["first_names"]
+
+    @property
+    def second_names(self) -> List[str]:
+        if self._free_format:
+            return self._free_column("second_names")
+
+        if "second_names" not in self._columns:
+            names = [line[14:22].strip() for line in self._raw]
+            self._columns["second_names"] = self._to_str(names)
+
+        return self._columns["second_names"]
+
+    @property
+    def first_numbers(self) -> List[float]:
+        if self._free_format:
+            return self._free_column("first_numbers")
+
+        if "first_numbers" not in self._columns:
+            strings = [line[24:36].strip() for line in self._raw]
+            self._columns["first_numbers"] = _to_floats(strings)
+
+        return self._columns["first_numbers"]
+
+    @property
+    def third_names(self) -> List[str]:
+        if self._free_format:
+            return self._free_column("third_names")
+
+        if "third_names" not in self._columns:
+            names = [line[39:47].strip() for line in self._raw]
+            self._columns["third_names"] = self._to_str(names)
+
+        return self._columns["third_names"]
+
+    @property
+    def second_numbers(self) -> List[float]:
+        if self._free_format:
+            return self._free_column("second_numbers")
+
+        if "second_numbers" not in self._columns:
+            strings = [line[49:61].strip() for line in self._raw]
+            self._columns["second_numbers"] = _to_floats(strings)
+
+        return self._columns["second_numbers"]
+
+    def _free_column(self, name: str) -> list:
+        if not self._tokens:
+            lines: list = self._raw
+
+            if self._is_bytes:  # one decode per line beats one per field.
+                lines = [line.decode() for line in lines]
+
+            columns = _split_free(lines, set(self._indicators))
+            self._tokens = dict(zip(_FIELDS, columns))
+
+            # A first number that is not a number is the third name, when the
+            # line has no third name yet (see DataLine.free_fields).
+            numbers, names = _to_floats_or_names(self._tokens["first_numbers"])
+            self._columns["first_numbers"] = numbers
+
+            if names:
+                third_names = list(self._tokens["third_names"])
+
+                for idx, string in names.items():
+                    if third_names[idx]:  # then this should have been a number.
+                        msg = f"Could not convert {string!r} to a number."
+                        logger.error(msg)
+                        raise ValueError(msg)
+
+                    third_names[idx] = string
+
+                self._tokens["third_names"] = tuple(third_names)
+
+        if name not in self._columns:
+            if name.endswith("numbers"):
+                self._columns[name] = _to_floats(self._tokens[name])
+            else:
+                self._columns[name] = self._intern(self._tokens[name])
+
+        return self._columns[name]
+
+    def _to_str(self, names: list) -> List[str]:
+        if self._is_bytes:  # only decode what is actually needed.
+            if self._names is None:
+                return [name.decode() for name in names]
+
+            intern = self._names.intern
+            return [intern(name.decode()) for name in names]
+
+        return self._intern(names)
+
+    def _intern(self, names: Union[list, tuple]) -> List[str]:
+        if self._names is None:
+            return list(names)
+
+        intern = self._names.intern
+        return [intern(name) for name in names]
+
+    def raw(self) -> Union[List[str], List[bytes]]:
+        return self._raw
+
+    def __iter__(self) -> Iterator[DataLine]:
+        """
+        Iterates over the lines of this batch, as DataLine objects. Useful for
+        the rare handler that needs to look at one line at a time.
+        """
+        lines: list = self._raw
+
+        if self._is_bytes:
+            lines = [line.decode() for line in lines]
+
+        return (DataLine(line, self._free_format, self._indicators)
+                for line in lines)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __repr__(self) -> str:
+        return f"DataColumns({len(self)} lines)"
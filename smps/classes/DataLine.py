@@ -1,9 +1,126 @@
 import logging
+from typing import Collection, Iterable, Tuple, Union
 
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Field spans (0-based, end exclusive) of the fixed format, in the order
+# indicator, first name, second name, first number, third name, and second
+# number. See the DataLine docstring.
+_FIXED_FIELDS = [(1, 3), (4, 12), (14, 22), (24, 36), (39, 47), (49, 61)]
+_FIXED_WIDTH = 61
+
+# Membership of each column in these fields, as a (column, field) matrix, and
+# the columns of the gaps between them.
+_FIELD_COLUMNS = np.zeros((_FIXED_WIDTH, len(_FIXED_FIELDS)), dtype=np.float32)
+
+for _field, (_start, _end) in enumerate(_FIXED_FIELDS):
+    _FIELD_COLUMNS[_start:_end, _field] = 1
+
+_GAP_COLUMNS = _FIELD_COLUMNS.sum(axis=1) == 0
+
+# Number of data lines that are tested at once for the fixed format.
+_CHECK_SIZE = 4096
+
+_DIGITS = "+-.0123456789"
+_NUMBER_START = {*_DIGITS, *(char.encode() for char in _DIGITS)}
+
+
+def _is_number(token: Union[str, bytes]) -> bool:
+    if token[:1] not in _NUMBER_START:  # cheap check that rules out most names.
+        return False
+
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+def _fits_fixed(data_lines: list) -> bool:
+    """
+    Tests if each token on the given data lines lies within a single field of
+    the fixed format, and each field holds at most one token. All lines are
+    tested at once, as rows of a character array.
+    """
+    if max(map(len, data_lines)) > _FIXED_WIDTH:
+        return False
+
+    try:  # str lines are encoded as ASCII, which takes the least memory.
+        chars = np.array(data_lines, dtype=f"S{_FIXED_WIDTH}").view(np.uint8)
+    except UnicodeEncodeError:
+        chars = np.array(data_lines, dtype=f"U{_FIXED_WIDTH}").view(np.uint32)
+
+    # Shorter lines are padded with NUL characters, which count as blank, as
+    # do white space and other control characters.
+    filled = chars.reshape(len(data_lines), _FIXED_WIDTH) > ord(" ")
+
+    if np.any(filled & _GAP_COLUMNS):
+        return False
+
+    starts = filled.copy()  # first character of each token.
+    starts[:, 1:] &= ~filled[:, :-1]
+
+    # Number of tokens in each field, for each line. A matrix product is much
+    # faster than summing over each field separately.
+    tokens = starts.astype(np.float32) @ _FIELD_COLUMNS
+    return bool(np.all(tokens <= 1))
+
+
+def is_free_format(data_lines: Iterable[Union[str, bytes]]) -> bool:
+    """
+    Tests if the given data lines are in free format, that is, if any of them
+    does not fit the fixed column positions. When no data lines are given, the
+    (traditional) fixed format is assumed.
+    """
+    data_lines = list(data_lines)
+
+    for start in range(0, len(data_lines), _CHECK_SIZE):
+        if not _fits_fixed(data_lines[start:start + _CHECK_SIZE]):
+            return True
+
+    return False
+
+
+def is_free_header(header_line: Union[str, bytes]) -> bool:
+    """
+    Tests if the given header line is in free format, that is, if its first
+    word field (columns 1-14) holds more than a single word.
+    """
+    return len(header_line[:14].split()) > 1
+
+
+def _assign(tokens: list, empty: Union[str, bytes], indicators: Collection):
+    """
+    Assigns the tokens of a free format data line to the six fields (see
+    DataLine), in place, by inserting empty fields where the line has none.
+    """
+    if not tokens or tokens[0] not in indicators:
+        tokens.insert(0, empty)
+
+    if len(tokens) == 4 and not _is_number(tokens[3]):
+        tokens.insert(3, empty)
+
+    if len(tokens) < 6:
+        tokens.extend([empty] * (6 - len(tokens)))
+
+
+def free_fields(line: Union[str, bytes],
+                indicators: Collection[Union[str, bytes]] = ()) -> Tuple:
+    """
+    Splits a free format data line on white space into its six fields (see
+    DataLine), in order, with empty fields where the line has none. The first
+    token is the indicator only if it is one of the given indicators. The
+    remaining tokens are assigned in order to the first name, second name,
+    first number, third name, and second number fields. A third token that is
+    not a number is the third name, as in MARKER lines or TIME periods.
+    """
+    tokens = line.split()
+    _assign(tokens, line[:0], indicators)
+
+    return tuple(tokens[:6])
+
 
 class DataLine:
     """
@@ -21,10 +138,20 @@ class DataLine:
         - Columns 1-14: first word field,
         - Columns 15-72: second word field.
 
+    In free format, the fields are instead separated by white space, and names
+    need not fit in eight columns. See ``free_fields`` for how the tokens are
+    assigned to fields. Header words are separated by white space as well: the
+    second name and third name are then the second and third words of the
+    header, and the second word field is everything after the first word.
+
     Arguments
     ---------
     data_line : str
         Raw data line string, to be parsed.
+    free_format : bool
+        Whether the line is in free format. Default False (fixed format).
+    indicators : Collection[str]
+        Indicators that may start a free format data line. Default empty.
 
     References
     ----------
@@ -34,11 +161,28 @@ class DataLine:
       http://pure.iiasa.ac.at/id/eprint/2934/1/WP-87-118.pdf.
     """
 
-    def __init__(self, data_line: str):
+    def __init__(self,
+                 data_line: str,
+                 free_format: bool = False,
+                 indicators: Collection[str] = ()):
         data_line = data_line.rstrip()
 
         logger.debug(f"Creating DataLine('{data_line}').")
         self._raw = data_line
+        self._free_format = free_format
+
+        if not free_format:
+            return
+
+        if self.is_header():
+            words = data_line.split(None, 1) + ["", ""]
+            tokens = data_line.split()[1:3] + ["", ""]
+
+            self._fields = ("", "", tokens[0], "", tokens[1], "")
+            self._header_words = (words[0], words[1])
+        else:
+            self._fields = free_fields(data_line, indicators)
+            self._header_words = (data_line.strip(), "")
 
     def is_comment(self) -> bool:
         return len(self._raw) == 0 or self._raw.lstrip().startswith("*")
@@ -47,43 +191,58 @@ class DataLine:
         """
         If True, this DataLine defines a section header. False otherwise.
         """
-        return len(self._raw) >= 1 and self._raw[0] not in " *"
+        return len(self._raw) >= 1 and self._raw[0] not in " \t*"
 
     def first_header_word(self):
+        if self._free_format:
+            return self._header_words[0]
+
         return self._raw[0:14].strip()
 
     def has_second_header_word(self) -> bool:
         return self.second_header_word() != ""
 
     def second_header_word(self):
+        if self._free_format:
+            return self._header_words[1].strip()
+
         return self._raw[14:72].strip()
 
     def indicator(self) -> str:
-        return self._raw[1:3].strip()
+        return self._field(0, 1, 3)
 
     def first_name(self) -> str:
-        return self._raw[4:12].strip()
+        return self._field(1, 4, 12)
 
     def second_name(self) -> str:
-        return self._raw[14:22].strip()
+        return self._field(2, 14, 22)
 
     def first_number(self) -> float:
-        string = self._raw[24:36].strip()
+        string = self._field(3, 24, 36)
         return float(string) if len(string) != 0 else float("nan")
 
     def has_third_name(self) -> bool:
         return self.third_name() != ""
 
     def third_name(self) -> str:
-        return self._raw[39:47].strip()
+        return self._field(4, 39, 47)
 
     def has_second_number(self) -> bool:
         return not np.isnan(self.second_number())
 
     def second_number(self) -> float:
-        string = self._raw[49:61].strip()
+        string = self._field(5, 49, 61)
         return float(string) if len(string) != 0 else float("nan")
 
+    def is_free_format(self) -> bool:
+        return self._free_format
+
+    def _field(self, idx: int, start: int, end: int) -> str:
+        if self._free_format:
+            return self._fields[idx]
+
+        return self._raw[start:end].strip()
+
     def raw(self) -> str:
         return self._raw
 
@@ -0,0 +1,128 @@
+import logging
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from scipy.stats import rv_discrete
+
+logger = logging.getLogger(__name__)
+
+
+class DiscreteDistribution:
+    """
+    A lightweight discrete distribution with finite support, backed by arrays
+    of outcomes, probabilities, and cumulative probabilities. Sampling is done
+    by inverting the distribution function. The interface follows that of
+    ``scipy.stats.rv_discrete`` for the commonly used methods; the equivalent
+    scipy distribution is available via ``to_scipy``.
+
+    Arguments
+    ---------
+    values : np.ndarray
+        Outcomes of the distribution, sorted in increasing order.
+    probabilities : np.ndarray
+        Probability of each outcome. These should sum to one. Any rounding
+        noise in their sum is normalised away, so that all methods (and the
+        sampler) agree.
+    cdf : Optional[np.ndarray]
+        Cumulative probabilities of the (sorted) outcomes, ending at exactly
+        one. Computed from the probabilities when not given. Default None.
+
+    Raises
+    ------
+    ValueError
+        When the probabilities do not sum to one, up to rounding noise.
+    """
+    name = "discrete"
+
+    def __init__(self,
+                 values: np.ndarray,
+                 probabilities: np.ndarray,
+                 cdf: Optional[np.ndarray] = None):
+        probabilities = np.asarray(probabilities, dtype=float)
+        total = probabilities.sum()
+
+        # Same tolerance as scipy.stats.rv_discrete, which raises as well.
+        if not np.isclose(total, 1):
+            msg = f"Probabilities sum to {total}, rather than one."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._values = np.asarray(values, dtype=float)
+        self._probabilities = probabilities / total
+
+        if cdf is None:
+            cdf = np.cumsum(self._probabilities)
+            cdf = cdf / cdf[-1]
+
+        self._cdf = np.asarray(cdf, dtype=float)
+        self._scipy: Optional[rv_discrete] = None
+
+    @property
+    def xk(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def pk(self) -> np.ndarray:
+        return self._probabilities
+
+    def mean(self) -> float:
+        return float(self._values @ self._probabilities)
+
+    def var(self) -> float:
+        deviation = self._values - self.mean()
+        return float(deviation ** 2 @ self._probabilities)
+
+    def cdf(self, x: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Returns the probability of an outcome at most x.
+        """
+        idcs = np.searchsorted(self._values, x, side="right")
+        return np.concatenate(([0.], self._cdf))[idcs]
+
+    def ppf(self, q: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Returns the smallest outcome whose cumulative probability is at least
+        q, that is, the inverse of the distribution function.
+        """
+        idcs = np.searchsorted(self._cdf, q, side="left")
+        return self._values[np.minimum(idcs, len(self._values) - 1)]
+
+    def rvs(self,
+            size: Optional[Union[int, Tuple[int, ...]]] = None,
+            random_state: Optional[Union[int, np.random.Generator]] = None
+            ) -> Union[float, np.ndarray]:
+        """
+        Draws random outcomes, by inverting the distribution function.
+
+        Parameters
+        ----------
+        size : Optional[Union[int, Tuple[int, ...]]]
+            Number (or shape) of outcomes to draw. Default None, which draws a
+            single outcome.
+        random_state : Optional[Union[int, np.random.Generator]]
+            Seed or random number generator to draw with. Default None.
+        """
+        rng = np.random.default_rng(random_state)
+        idcs = np.searchsorted(self._cdf, rng.random(size), side="right")
+
+        return self._values[np.minimum(idcs, len(self._values) - 1)]
+
+    def to_scipy(self) -> rv_discrete:
+        """
+        Returns the equivalent ``scipy.stats`` discrete distribution. Cached
+        after first call.
+        """
+        if self._scipy is None:
+            logger.debug("Creating a scipy.stats discrete distribution.")
+
+            self._scipy = rv_discrete(values=(self._values,
+                                              self._probabilities),
+                                      name=self.name)
+
+        return self._scipy
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"DiscreteDistribution({len(self)} outcomes)"
@@ -0,0 +1,224 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from smps.constants import MODIFICATIONS
+from smps.distributions import get_sampler
+
+logger = logging.getLogger(__name__)
+
+
+class Distrib:
+    """
+    A single joint distribution of a DISTRIB section, that is, a random vector
+    of elements that are drawn from a multivariate distribution. Each element
+    line gives an element and its parameter (e.g., its mean). CV lines give an
+    entry of the symmetric parameter matrix (e.g., the covariance matrix), by
+    the (1-based) positions of both elements. Matrix entries that are not
+    given are zero. Sampling is delegated to the sampler registered for the
+    distribution type, see ``smps.distributions.register_distribution``.
+
+    Arguments
+    ---------
+    name : str
+        Distribution name.
+    period : str
+        Period (stage) in which the random vector is realised.
+    distribution : str
+        Type of distribution, e.g. MVNORMAL. Should have a registered sampler.
+    modification : str
+        Type of modification relative to the CORE file. One of MODIFICATIONS.
+        Default "REPLACE".
+    """
+
+    def __init__(self,
+                 name: str,
+                 period: str,
+                 distribution: str,
+                 modification: str = "REPLACE"):
+        distribution = distribution.upper()
+        modification = modification.upper()
+
+        logger.debug(f"Creating Distrib({name}, {period}, {distribution},"
+                     f" {modification})")
+
+        if modification not in MODIFICATIONS:
+            msg = f"Modification {modification} is not understood."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        get_sampler(distribution)  # raises when it is not registered.
+
+        self._name = name
+        self._period = period
+        self._distribution = distribution
+        self._modification = modification
+
+        self._elements: Dict[Tuple[str, str], int] = {}
+        self._parameters: List[float] = []
+
+        # Matrix entries as (row, column, value)-triplets, in the order they
+        # were added. These are turned into a matrix by finalise().
+        self._rows: List[int] = []
+        self._cols: List[int] = []
+        self._values: List[float] = []
+
+        self._matrix: Optional[np.ndarray] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def period(self) -> str:
+        return self._period
+
+    @property
+    def distribution(self) -> str:
+        return self._distribution
+
+    @property
+    def modification(self) -> str:
+        return self._modification
+
+    @property
+    def elements(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (var, constr)-pairs of the elements of this distribution,
+        in the order they were added. This is also the order of
+        ``parameters``, the rows and columns of ``matrix``, and the columns of
+        ``sample``.
+        """
+        return list(self._elements.keys())
+
+    @property
+    def parameters(self) -> np.ndarray:
+        """
+        Returns the parameter of each element, as a vector.
+        """
+        return np.array(self._parameters, dtype=float)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        Returns the symmetric (num_elements, num_elements) parameter matrix.
+        """
+        self.finalise()
+
+        assert self._matrix is not None
+        return self._matrix
+
+    def add_entry(self, var: str, constr: str, value: float):
+        """
+        Adds an element with the given parameter value.
+
+        Raises
+        ------
+        ValueError
+            When the element has already been added.
+        """
+        if (var, constr) in self._elements:
+            msg = f"Element ({var}, {constr}) is already in {self._name}."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._elements[var, constr] = len(self._elements)
+        self._parameters.append(value)
+
+        self._matrix = None
+
+    def add_matrix_entry(self, row: int, col: int, value: float):
+        """
+        Sets the parameter matrix entry of the given (0-based) element
+        positions, and its symmetric counterpart.
+        """
+        self._rows.append(row)
+        self._cols.append(col)
+        self._values.append(value)
+
+        self._matrix = None
+
+    def finalise(self):
+        """
+        Converts the matrix entries into the parameter matrix. Called when the
+        section has been parsed completely, but also happens on demand.
+
+        Raises
+        ------
+        ValueError
+            When a matrix entry refers to an element that does not exist.
+        """
+        if self._matrix is not None:
+            return
+
+        rows = np.array(self._rows, dtype=int)
+        cols = np.array(self._cols, dtype=int)
+
+        if np.any(rows < 0) or np.any(rows >= len(self)) \
+                or np.any(cols < 0) or np.any(cols >= len(self)):
+            msg = (f"Matrix entry of {self._name} refers to an element that"
+                   f" does not exist.")
+            logger.error(msg)
+            raise ValueError(msg)
+
+        matrix = np.zeros((len(self), len(self)))
+        matrix[rows, cols] = self._values
+        matrix[cols, rows] = self._values
+
+        self._matrix = matrix
+
+    def sample(self,
+               n: int,
+               rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draws n independent realisations of this random vector at once, using
+        the registered sampler of this distribution type.
+
+        Parameters
+        ----------
+        n : int
+            Number of realisations to draw.
+        rng : Optional[np.random.Generator]
+            Random number generator to draw with. When not given, a new,
+            unseeded generator is used. Default None.
+
+        Returns
+        -------
+        np.ndarray
+            An (n, num_elements) array of realisations.
+
+        Raises
+        ------
+        ValueError
+            When the sampler does not return an array of this shape.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        # The sampler is looked-up here, rather than stored, so instances
+        # remain picklable when the sampler is not.
+        sampler = get_sampler(self._distribution)
+        samples = np.asarray(sampler(rng, self.parameters, self.matrix, n))
+
+        if samples.shape != (n, len(self)):
+            msg = (f"Sampler of {self._distribution} returned shape"
+                   f" {samples.shape}, but expected {(n, len(self))}.")
+            logger.error(msg)
+            raise ValueError(msg)
+
+        return samples
+
+    def __len__(self) -> int:
+        """
+        Number of elements of this random vector.
+        """
+        return len(self._elements)
+
+    def __str__(self) -> str:
+        return (f"name={self._name},"
+                f" period={self._period},"
+                f" distribution={self._distribution}")
+
+    def __repr__(self) -> str:
+        return f"Distrib({self})"
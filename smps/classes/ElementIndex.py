@@ -0,0 +1,97 @@
+import logging
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ElementIndex:
+    """
+    Maps stochastic (var, constr)-pairs directly to the CORE data they modify.
+    Each pair has a kind (right-hand side, objective coefficient, constraint
+    matrix coefficient, or unknown), and a slot: the constraint index for
+    right-hand sides, the variable index for objective coefficients, and the
+    position in the data array of a CSR matrix for coefficients. Unknown pairs
+    have slot -1.
+
+    Arguments
+    ---------
+    elements : List[Tuple[str, str]]
+        The (var, constr)-pairs, without duplicates.
+    kinds : np.ndarray
+        Kind of each pair. One of RHS, OBJECTIVE, COEFFICIENT and UNKNOWN.
+    slots : np.ndarray
+        Slot of each pair.
+    """
+    UNKNOWN = -1
+    RHS = 0
+    OBJECTIVE = 1
+    COEFFICIENT = 2
+
+    def __init__(self,
+                 elements: List[Tuple[str, str]],
+                 kinds: np.ndarray,
+                 slots: np.ndarray):
+        if len(elements) != len(kinds) or len(elements) != len(slots):
+            msg = "Elements, kinds and slots should be of the same length."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._indices = {element: idx for idx, element in enumerate(elements)}
+
+        if len(self._indices) != len(elements):
+            msg = "Elements should not contain duplicates."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._elements = elements
+        self._kinds = np.asarray(kinds, dtype=np.int8)
+        self._slots = np.asarray(slots, dtype=np.int64)
+
+    @property
+    def elements(self) -> List[Tuple[str, str]]:
+        return self._elements
+
+    @property
+    def kinds(self) -> np.ndarray:
+        return self._kinds
+
+    @property
+    def slots(self) -> np.ndarray:
+        return self._slots
+
+    def indices(self, elements: Iterable[Tuple[str, str]]) -> np.ndarray:
+        """
+        Returns the (row) index of each of the given pairs in this index, as
+        an integer array. The kinds and slots of these pairs are then simply
+        ``kinds[indices]`` and ``slots[indices]``.
+
+        Raises
+        ------
+        KeyError
+            When a pair is not in this index.
+        """
+        try:
+            return np.fromiter((self._indices[element]
+                                for element in elements), dtype=np.int64)
+        except KeyError as error:
+            msg = f"Element {error.args[0]} is not known."
+            logger.error(msg)
+            raise KeyError(msg) from None
+
+    def __getitem__(self, element: Tuple[str, str]) -> Tuple[int, int]:
+        """
+        Returns the kind and slot of the given (var, constr)-pair.
+        """
+        idx = self.indices([element])[0]
+        return int(self._kinds[idx]), int(self._slots[idx])
+
+    def __contains__(self, element: Tuple[str, str]) -> bool:
+        return element in self._indices
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def __repr__(self) -> str:
+        return f"ElementIndex({len(self)} elements)"
@@ -1,14 +1,36 @@
 import logging
-from typing import Any, Dict, List, Tuple
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-from scipy.stats import beta, gamma, lognorm, norm, rv_discrete, uniform
+from scipy.stats import beta, gamma, lognorm, norm, uniform
 
 from smps.constants import DISTRIBUTIONS, MODIFICATIONS
+from .DataColumns import DataColumns
 from .DataLine import DataLine
+from .DiscreteDistribution import DiscreteDistribution
+from .NameTable import NameTable
 
 logger = logging.getLogger(__name__)
 
+# Flat arrays of the (sorted) outcomes of all discrete elements, and for each
+# outcome the element it belongs to. Each element's outcomes are stored in the
+# range [start, start + length).
+_DiscreteArrays = namedtuple("_DiscreteArrays",
+                             "values probabilities cdf element starts lengths")
+
+# Vectorised samplers for each continuous distribution, taking the two
+# parameters in the order they are given in the INDEP section. See also the
+# various _add_* methods of Indep below.
+_SAMPLERS = {
+    "UNIFORM": lambda rng, a, b, size: rng.uniform(a, b, size),
+    "NORMAL": lambda rng, mean, var, size: rng.normal(mean, np.sqrt(var), size),
+    "GAMMA": lambda rng, scale, shape, size: rng.gamma(shape, scale, size),
+    "BETA": lambda rng, a, b, size: rng.beta(a, b, size),
+    "LOGNORM": lambda rng, mean, var, size: rng.lognormal(mean, np.sqrt(var),
+                                                          size),
+}
+
 
 class Indep:
     """
@@ -23,9 +45,16 @@ class Indep:
     modification : str
         Type of modification relative to the CORE file. One of MODIFICATIONS.
         Default "REPLACE".
+    names : Optional[NameTable]
+        Table in which the variable and constraint names are interned. The
+        random elements are stored by the IDs of their names in this table.
+        Default None (a new table).
     """
 
-    def __init__(self, distribution: str, modification: str = "REPLACE"):
+    def __init__(self,
+                 distribution: str,
+                 modification: str = "REPLACE",
+                 names: Optional[NameTable] = None):
         distribution = distribution.upper()
         modification = modification.upper()
 
@@ -43,12 +72,23 @@ class Indep:
 
         self._distribution = distribution
         self._modification = modification
+        self._names = NameTable() if names is None else names
+
+        # All elements are keyed by the (variable, constraint) IDs of their
+        # names. These are split because a discrete distribution is constructed
+        # value-by-value. Once the section is complete (see finalise()), the
+        # discrete outcomes are converted into flat arrays, from which the
+        # distributions are created (and cached) upon request.
+        self._randomness: Dict[Tuple[int, int], Any] = {}
+        self._discrete: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
 
-        # These are split because a discrete distribution is constructed
-        # value-by-value. Upon return (see get_for()) a scipy.stats discrete
-        # distribution is created.
-        self._randomness: Dict[Tuple[str, str], Any] = {}
-        self._discrete: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
+        self._arrays: Optional[_DiscreteArrays] = None
+        self._indices: Dict[Tuple[int, int], int] = {}
+        self._distributions: Dict[Tuple[int, int], DiscreteDistribution] = {}
+
+        # The parameters of each continuous distribution, as given. These are
+        # used for (vectorised) sampling.
+        self._params: Dict[Tuple[int, int], Tuple[float, float]] = {}
 
     @property
     def distribution(self) -> str:
@@ -58,22 +98,103 @@ class Indep:
     def modification(self) -> str:
         return self._modification
 
+    @property
+    def name_table(self) -> NameTable:
+        return self._names
+
+    @property
+    def elements(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (var, constr)-pairs of the random elements in this section,
+        in the order they were first added. This is also the column order of
+        ``sample``.
+        """
+        keys = self._discrete if self.is_finite() else self._randomness
+        names = self._names.names
+
+        return [(names[var], names[constr]) for var, constr in keys]
+
     def __len__(self) -> int:
         return len(self._randomness) + len(self._discrete)
 
+    def sample(self,
+               n: int,
+               rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draws n independent realisations of all random elements in this
+        section at once.
+
+        Parameters
+        ----------
+        n : int
+            Number of realisations to draw.
+        rng : Optional[np.random.Generator]
+            Random number generator to draw with. When not given, a new,
+            unseeded generator is used. Default None.
+
+        Returns
+        -------
+        np.ndarray
+            An (n, len(self)) array. Column j contains the realisations of the
+            j-th element (see ``elements``). These are the sampled values
+            themselves, irrespective of the modification type.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        if self.is_finite():
+            return self._sample_discrete(n, rng)
+
+        params = np.array(list(self._params.values()), dtype=float)
+        params = params.reshape(len(self._params), 2)
+
+        sampler = _SAMPLERS[self._distribution]
+        return sampler(rng, params[:, 0], params[:, 1], (n, len(self)))
+
     def get_for(self, var: str, constr: str):
         """
         Returns the randomness associated with the given variable and
-        constraint pair. Returns a ``scipy.stats`` distribution (possibly
-        discrete).
+        constraint pair. Returns a ``scipy.stats`` distribution, or, for
+        discrete sections, a (cached) DiscreteDistribution. The equivalent
+        ``scipy.stats`` distribution of the latter is available via its
+        ``to_scipy`` method.
         """
         logger.debug(f"Retrieving randomness for ({var}, {constr}).")
 
+        key = self._key(var, constr)
+
+        if key not in self._randomness and key not in self._discrete:
+            msg = f"({var}, {constr}) is not a random element of this section."
+            logger.error(msg)
+            raise KeyError(msg)
+
+        if not self.is_finite():
+            return self._randomness[key]
+
+        if key not in self._distributions:
+            arrays = self._discrete_arrays()
+
+            idx = self._indices[key]
+            start = arrays.starts[idx]
+            end = start + arrays.lengths[idx]
+
+            distribution = DiscreteDistribution(arrays.values[start:end],
+                                                arrays.probabilities[start:end],
+                                                arrays.cdf[start:end])
+
+            self._distributions[key] = distribution
+
+        return self._distributions[key]
+
+    def finalise(self):
+        """
+        Converts the discrete outcomes into compact arrays of outcomes,
+        probabilities, and cumulative probabilities. Called when the section
+        has been parsed completely, but also happens on demand. Does nothing
+        for continuous distributions.
+        """
         if self.is_finite():
-            return rv_discrete(values=zip(*self._discrete[var, constr]),
-                               name="discrete")
-        else:
-            return self._randomness[var, constr]
+            self._discrete_arrays()
 
     def is_finite(self) -> bool:
         """
@@ -87,83 +208,144 @@ class Indep:
         Common interface for adding (new) independent random variables of
         various distributions.
         """
+        self._add_entry(data_line.first_name(),
+                        data_line.second_name(),
+                        data_line.first_number(),
+                        data_line.second_number())
+
+    def add_entries(self, lines: DataColumns):
+        """
+        Adds (new) independent random variables for a whole batch of data
+        lines at once. See ``add_entry``.
+        """
+        fields = zip(lines.first_names,
+                     lines.second_names,
+                     lines.first_numbers,
+                     lines.second_numbers)
+
+        for var, constr, first, second in fields:
+            self._add_entry(var, constr, first, second)
+
+    def _key(self, var: str, constr: str) -> Tuple[int, int]:
+        """
+        Returns the IDs of the given names. Names that are not in the table
+        get ID -1, which is not the key of any element.
+        """
+        var_id, constr_id = self._names.ids((var, constr)).tolist()
+        return var_id, constr_id
+
+    def _add_entry(self, var: str, constr: str, first: float, second: float):
         funcs = {
-            "DISCRETE": self.add_discrete,
-            "UNIFORM": self.add_uniform,
-            "NORMAL": self.add_normal,
-            "GAMMA": self.add_gamma,
-            "BETA": self.add_beta,
-            "LOGNORM": self.add_log_normal,
+            "DISCRETE": self._add_discrete,
+            "UNIFORM": self._add_uniform,
+            "NORMAL": self._add_normal,
+            "GAMMA": self._add_gamma,
+            "BETA": self._add_beta,
+            "LOGNORM": self._add_log_normal,
         }
 
         func = funcs[self._distribution]
-        func(data_line)
+        func((self._names.add(var), self._names.add(constr)), first, second)
 
-    def add_discrete(self, data_line: DataLine):
-        var = data_line.first_name()
-        constr = data_line.second_name()
+    def _sample_discrete(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Samples all discrete elements by inverting their distribution functions
+        at once. Element j's distribution function is shifted to (j, j + 1], so
+        that a single sorted search finds the realisations of all elements.
+        """
+        arrays = self._discrete_arrays()
+        num_elements = len(arrays.starts)
 
-        obs = data_line.first_number()
-        prob = data_line.second_number()
+        if num_elements == 0:
+            return np.empty((n, 0))
 
-        if (var, constr) not in self._discrete:
-            # Does not use a defaultdict to make sure get_for() always raises
-            # a KeyError when (var, constr) is not known.
-            self._discrete[var, constr] = []
+        cdf = arrays.cdf + arrays.element
+        draws = rng.random((n, num_elements)) + np.arange(num_elements)
+        idcs = np.searchsorted(cdf, draws, side="right")
 
-        self._discrete[var, constr].append((obs, prob))
+        return arrays.values[np.minimum(idcs, len(arrays.values) - 1)]
 
-    def add_uniform(self, data_line: DataLine):
-        a = data_line.first_number()
-        b = data_line.second_number()
+    def _discrete_arrays(self) -> _DiscreteArrays:
+        if self._arrays is not None:
+            return self._arrays
 
-        # We get [a, b], but scipy expects [loc, loc + scale].
-        distribution = uniform(loc=a, scale=b - a)
+        logger.debug(f"Converting {len(self._discrete)} discrete elements.")
 
-        self._add(data_line, distribution)
+        lengths = np.array([len(dist) for dist in self._discrete.values()],
+                           dtype=int)
+        element = np.repeat(np.arange(len(lengths)), lengths)
+        starts = np.cumsum(lengths) - lengths
 
-    def add_normal(self, data_line: DataLine):
-        mean = data_line.first_number()
-        var = data_line.second_number()
+        outcomes = np.array([outcome for dist in self._discrete.values()
+                             for outcome in dist], dtype=float)
+        outcomes = outcomes.reshape(len(element), 2)
 
-        # We get the variance, but scipy expects a standard deviation.
-        distribution = norm(loc=mean, scale=np.sqrt(var))
+        # Sorts the outcomes of each element by value, as for scipy.stats.
+        order = np.lexsort((outcomes[:, 0], element))
+        values = outcomes[order, 0]
+        probs = outcomes[order, 1]
 
-        self._add(data_line, distribution)
+        # Cumulative probabilities within each element, normalised so each
+        # element's distribution function ends at exactly one.
+        cdf = np.empty(0)
 
-    def add_gamma(self, data_line: DataLine):
-        scale = data_line.first_number()
-        shape = data_line.second_number()
+        if len(lengths) != 0:
+            cum_probs = np.cumsum(probs)
+            before = cum_probs[starts] - probs[starts]
+            totals = np.add.reduceat(probs, starts)
 
-        distribution = gamma(shape, scale=scale)
+            cdf = (cum_probs - before[element]) / totals[element]
+            cdf[starts + lengths - 1] = 1.
 
-        self._add(data_line, distribution)
+        self._indices = {key: idx for idx, key in enumerate(self._discrete)}
+        self._arrays = _DiscreteArrays(values, probs, cdf, element,
+                                       starts, lengths)
 
-    def add_beta(self, data_line: DataLine):
-        a = data_line.first_number()
-        b = data_line.second_number()
+        return self._arrays
 
-        distribution = beta(a, b)
+    def _add_discrete(self, key: Tuple[int, int], obs: float, prob: float):
+        if self._arrays is not None:
+            # New outcomes invalidate any earlier conversion (see finalise()).
+            self._arrays = None
+            self._distributions = {}
 
-        self._add(data_line, distribution)
+        if key not in self._discrete:
+            # Does not use a defaultdict to make sure get_for() always raises
+            # a KeyError when (var, constr) is not known.
+            self._discrete[key] = []
 
-    def add_log_normal(self, data_line: DataLine):
-        mean = data_line.first_number()
-        var = data_line.second_number()
+        self._discrete[key].append((obs, prob))
 
+    def _add_uniform(self, key: Tuple[int, int], a: float, b: float):
+        self._params[key] = a, b
+
+        # We get [a, b], but scipy expects [loc, loc + scale].
+        self._randomness[key] = uniform(loc=a, scale=b - a)
+
+    def _add_normal(self, key: Tuple[int, int], mean: float, variance: float):
+        self._params[key] = mean, variance
+
+        # We get the variance, but scipy expects a standard deviation.
+        self._randomness[key] = norm(loc=mean, scale=np.sqrt(variance))
+
+    def _add_gamma(self, key: Tuple[int, int], scale: float, shape: float):
+        self._params[key] = scale, shape
+        self._randomness[key] = gamma(shape, scale=scale)
+
+    def _add_beta(self, key: Tuple[int, int], a: float, b: float):
+        self._params[key] = a, b
+        self._randomness[key] = beta(a, b)
+
+    def _add_log_normal(self,
+                        key: Tuple[int, int],
+                        mean: float,
+                        variance: float):
         # From the scipy documentation: "A common parametrization for a
         # lognormal random variable Y is in terms of the mean, mu, and standard
         # deviation, sigma, of the unique normally distributed random variable
         # X such that exp(X) = Y. This parametrization corresponds to setting
         # s = sigma and scale = exp(mu)."
-        distribution = lognorm(scale=np.exp(mean), s=np.sqrt(var))
-
-        self._add(data_line, distribution)
-
-    def _add(self, data_line, distribution):
-        var = data_line.first_name()
-        constr = data_line.second_name()
-
-        self._randomness[var, constr] = distribution
+        self._params[key] = mean, variance
+        distribution = lognorm(scale=np.exp(mean), s=np.sqrt(variance))
+        self._randomness[key] = distribution
 
-    # TODO sampling/convert discrete indep to scenarios?
@@ -0,0 +1,122 @@
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NameTable:
+    """
+    Interns the (variable, constraint, and other) names of a single instance,
+    and assigns each distinct name an integer ID. Each distinct name is then
+    stored only once. The parsers of an SMPS triplet share one table (see
+    ``read_smps``). The name columns of parsed data lines are interned (see
+    ``DataColumns``), so the CORE data, BLOCKS, and DISTRIB sections share
+    these strings. Scenario modifications, INDEP elements, and the
+    modifications of NODES sections store the IDs instead, as these are
+    cheaper to store, hash and compare than strings. Scenario names are not
+    interned here, so the table does not grow with the number of scenarios.
+
+    When pickled, the names are stored in a single contiguous string pool
+    with offsets (see ``pool``), rather than as separate strings.
+
+    Arguments
+    ---------
+    names : Iterable[str]
+        Initial names, which are assigned IDs in order. Default empty.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+        for name in names:
+            self.add(name)
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Returns the names in this table, by their ID.
+        """
+        return self._names
+
+    def add(self, name: str) -> int:
+        """
+        Returns the ID of the given name, which is added to the table if it is
+        not already in it.
+        """
+        idx = self._ids.get(name)
+
+        if idx is None:
+            idx = len(self._names)
+
+            self._ids[name] = idx
+            self._names.append(name)
+
+        return idx
+
+    def add_many(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Returns the IDs of the given names, as an integer array. Names that are
+        not already in the table are added.
+        """
+        return np.fromiter((self.add(name) for name in names), dtype=np.int32)
+
+    def intern(self, name: str) -> str:
+        """
+        Returns the table's (shared) copy of the given name, which is added to
+        the table if it is not already in it.
+        """
+        return self._names[self.add(name)]
+
+    def ids(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Returns the IDs of the given names, as an integer array. Names that are
+        not in the table get ID -1.
+        """
+        return np.fromiter((self._ids.get(name, -1) for name in names),
+                           dtype=np.int32)
+
+    def pool(self) -> Tuple[bytes, np.ndarray]:
+        """
+        Returns the names as a single UTF-8 encoded string pool, and the
+        offsets of each name in this pool. The name with ID i is
+        ``pool[offsets[i]:offsets[i + 1]].decode()``.
+        """
+        encoded = [name.encode() for name in self._names]
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+
+        return b"".join(encoded), offsets
+
+    @classmethod
+    def from_pool(cls, pool: bytes, offsets: np.ndarray) -> "NameTable":
+        """
+        Creates a name table from a string pool and offsets, as returned by
+        ``pool``.
+        """
+        bounds = offsets.tolist()
+        return cls(pool[start:end].decode()
+                   for start, end in zip(bounds, bounds[1:]))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        pool, offsets = self.pool()
+        return {"pool": pool, "offsets": offsets}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        table = NameTable.from_pool(state["pool"], state["offsets"])
+        self.__dict__.update(table.__dict__)
+
+    def __getitem__(self, idx: int) -> str:
+        return self._names[idx]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        return f"NameTable({len(self)} names)"
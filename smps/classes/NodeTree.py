@@ -0,0 +1,319 @@
+import logging
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .NameTable import NameTable
+
+logger = logging.getLogger(__name__)
+
+
+class NodeTree:
+    """
+    The scenario tree of a NODES section, stored as flat arrays. Each node
+    has a parent (index), a period, and a probability conditional on its
+    parent. The modifications of each node (relative to its parent) are
+    stored in CSR fashion: those of node i are at positions
+    [offsets[i], offsets[i + 1]) of the flat modification arrays.
+
+    Parents must be defined before their children, so nodes are always in
+    topological order. This allows all traversals to be done level-by-level,
+    or by pointer jumping, with vectorised operations.
+
+    The NODES sections of a STOCH file are DISCRETE, with REPLACE
+    modifications. Each ND line starts a node, giving its name, parent name
+    (any name containing ROOT denotes the root), conditional probability and
+    period. The lines that follow each give one or two modifications of that
+    node. Nodes without modifications, and multiple root nodes, are allowed.
+
+    Arguments
+    ---------
+    names : Optional[NameTable]
+        Table in which the constraint and variable names of the modifications
+        are interned. The modifications only store the IDs of these names, as
+        scenario modifications do. Default None (a new table).
+    """
+
+    def __init__(self, names: Optional[NameTable] = None):
+        self._table = NameTable() if names is None else names
+
+        self._names: List[str] = []
+        self._indices: Dict[str, int] = {}
+
+        self._parents = array('q')
+        self._periods = array('q')
+        self._probabilities = array('d')
+
+        self._period_names: List[str] = []
+        self._period_indices: Dict[str, int] = {}
+
+        self._offsets = array('q', [0])
+        self._constrs = array('i')
+        self._vars = array('i')
+        self._values = array('d')
+
+        # Arrays derived from the above, which are computed on first use, and
+        # reset whenever nodes or modifications are added.
+        self._cache: Dict[str, np.ndarray] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return self._names
+
+    @property
+    def name_table(self) -> NameTable:
+        """
+        Returns the table in which the names of the modifications are interned.
+        """
+        return self._table
+
+    @property
+    def parents(self) -> np.ndarray:
+        """
+        Returns the parent index of each node. Root nodes have parent -1.
+        """
+        return self._cached("parents",
+                            lambda: np.array(self._parents, dtype=np.int64))
+
+    @property
+    def period_names(self) -> List[str]:
+        """
+        Returns the period names, in the order they are first used.
+        """
+        return self._period_names
+
+    @property
+    def stages(self) -> np.ndarray:
+        """
+        Returns the stage of each node, as an index into ``period_names``.
+        """
+        return self._cached("stages",
+                            lambda: np.array(self._periods, dtype=np.int64))
+
+    @property
+    def conditional_probabilities(self) -> np.ndarray:
+        """
+        Returns the probability of each node, conditional on its parent.
+        """
+        return self._cached("conditional", lambda: np.array(self._probabilities,
+                                                            dtype=np.float64))
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        """
+        Returns the unconditional probability of each node, that is, the
+        product of the conditional probabilities on its path from the root.
+        Computed once, on first call.
+        """
+        return self._cached("probabilities", lambda: self._path_reduce(
+            self.conditional_probabilities, np.multiply))
+
+    @property
+    def depths(self) -> np.ndarray:
+        """
+        Returns the depth of each node. Root nodes have depth zero.
+        """
+        def depths():
+            ones = np.ones(len(self), dtype=np.int64)
+            return self._path_reduce(ones, np.add) - 1
+
+        return self._cached("depths", depths)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+        Returns the CSR offsets of the modifications of each node.
+        """
+        return self._cached("offsets",
+                            lambda: np.array(self._offsets, dtype=np.int64))
+
+    @property
+    def modification_values(self) -> np.ndarray:
+        return self._cached("values",
+                            lambda: np.array(self._values, dtype=np.float64))
+
+    @property
+    def modification_constraints(self) -> List[str]:
+        names = self._table.names
+        return [names[constr] for constr in self._constrs]
+
+    @property
+    def modification_variables(self) -> List[str]:
+        names = self._table.names
+        return [names[var] for var in self._vars]
+
+    @property
+    def modification_ids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the constraint and variable IDs (see ``name_table``) of the
+        flat modification arrays.
+        """
+        return (np.array(self._constrs, dtype=np.int32),
+                np.array(self._vars, dtype=np.int32))
+
+    def add_node(self, name: str, parent: str, probability: float, period: str):
+        """
+        Adds a node to the tree. Subsequent modifications belong to this node.
+
+        Raises
+        ------
+        KeyError
+            When the parent node has not been defined.
+        """
+        # As for scenarios, any parent name containing ROOT denotes the root,
+        # unless a node of that name has already been defined.
+        if parent not in self._indices and "ROOT" in parent.upper():
+            parent_idx = -1
+        else:
+            parent_idx = self.index(parent)
+
+        if period not in self._period_indices:
+            self._period_indices[period] = len(self._period_names)
+            self._period_names.append(period)
+
+        self._indices[name] = len(self._names)
+        self._names.append(name)
+
+        self._parents.append(parent_idx)
+        self._periods.append(self._period_indices[period])
+        self._probabilities.append(probability)
+        self._offsets.append(self._offsets[-1])
+
+        self._cache.clear()
+
+    def add_modification(self, constr: str, var: str, value: float):
+        """
+        Adds a modification to the most recently added node, relative to its
+        parent.
+        """
+        if len(self._names) == 0:
+            msg = "There is no node to add modifications to."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._constrs.append(self._table.add(constr))
+        self._vars.append(self._table.add(var))
+        self._values.append(value)
+
+        self._offsets[-1] += 1
+
+        self._cache.clear()
+
+    def index(self, name: str) -> int:
+        """
+        Returns the index of the node with the given name.
+        """
+        if name not in self._indices:
+            msg = f"Node {name} is not known."
+            logger.error(msg)
+            raise KeyError(msg)
+
+        return self._indices[name]
+
+    def modifications(self, node: int) -> List[Tuple[str, str, float]]:
+        """
+        Returns the modifications of the given node, relative to its parent,
+        as (constraint, variable, value)-tuples.
+        """
+        start, end = self._offsets[node], self._offsets[node + 1]
+        names = self._table.names
+
+        return [(names[constr], names[var], value)
+                for constr, var, value in zip(self._constrs[start:end],
+                                              self._vars[start:end],
+                                              self._values[start:end])]
+
+    def ancestors(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Returns the ancestors of the given nodes, as a (len(nodes), max_depth
+        + 1) array. Column d holds the ancestor at depth d (the node itself at
+        its own depth), and -1 beyond the node's depth.
+        """
+        nodes = np.atleast_1d(np.asarray(nodes, dtype=np.int64))
+        depths = self.depths[nodes]
+
+        table = np.full((len(nodes), depths.max(initial=-1) + 1), -1,
+                        dtype=np.int64)
+
+        current = nodes.copy()
+        rows = np.arange(len(nodes))
+
+        # Walks up the tree for all nodes at once, one level per step.
+        while np.any(current >= 0):
+            active = current >= 0
+            table[rows[active], self.depths[current[active]]] = current[active]
+            current[active] = self.parents[current[active]]
+
+        return table
+
+    def path(self, node: int) -> np.ndarray:
+        """
+        Returns the nodes on the path from the root to the given node.
+        """
+        return self.ancestors(np.array([node]))[0, :self.depths[node] + 1]
+
+    def children(self, node: int) -> np.ndarray:
+        return np.flatnonzero(self.parents == node)
+
+    def leaves(self) -> np.ndarray:
+        """
+        Returns the indices of all nodes without children.
+        """
+        parents = self.parents
+        num_children = np.bincount(parents[parents >= 0], minlength=len(self))
+
+        return np.flatnonzero(num_children == 0)
+
+    def stage_nodes(self, stage: int) -> np.ndarray:
+        """
+        Returns the indices of all nodes in the given stage.
+        """
+        return np.flatnonzero(self.stages == stage)
+
+    def subtree_sums(self, values: np.ndarray) -> np.ndarray:
+        """
+        Returns, for each node, the sum of the given node values over its
+        subtree (including the node itself). Children are added to their
+        parents level-by-level, starting from the deepest level.
+        """
+        sums = np.array(values, dtype=float, copy=True)
+        parents = self.parents
+        depths = self.depths
+
+        for depth in range(depths.max(initial=0), 0, -1):
+            level = np.flatnonzero(depths == depth)
+            np.add.at(sums, parents[level], sums[level])
+
+        return sums
+
+    def _cached(self, key: str, func: Callable[[], np.ndarray]) -> np.ndarray:
+        if key not in self._cache:
+            self._cache[key] = func()
+
+        return self._cache[key]
+
+    def _path_reduce(self, values: np.ndarray, ufunc: np.ufunc) -> np.ndarray:
+        """
+        Reduces the given node values along the path from the root to each
+        node, by pointer jumping. This takes a logarithmic (in the depth of
+        the tree) number of vectorised steps.
+        """
+        result = values.copy()
+        jump = self.parents.copy()
+
+        while np.any(jump >= 0):
+            active = np.flatnonzero(jump >= 0)
+            targets = jump[active]
+
+            # Both updates use the values of the previous step.
+            result[active] = ufunc(result[active], result[targets])
+            jump[active] = jump[targets]
+
+        return result
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        return f"NodeTree({len(self)} nodes)"
@@ -1,29 +1,68 @@
 import logging
+import sys
+import warnings
+from array import array
 from collections import namedtuple
-from functools import lru_cache
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from .NameTable import NameTable
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .ScenarioTree import ScenarioTree
 
 Modification = namedtuple("Modification", "constraint variable value")
 logger = logging.getLogger(__name__)
 
 
 class Scenario:
-    # Mapping of all scenarios by name. This is used to look-up any parent
-    # scenarios.
-    _scenarios: Dict[str, "Scenario"] = {}
+    """
+    A single scenario from a SCENARIOS section, storing its modifications
+    relative to the scenario it branches from. Scenarios are stored in (and
+    their parents are looked-up from) a ScenarioTree, see ``ScenarioTree.add``.
+
+    Arguments
+    ---------
+    name : str
+        Scenario name.
+    parent : str
+        Name of the parent scenario, or ROOT.
+    branch_period : str
+        Period (stage) in which this scenario branches from its parent.
+    probability : float
+        Probability of this scenario, in (0, 1).
+    names : Optional[NameTable]
+        Table in which the names of the modifications of this scenario are
+        interned. The modifications only store the IDs of these names. When
+        this differs from the table of the tree the scenario is added to, the
+        IDs are mapped to that table. Default None (a new table).
+    """
+
+    # The trees scenarios have been added to, in order, for the deprecated
+    # class methods below. Trees that are no longer used elsewhere are
+    # dropped from this.
+    _trees: "WeakKeyDictionary[ScenarioTree, None]" = WeakKeyDictionary()
 
     def __init__(self,
                  name: str,
                  parent: str,
                  branch_period: str,
-                 probability: float):
+                 probability: float,
+                 names: Optional[NameTable] = None):
         logger.debug(f"Creating a Scenario named {name} (parent {parent}),"
                      f" branching in period {branch_period}, with probability"
                      f" {probability}.")
 
-        self._name = name.strip()
-        self._parent = parent.strip()
-        self._branch_period = branch_period.strip()
+        self._names = NameTable() if names is None else names
+
+        # These are not added to the name table, since that would then grow
+        # with the number of scenarios, also when the scenarios are streamed.
+        # Interned strings are released once no scenario refers to them.
+        self._name = sys.intern(name.strip())
+        self._parent = sys.intern(parent.strip())
+        self._branch_period = sys.intern(branch_period.strip())
         self._probability = probability
 
         if not (0 < probability < 1):
@@ -32,9 +71,16 @@ class Scenario:
             raise ValueError(msg)
 
         # This stores all modification in this scenario, relative to the parent
-        # this scenario branches from.
-        self._modifications: List[Modification] = []
-        Scenario._scenarios[self._name] = self
+        # this scenario branches from, column-wise: the constraint and variable
+        # IDs in the name table, and the values.
+        self._constrs = array('i')
+        self._variables = array('i')
+        self._values = array('d')
+
+        # These are set once the scenario is added to a tree.
+        self._tree: Optional["ScenarioTree"] = None
+        self._index: Optional[int] = None
+        self._parent_index: Optional[int] = None
 
     @property
     def name(self) -> str:
@@ -49,20 +95,61 @@ class Scenario:
         if self.branches_from_root():
             return None
 
-        return Scenario._scenarios[self._parent]
+        if self._tree is None or self._parent_index is None:
+            msg = f"Scenario {self._name} is not part of a scenario tree."
+            logger.error(msg)
+            raise KeyError(msg)
+
+        return self._tree[self._parent_index]
+
+    @property
+    def index(self) -> Optional[int]:
+        """
+        Index of this scenario in its scenario tree, or None if the scenario
+        has not been added to a tree.
+        """
+        return self._index
+
+    @property
+    def parent_index(self) -> Optional[int]:
+        """
+        Index of the parent scenario in the scenario tree. This is -1 when the
+        scenario branches from root, and None if the scenario has not been
+        added to a tree.
+        """
+        return self._parent_index
 
     @property
     def branch_period(self) -> str:
         return self._branch_period
 
+    @property
+    def name_table(self) -> NameTable:
+        return self._names
+
     @property
     def modifications(self) -> List[Modification]:
         """
         Returns all modification local to this scenario (so different from
         parent). These are lists of named tuples, each with a constraint,
-        variable and value attribute.
+        variable and value attribute. The list is created from the stored
+        name IDs on each call.
+        """
+        names = self._names.names
+        mods = zip(self._constrs, self._variables, self._values)
+
+        return [Modification(names[constr], names[var], value)
+                for constr, var, value in mods]
+
+    @property
+    def modification_ids(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the modifications local to this scenario as arrays of the
+        constraint IDs, variable IDs (see ``name_table``), and values.
         """
-        return self._modifications
+        return (np.array(self._constrs, dtype=np.int32),
+                np.array(self._variables, dtype=np.int32),
+                np.array(self._values, dtype=float))
 
     @property
     def probability(self) -> float:
@@ -73,7 +160,12 @@ class Scenario:
         Adds a modification to the scenario. This is a modification relative
         to the parent scenario.
         """
-        self._modifications.append(Modification(constr, var, value))
+        self._constrs.append(self._names.add(constr))
+        self._variables.append(self._names.add(var))
+        self._values.append(value)
+
+        if self._tree is not None:  # resolved modifications are now stale.
+            self._tree.clear_memo()
 
     def branches_from_root(self) -> bool:
         """
@@ -82,44 +174,86 @@ class Scenario:
         """
         return "ROOT" in self._parent.upper()
 
-    @lru_cache(1)
     def modifications_from_root(self) -> List[Modification]:
         """
         Returns all modifications relative to the root, that is, different from
         the CORE file (this includes everything from the parent, its parent, and
-        so on until the root). Cached after first call.
+        so on until the root). Memoised by the scenario tree, see
+        ``ScenarioTree.modifications_from_root``.
         """
-        modifications = self.modifications
-
-        if self.branches_from_root():  # our modifications are all there is.
-            return modifications
-
-        from_parent = self.parent.modifications_from_root()
+        if self._tree is None:
+            if self.branches_from_root():  # our modifications are all there is.
+                return self.modifications
 
-        par = {(constr, var): value for constr, var, value in from_parent}
-        own = {(constr, var): value for constr, var, value in modifications}
-
-        par.update(own)
+            msg = f"Scenario {self._name} is not part of a scenario tree."
+            logger.error(msg)
+            raise KeyError(msg)
 
-        return [Modification(*key, value) for key, value in par.items()]
+        return self._tree.modifications_from_root(self)
 
     @classmethod
     def clear(cls):
         """
-        Empties the stored scenario mapping (cache).
+        Forgets the scenario trees that ``num_scenarios`` and ``scenarios``
+        look at. The trees themselves are not changed.
+
+        .. deprecated::
+            Scenarios are no longer stored globally, but in the ScenarioTree
+            of the StochParser that parsed them (see
+            ``StochParser.scenario_tree``). There is nothing to clear between
+            parses.
         """
-        cls._scenarios.clear()
+        _deprecated("Scenario.clear() is deprecated: scenarios are stored in"
+                    " the scenario tree of their parser.")
+        cls._trees.clear()
 
     @classmethod
     def num_scenarios(cls) -> int:
         """
-        Returns the number of scenarios stored in cache.
+        Returns the number of scenarios in the trees that scenarios have been
+        added to since the last ``clear``.
+
+        .. deprecated::
+            Use ``len(parser.scenario_tree)`` instead.
         """
-        return len(cls._scenarios)
+        _deprecated("Scenario.num_scenarios() is deprecated: use the length of"
+                    " the parser's scenario_tree instead.")
+        return sum(len(tree) for tree in cls._trees)
 
     @classmethod
     def scenarios(cls) -> List["Scenario"]:
-        return [scen for scen in cls._scenarios.values()]
+        """
+        Returns the scenarios in the trees that scenarios have been added to
+        since the last ``clear``, tree by tree.
+
+        .. deprecated::
+            Use ``parser.scenarios`` or ``parser.scenario_tree`` instead.
+        """
+        _deprecated("Scenario.scenarios() is deprecated: use the parser's"
+                    " scenarios or scenario_tree instead.")
+        return [scen for tree in list(cls._trees) for scen in tree]
+
+    def _attach(self, tree: "ScenarioTree", index: int, parent_index: int):
+        """
+        Called by the scenario tree this scenario is added to.
+        """
+        self._tree = tree
+        self._index = index
+        self._parent_index = parent_index
+
+        if tree not in Scenario._trees:
+            Scenario._trees[tree] = None
+
+    def _rebase(self, names: NameTable, mapping: np.ndarray):
+        """
+        Moves this scenario to the given name table. The mapping maps the IDs
+        of the current table to those of the given table, see
+        ``ScenarioTree.add``.
+        """
+        self._names = names
+
+        self._constrs = _remap(self._constrs, mapping)
+        self._variables = _remap(self._variables, mapping)
 
     def __str__(self) -> str:
         return (f"name={self._name},"
@@ -128,3 +262,17 @@ class Scenario:
 
     def __repr__(self) -> str:
         return f"Scenario({self})"
+
+
+def _deprecated(msg: str):
+    logger.warning(msg)
+    warnings.warn(msg, DeprecationWarning, stacklevel=3)
+
+
+def _remap(ids: array, mapping: np.ndarray) -> array:
+    remapped = array('i')
+    remapped.frombytes(mapping[np.array(ids, dtype=np.int32)]
+                       .astype(np.int32)
+                       .tobytes())
+
+    return remapped
@@ -0,0 +1,269 @@
+import logging
+import operator
+from functools import reduce
+from typing import Generator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .Block import Block
+from .Indep import Indep
+
+logger = logging.getLogger(__name__)
+
+Factor = Tuple[np.ndarray, np.ndarray]
+
+
+class ScenarioSpace:
+    """
+    The (lazy) Cartesian product of a number of independent, discrete factors.
+    Each factor is a random vector with finite support, given by a matrix of
+    outcomes (one row per outcome) and the probability of each outcome. Each
+    scenario selects one outcome of every factor, and the scenario probability
+    is the product of the selected outcome probabilities.
+
+    Scenarios are numbered in mixed-radix fashion, with the last factor varying
+    fastest (as ``itertools.product``). Nothing is materialised: scenario data
+    is computed on demand, for any (array of) scenario indices.
+
+    Arguments
+    ---------
+    factors : Sequence[Tuple[np.ndarray, np.ndarray]]
+        The factors, as (outcomes, probabilities)-tuples. The outcomes are
+        either a vector (for a single random element), or a matrix with one
+        column for each random element in the factor.
+    elements : Optional[List[Tuple[str, str]]]
+        The (var, constr)-pair of each random element, that is, of each column
+        in the scenario data. Default None.
+    """
+
+    def __init__(self,
+                 factors: Sequence[Factor],
+                 elements: Optional[List[Tuple[str, str]]] = None):
+        self._values: List[np.ndarray] = []
+        self._probabilities: List[np.ndarray] = []
+
+        for values, probabilities in factors:
+            values = np.asarray(values, dtype=float)
+            values = values.reshape(len(values), -1)
+            probabilities = np.asarray(probabilities, dtype=float)
+
+            if len(values) == 0 or len(values) != len(probabilities):
+                msg = (f"Factor has {len(values)} outcomes, but"
+                       f" {len(probabilities)} probabilities.")
+                logger.error(msg)
+                raise ValueError(msg)
+
+            self._values.append(values)
+            self._probabilities.append(probabilities)
+
+        self._radices = np.array([len(probs) for probs in self._probabilities],
+                                 dtype=np.int64)
+
+        num_elements = sum(values.shape[1] for values in self._values)
+
+        if elements is not None and len(elements) != num_elements:
+            msg = f"Expected {num_elements} elements, got {len(elements)}."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self._num_elements = num_elements
+        self._elements = elements
+        # Python integers, since the number of scenarios easily overflows.
+        self._num_scenarios = reduce(operator.mul,
+                                     (int(radix) for radix in self._radices),
+                                     1)
+
+    @classmethod
+    def from_indep(cls, indep_sections: Sequence[Indep]) -> "ScenarioSpace":
+        """
+        Returns the scenario space implied by the given (discrete) INDEP
+        sections, where each random element is a separate factor.
+
+        Raises
+        ------
+        ValueError
+            When one of the sections is not discrete.
+        """
+        factors = []
+        elements = []
+
+        for indep in indep_sections:
+            if not indep.is_finite():
+                msg = f"Cannot enumerate a {indep.distribution} distribution."
+                logger.error(msg)
+                raise ValueError(msg)
+
+            for element in indep.elements:
+                distr = indep.get_for(*element)
+
+                factors.append((distr.xk, distr.pk))
+                elements.append(element)
+
+        return cls(factors, elements)
+
+    @classmethod
+    def from_blocks(cls, blocks: Sequence[Block]) -> "ScenarioSpace":
+        """
+        Returns the scenario space implied by the given blocks, where each
+        block is a separate factor.
+        """
+        factors = [(block.values, block.probabilities) for block in blocks]
+        elements = [element for block in blocks for element in block.elements]
+
+        return cls(factors, elements)
+
+    def product(self, other: "ScenarioSpace") -> "ScenarioSpace":
+        """
+        Returns the Cartesian product of this scenario space and the other,
+        with the factors of this space first.
+        """
+        factors = list(zip(self._values, self._probabilities))
+        factors += list(zip(other._values, other._probabilities))
+
+        if self._elements is None or other._elements is None:
+            return ScenarioSpace(factors)
+
+        return ScenarioSpace(factors, self._elements + other._elements)
+
+    @property
+    def num_factors(self) -> int:
+        return len(self._radices)
+
+    @property
+    def num_elements(self) -> int:
+        """
+        Number of random elements, that is, the length of each scenario.
+        """
+        return self._num_elements
+
+    @property
+    def elements(self) -> Optional[List[Tuple[str, str]]]:
+        return self._elements
+
+    @property
+    def radices(self) -> np.ndarray:
+        """
+        Number of outcomes of each factor.
+        """
+        return self._radices
+
+    @property
+    def num_scenarios(self) -> int:
+        """
+        Number of scenarios, as a Python integer. This can be much larger than
+        what fits in a machine integer.
+        """
+        return self._num_scenarios
+
+    def digits(self, indices: Union[int, np.ndarray]) -> np.ndarray:
+        """
+        Decodes the given scenario indices into the selected outcome of each
+        factor, as an (len(indices), num_factors) integer array.
+
+        Raises
+        ------
+        IndexError
+            When an index is negative, or not smaller than the number of
+            scenarios.
+        """
+        indices = np.atleast_1d(np.asarray(indices, dtype=np.int64))
+
+        # Any machine integer is a valid index in a sufficiently large space.
+        num_scenarios = min(self.num_scenarios, np.iinfo(np.int64).max)
+
+        if np.any(indices < 0) or np.any(indices >= num_scenarios):
+            msg = "Scenario index out of range."
+            logger.error(msg)
+            raise IndexError(msg)
+
+        digits = np.empty((len(indices), self.num_factors), dtype=np.int64)
+        remainder = indices.copy()
+
+        # The last factor varies fastest, so we peel off digits from the back.
+        # This never forms the product of all radices, which might overflow.
+        for factor in range(self.num_factors - 1, -1, -1):
+            remainder, digits[:, factor] = np.divmod(remainder,
+                                                     self._radices[factor])
+
+        return digits
+
+    def probabilities(self, indices: Union[int, np.ndarray]) -> np.ndarray:
+        """
+        Returns the probability of each given scenario.
+        """
+        digits = self.digits(indices)
+        probs = np.ones(len(digits))
+
+        for factor, factor_probs in enumerate(self._probabilities):
+            probs *= factor_probs[digits[:, factor]]
+
+        return probs
+
+    def values(self, indices: Union[int, np.ndarray]) -> np.ndarray:
+        """
+        Returns the data of each given scenario, as a (len(indices),
+        num_elements) array.
+        """
+        digits = self.digits(indices)
+        data = [values[digits[:, factor]]
+                for factor, values in enumerate(self._values)]
+
+        if len(data) == 0:
+            return np.empty((len(digits), 0))
+
+        return np.hstack(data)
+
+    def iter_chunks(self,
+                    chunk_size: int = 65536,
+                    start: int = 0,
+                    stop: Optional[int] = None
+                    ) -> Generator[Tuple[np.ndarray, np.ndarray, np.ndarray],
+                                   None, None]:
+        """
+        Iterates over the scenarios in [start, stop), in chunks of consecutive
+        scenarios (generator).
+
+        Parameters
+        ----------
+        chunk_size : int
+            Maximum number of scenarios in each chunk. Default 65536.
+        start : int
+            Index of the first scenario. Default 0.
+        stop : Optional[int]
+            Index one past the last scenario. Default None, which iterates
+            until the last scenario.
+
+        Yields
+        ------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            Scenario indices, data, and probabilities of each chunk.
+        """
+        if stop is None:
+            stop = self.num_scenarios
+
+        for lower in range(start, stop, chunk_size):
+            indices = np.arange(lower, min(lower + chunk_size, stop),
+                                dtype=np.int64)
+
+            yield indices, self.values(indices), self.probabilities(indices)
+
+    def __getitem__(self, index: Union[int, np.ndarray]) -> np.ndarray:
+        """
+        Returns the data of the given scenario, as a vector. When an array of
+        indices is given, returns a matrix with one row per scenario.
+        """
+        if np.ndim(index) == 0:
+            return self.values(index)[0]
+
+        return self.values(index)
+
+    def __len__(self) -> int:
+        """
+        Number of scenarios. Raises an OverflowError when this does not fit in
+        a machine integer; use ``num_scenarios`` instead.
+        """
+        return self.num_scenarios
+
+    def __repr__(self) -> str:
+        return (f"ScenarioSpace({self.num_factors} factors,"
+                f" {self.num_scenarios} scenarios)")
@@ -0,0 +1,496 @@
+import logging
+from collections import namedtuple
+from typing import (Any, Callable, Dict, Iterator, List, MutableMapping,
+                    Optional, Tuple, Union)
+
+import numpy as np
+
+from .BoundedCache import BoundedCache
+from .NameTable import NameTable
+from .Scenario import Modification, Scenario
+
+MemoInfo = namedtuple("MemoInfo", "hits misses max_size size")
+logger = logging.getLogger(__name__)
+
+
+class ScenarioTree:
+    """
+    Stores the scenarios of a single SCENARIOS specification, and resolves
+    parent scenarios by their (integer) index in this tree. Each StochParser
+    owns its own tree, so that parsing different files does not mix their
+    scenarios.
+
+    The structure of the tree is also available as flat arrays: the parent,
+    depth and branch stage of each scenario, and a table of the ancestors of
+    each scenario. These are computed on first use, and reset whenever a
+    scenario is added.
+
+    Arguments
+    ---------
+    max_size : Optional[int]
+        When given, only the ``max_size`` most recently used scenarios are
+        kept. This is useful when streaming scenarios, where only recent
+        ancestors need to be looked-up. Default None (all are kept).
+    memo_size : Optional[int]
+        Number of (most recently used) resolved modification lists that are
+        memoised by ``modifications_from_root``. When None, the memo is
+        unbounded. Default 1024.
+    names : Optional[NameTable]
+        Table in which the names of the scenarios' modifications are interned.
+        Scenarios that use a different table are moved to this table when
+        they are added. Default None (a new table).
+    """
+
+    def __init__(self,
+                 max_size: Optional[int] = None,
+                 memo_size: Optional[int] = 1024,
+                 names: Optional[NameTable] = None):
+        self._max_size = max_size
+        self._names = NameTable() if names is None else names
+        self._num_added = 0
+
+        self._scenarios: MutableMapping[int, Scenario]
+        self._indices: MutableMapping[str, int]
+
+        if max_size is None:
+            self._scenarios = {}
+            self._indices = {}
+        else:
+            self._scenarios = BoundedCache(max_size)
+            self._indices = BoundedCache(max_size)
+
+        self._period_names: List[str] = []
+        self._period_indices: Dict[str, int] = {}
+
+        self._cache: Dict[str, np.ndarray] = {}
+
+        self._memo: BoundedCache = BoundedCache(memo_size)
+        self._hits = 0
+        self._misses = 0
+
+        # The last foreign name table, and the mapping of its IDs to ours.
+        # Scenarios parsed together tend to share a table, so this is usually
+        # computed only once per table.
+        self._foreign: Optional[NameTable] = None
+        self._mapping = np.empty(0, dtype=np.int32)
+
+    @property
+    def max_size(self) -> Optional[int]:
+        return self._max_size
+
+    @property
+    def names(self) -> NameTable:
+        """
+        Returns the name table of this tree. The name IDs of all scenarios in
+        this tree refer to this table.
+        """
+        return self._names
+
+    @property
+    def scenarios(self) -> List[Scenario]:
+        """
+        Returns the (kept) scenarios in this tree, as a list.
+        """
+        return list(self._scenarios.values())
+
+    @property
+    def parents(self) -> np.ndarray:
+        """
+        Returns the parent index of each scenario, as an integer array. Root
+        is indicated by -1.
+        """
+        def parents():
+            self._check_complete()
+            return np.array([scen.parent_index for scen in self.scenarios],
+                            dtype=int)
+
+        return self._cached("parents", parents)
+
+    @property
+    def depths(self) -> np.ndarray:
+        """
+        Returns the depth of each scenario in the tree, as an integer array.
+        Scenarios that branch from root have depth zero.
+        """
+        def depths():
+            # Pointer jumping: after each step, every scenario has added the
+            # depth of the ancestor it points to, and points twice as far up.
+            parents = self.parents
+            depths = (parents >= 0).astype(int)
+            jump = parents.copy()
+
+            while np.any(jump >= 0):
+                active = np.flatnonzero(jump >= 0)
+                targets = jump[active]
+
+                # Both updates use the values of the previous step.
+                depths[active] += depths[targets]
+                jump[active] = jump[targets]
+
+            return depths
+
+        return self._cached("depths", depths)
+
+    @property
+    def period_names(self) -> List[str]:
+        """
+        Returns the names of the branch periods, in the order they are first
+        used.
+        """
+        return self._period_names
+
+    @property
+    def branch_stages(self) -> np.ndarray:
+        """
+        Returns the branch period of each scenario, as an index into
+        ``period_names``.
+        """
+        def branch_stages():
+            self._check_complete()
+            return np.array([self._period_indices[scen.branch_period]
+                             for scen in self.scenarios], dtype=int)
+
+        return self._cached("branch_stages", branch_stages)
+
+    @property
+    def ancestors(self) -> np.ndarray:
+        """
+        Returns the ancestors of each scenario, as a (num_scenarios, max_depth
+        + 1) array. Column d holds the ancestor at depth d (the scenario itself
+        at its own depth), and -1 beyond the scenario's depth. Computed once,
+        on first call.
+        """
+        def ancestors():
+            parents = self.parents
+            depths = self.depths
+
+            table = np.full((len(parents), depths.max(initial=-1) + 1), -1,
+                            dtype=int)
+
+            current = np.arange(len(parents))
+            rows = np.arange(len(parents))
+
+            # Walks up the tree for all scenarios at once, one level per step.
+            while len(current) != 0:
+                table[rows, depths[current]] = current
+
+                has_parent = parents[current] >= 0
+                rows = rows[has_parent]
+                current = parents[current[has_parent]]
+
+            return table
+
+        return self._cached("ancestors", ancestors)
+
+    def path(self, index: int) -> np.ndarray:
+        """
+        Returns the indices of the scenarios on the path from the root to the
+        given scenario (inclusive).
+        """
+        return self.ancestors[index, :self.depths[index] + 1]
+
+    def inherit(self,
+                scenarios: np.ndarray,
+                keys: np.ndarray,
+                values: np.ndarray
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Resolves modifications relative to the root, for all scenarios at
+        once. The arguments describe the modifications local to each scenario
+        (relative to its parent), as (scenario index, key, value)-triplets.
+        Each scenario inherits the modifications of its parent, unless it
+        modifies the same key itself. When a scenario modifies a key more than
+        once, the last value is used.
+
+        This is done with a single gather over the ancestor table, see
+        ``ancestors``.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            Scenario indices, keys and values of the modifications relative to
+            the root, sorted by scenario index and key.
+        """
+        # Groups the local modifications by scenario, in CSR fashion, while
+        # keeping their order within each scenario.
+        order = np.argsort(scenarios, kind="stable")
+        keys = keys[order]
+        values = values[order]
+
+        counts = np.bincount(scenarios, minlength=len(self.parents))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # Row-major order visits the ancestors of each scenario from the root
+        # down, so later (more specific) modifications come last.
+        ancestors = self.ancestors
+        rows, _ = np.nonzero(ancestors >= 0)
+        ancs = ancestors[ancestors >= 0]
+
+        starts = offsets[ancs]
+        ends = offsets[ancs + 1]
+        idcs = _ranges(starts, ends)
+
+        res_scen = np.repeat(rows, ends - starts)
+        res_keys = keys[idcs]
+        res_vals = values[idcs]
+
+        # Sort by scenario, then key, then position, and keep the last of each
+        # (scenario, key) group.
+        order = np.lexsort((np.arange(len(res_scen)), res_keys, res_scen))
+
+        res_scen = res_scen[order]
+        res_keys = res_keys[order]
+        res_vals = res_vals[order]
+
+        last = np.ones(len(res_scen), dtype=bool)
+        last[:-1] = (res_scen[1:] != res_scen[:-1]) \
+            | (res_keys[1:] != res_keys[:-1])
+
+        return res_scen[last], res_keys[last], res_vals[last]
+
+    def modification_arrays(self) -> Tuple[np.ndarray, np.ndarray,
+                                           np.ndarray, np.ndarray]:
+        """
+        Returns the modifications local to each scenario (relative to its
+        parent) as flat arrays of scenario indices, constraint IDs, variable
+        IDs (see ``names``), and values. These can be passed to ``inherit``,
+        after combining the constraint and variable IDs into a single key.
+        """
+        self._check_complete()
+
+        scenarios = []
+        constrs = []
+        variables = []
+        values = []
+
+        for scen in self.scenarios:
+            scen_constrs, scen_vars, scen_values = scen.modification_ids
+
+            scenarios.append(np.full(len(scen_values), scen.index, dtype=int))
+            constrs.append(scen_constrs)
+            variables.append(scen_vars)
+            values.append(scen_values)
+
+        if len(scenarios) == 0:
+            return (np.empty(0, dtype=int),
+                    np.empty(0, dtype=np.int32),
+                    np.empty(0, dtype=np.int32),
+                    np.empty(0, dtype=float))
+
+        return (np.concatenate(scenarios),
+                np.concatenate(constrs),
+                np.concatenate(variables),
+                np.concatenate(values))
+
+    def modifications_from_root(self,
+                                scenario: Union[Scenario, int]
+                                ) -> List[Modification]:
+        """
+        Returns all modifications of the given scenario (or the scenario with
+        the given index) relative to the root. See
+        ``Scenario.modifications_from_root``.
+
+        Resolved modifications are memoised (see ``memo_info``). Each scenario
+        is resolved from the memoised modifications of its closest ancestor,
+        and the scenarios in between are memoised along the way. Resolving all
+        scenarios in order thus resolves each scenario only once, as long as
+        the memo holds the ancestors that are still needed.
+
+        The given scenario itself need not (or no longer) be in this tree,
+        which is the case for streamed scenarios that have been evicted.
+
+        Raises
+        ------
+        KeyError
+            When the scenario is not part of this tree, or an ancestor that
+            needs to be resolved is not (or no longer) in this tree.
+        """
+        if not isinstance(scenario, Scenario):
+            scenario = self[scenario]
+
+        if scenario._tree is not self:
+            msg = f"Scenario {scenario.name} is not part of this tree."
+            logger.error(msg)
+            raise KeyError(msg)
+
+        if scenario.index in self._memo:
+            self._hits += 1
+            return self._materialise(self._memo[scenario.index])
+
+        self._misses += 1
+
+        # Walks up until the root, or an ancestor that is already resolved.
+        # Only these ancestors are looked-up in the tree. Modifications are
+        # merged on their (constraint, variable) name IDs.
+        path = [scenario]
+        merged: Dict[Tuple[int, int], float] = {}
+
+        while not path[-1].branches_from_root():
+            parent_index = path[-1].parent_index
+            assert parent_index is not None
+
+            if parent_index in self._memo:
+                merged = dict(self._memo[parent_index])
+                break
+
+            path.append(self[parent_index])
+
+        # More specific (later) modifications overwrite those of ancestors.
+        for scenario in reversed(path):
+            mods = zip(scenario._constrs,
+                       scenario._variables,
+                       scenario._values)
+
+            for constr, var, value in mods:
+                merged[constr, var] = value
+
+            self._memo[scenario.index] = merged
+            merged = dict(merged)
+
+        return self._materialise(merged)
+
+    def memo_info(self) -> MemoInfo:
+        """
+        Returns the number of hits and misses of the memo of resolved
+        modifications, its maximum size, and its current size.
+        """
+        return MemoInfo(self._hits,
+                        self._misses,
+                        self._memo.max_size,
+                        len(self._memo))
+
+    def clear_memo(self):
+        """
+        Clears the memo of resolved modifications. This is done automatically
+        whenever a modification is added to a scenario in this tree.
+        """
+        if len(self._memo) != 0:
+            self._memo.clear()
+
+    def add(self, scenario: Scenario) -> int:
+        """
+        Adds the given scenario to the tree, and resolves its parent. Returns
+        the index of the newly added scenario.
+
+        Raises
+        ------
+        KeyError
+            When the parent scenario is not (or no longer) in this tree.
+        """
+        index = self._num_added
+
+        if scenario.name_table is not self._names:
+            mapping = self._mapping_of(scenario.name_table)
+            scenario._rebase(self._names, mapping)
+
+        if scenario.branches_from_root():
+            parent_index = -1
+        else:
+            parent_index = self.index(scenario._parent)
+
+        scenario._attach(self, index, parent_index)
+
+        period = scenario.branch_period
+
+        if period not in self._period_indices:
+            self._period_indices[period] = len(self._period_names)
+            self._period_names.append(period)
+
+        self._scenarios[index] = scenario
+        self._indices[scenario.name] = index
+        self._num_added += 1
+
+        self._cache.clear()
+
+        return index
+
+    def index(self, name: str) -> int:
+        """
+        Returns the index of the scenario with the given name.
+        """
+        if name not in self._indices:
+            msg = f"Scenario {name} is not known."
+            logger.error(msg)
+            raise KeyError(msg)
+
+        index = self._indices[name]
+
+        # A look-up by name also counts as use of the scenario itself, so that
+        # parents that are still referenced are not evicted from the tree.
+        if index in self._scenarios:
+            self._scenarios[index] = self._scenarios[index]
+
+        return index
+
+    def _mapping_of(self, table: NameTable) -> np.ndarray:
+        # Tables can grow after the mapping is computed, in which case only
+        # the new names need to be mapped.
+        if table is not self._foreign:
+            self._foreign = table
+            self._mapping = np.empty(0, dtype=np.int32)
+
+        if len(self._mapping) < len(table):
+            new = self._names.add_many(table.names[len(self._mapping):])
+            self._mapping = np.concatenate((self._mapping, new))
+
+        return self._mapping
+
+    def _materialise(self,
+                     merged: Dict[Tuple[int, int], float]
+                     ) -> List[Modification]:
+        names = self._names.names
+        return [Modification(names[constr], names[var], value)
+                for (constr, var), value in merged.items()]
+
+    def _cached(self, key: str, func: Callable[[], np.ndarray]) -> np.ndarray:
+        if key not in self._cache:
+            self._cache[key] = func()
+
+        return self._cache[key]
+
+    def _check_complete(self):
+        if len(self._scenarios) != self._num_added:
+            msg = "Some scenarios have been evicted from this (bounded) tree."
+            logger.error(msg)
+            raise ValueError(msg)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The memo can always be recomputed, so it is not pickled.
+        state = self.__dict__.copy()
+        state["_memo"] = BoundedCache(self._memo.max_size)
+        state["_foreign"] = None
+        state["_mapping"] = np.empty(0, dtype=np.int32)
+
+        return state
+
+    def __getitem__(self, index: int) -> Scenario:
+        if index not in self._scenarios:
+            msg = f"Scenario with index {index} is not known."
+            logger.error(msg)
+            raise KeyError(msg)
+
+        return self._scenarios[index]
+
+    def __iter__(self) -> Iterator[Scenario]:
+        return iter(self.scenarios)
+
+    def __len__(self) -> int:
+        return len(self._scenarios)
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Returns the concatenation of range(start, end) for each start and end pair,
+    without a Python loop.
+    """
+    lengths = ends - starts
+    total = lengths.sum()
+
+    if total == 0:
+        return np.empty(0, dtype=int)
+
+    # Each position is the start of its range, plus the offset in that range.
+    range_starts = np.cumsum(lengths) - lengths
+    offsets = np.arange(total) - np.repeat(range_starts, lengths)
+
+    return np.repeat(starts, lengths) + offsets
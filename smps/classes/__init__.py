@@ -1,3 +1,13 @@
+from .Block import Block
+from .BoundedCache import BoundedCache
+from .DataColumns import DataColumns
 from .DataLine import DataLine
+from .DiscreteDistribution import DiscreteDistribution
+from .Distrib import Distrib
+from .ElementIndex import ElementIndex
 from .Indep import Indep
+from .NameTable import NameTable
+from .NodeTree import NodeTree
 from .Scenario import Scenario
+from .ScenarioSpace import ScenarioSpace
+from .ScenarioTree import ScenarioTree
@@ -0,0 +1,105 @@
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_equal, assert_raises
+
+from smps.classes import Block
+from smps.constants import MODIFICATIONS
+
+
+def _block() -> Block:
+    block = Block("BLOCK1", "STAGE-2")
+
+    block.add_realisation(0.5)
+    block.add_entry("RHS", "C2", 21)
+    block.add_entry("RHS", "C3", 31)
+
+    block.add_realisation(0.25)
+    block.add_entry("RHS", "C2", 22)
+
+    block.add_realisation(0.25)
+    block.add_entry("RHS", "C3", 33)
+    block.add_entry("RHS", "C2", 23)
+
+    return block
+
+
+def test_raises_strange_modification_type():
+    with assert_raises(ValueError):
+        Block("BLOCK1", "STAGE-2", "strange modification")
+
+    for modification in MODIFICATIONS:
+        block = Block("BLOCK1", "STAGE-2", modification)
+        assert_equal(block.modification, modification)
+
+
+def test_raises_entry_before_realisation():
+    block = Block("BLOCK1", "STAGE-2")
+
+    with assert_raises(ValueError):
+        block.add_entry("RHS", "C2", 21)
+
+
+def test_raises_no_realisations():
+    block = Block("BLOCK1", "STAGE-2")
+
+    with assert_raises(ValueError):
+        block.finalise()
+
+    with assert_raises(ValueError):
+        block.sample(10)
+
+
+def test_str():
+    block = Block("BLOCK1", "STAGE-2")
+
+    assert_equal(str(block), "name=BLOCK1, period=STAGE-2")
+    assert_equal(repr(block), "Block(name=BLOCK1, period=STAGE-2)")
+
+
+def test_values():
+    """
+    Tests if the realisations are stored as a matrix, where elements that are
+    not listed in a realisation take their value from the first realisation.
+    """
+    block = _block()
+
+    assert_equal(len(block), 3)
+    assert_equal(block.elements, [("RHS", "C2"), ("RHS", "C3")])
+    assert_almost_equal(block.probabilities, [0.5, 0.25, 0.25])
+    assert_almost_equal(block.values, [[21, 31], [22, 31], [23, 33]])
+
+
+def test_raises_element_not_in_first_realisation():
+    block = Block("BLOCK1", "STAGE-2")
+
+    block.add_realisation(0.5)
+    block.add_entry("RHS", "C2", 21)
+
+    block.add_realisation(0.5)
+    block.add_entry("RHS", "C3", 31)
+
+    with assert_raises(ValueError):
+        block.finalise()
+
+
+def test_realisations_after_finalise():
+    block = _block()
+    assert_equal(block.values.shape, (3, 2))
+
+    block.add_realisation(0.1)
+    block.add_entry("RHS", "C2", 24)
+
+    assert_almost_equal(block.values[-1], [24, 31])
+
+
+def test_sample():
+    """
+    Tests if realisations are drawn jointly, with (about) their probabilities.
+    """
+    block = _block()
+
+    samples = block.sample(100_000, np.random.default_rng(1))
+    assert_equal(samples.shape, (100_000, 2))
+
+    rows, counts = np.unique(samples, axis=0, return_counts=True)
+    assert_almost_equal(rows, block.values)
+    assert_almost_equal(counts / len(samples), [0.5, 0.25, 0.25], decimal=2)
@@ -0,0 +1,42 @@
+import pytest
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from smps.classes import BoundedCache
+
+
+@pytest.mark.parametrize("max_size", [0, -1])
+def test_raises_invalid_max_size(max_size):
+    with assert_raises(ValueError):
+        BoundedCache(max_size)
+
+
+def test_unbounded():
+    cache = BoundedCache()
+
+    for idx in range(100):
+        cache[idx] = idx
+
+    assert_equal(len(cache), 100)
+    assert_equal(cache.max_size, None)
+
+
+def test_evicts_least_recently_used():
+    cache = BoundedCache(2)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert_equal(cache["a"], 1)  # now "b" is the least recently used.
+
+    cache["c"] = 3
+
+    assert_equal(len(cache), 2)
+    assert_("b" not in cache)
+    assert_equal(list(cache), ["a", "c"])
+
+
+def test_delete():
+    cache = BoundedCache(2)
+    cache["a"] = 1
+
+    del cache["a"]
+    assert_equal(len(cache), 0)
@@ -0,0 +1,112 @@
+import pytest
+from numpy.testing import assert_, assert_almost_equal, assert_equal
+
+from smps.classes import DataColumns, DataLine
+
+# From the mps_test_file_small.mps and stoch_small_scenarios_problem.sto files.
+_LINES = [" N  COST",
+          "    XONE      COST                1    LIM1                 1",
+          "    XONE      LIM2                1",
+          " SC SCEN01    ROOT      0.333333       STAGE-2",
+          " UP BND1      XONE                4"]
+
+
+def test_len():
+    lines = DataColumns(_LINES)
+    assert_equal(len(lines), len(_LINES))
+
+    assert_equal(len(DataColumns([])), 0)
+
+
+def test_raw():
+    lines = DataColumns(_LINES)
+    assert_equal(lines.raw(), _LINES)
+
+
+def test_iter():
+    """
+    Tests if iterating yields DataLine objects, one for each line.
+    """
+    lines = DataColumns(_LINES)
+
+    for data_line, line in zip(lines, _LINES):
+        assert_(isinstance(data_line, DataLine))
+        assert_equal(data_line.raw(), line)
+
+
+@pytest.mark.parametrize("column,method", [("indicators", "indicator"),
+                                           ("first_names", "first_name"),
+                                           ("second_names", "second_name"),
+                                           ("third_names", "third_name")])
+def test_text_columns_agree_with_data_line(column, method):
+    """
+    Tests if the text columns agree with the fields of individual DataLines.
+    """
+    lines = DataColumns(_LINES)
+    expected = [getattr(DataLine(line), method)() for line in _LINES]
+
+    assert_equal(getattr(lines, column), expected)
+
+
+@pytest.mark.parametrize("column,method", [("first_numbers", "first_number"),
+                                           ("second_numbers", "second_number")])
+def test_numeric_columns_agree_with_data_line(column, method):
+    """
+    Tests if the numeric columns agree with the fields of individual DataLines,
+    including NaN for empty fields.
+    """
+    lines = DataColumns(_LINES)
+    expected = [getattr(DataLine(line), method)() for line in _LINES]
+
+    assert_almost_equal(getattr(lines, column), expected)
+
+
+def test_columns_are_tokenised_once():
+    """
+    Columns are computed on first access, and then re-used.
+    """
+    lines = DataColumns(_LINES)
+    assert_(lines.first_names is lines.first_names)
+    assert_(lines.first_numbers is lines.first_numbers)
+
+
+_FREE_LINES = [" N COST",
+               " XONE COST 1 LIMIT_NUMBER_ONE 1",
+               " XONE LIM2 1",
+               " MARKER 'MARKER' 'INTORG'",
+               " SC SCEN01 ROOT 0.333333 STAGE-2",
+               " UP BND1 XONE 4"]
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+@pytest.mark.parametrize("column,method", [("indicators", "indicator"),
+                                           ("first_names", "first_name"),
+                                           ("second_names", "second_name"),
+                                           ("first_numbers", "first_number"),
+                                           ("third_names", "third_name"),
+                                           ("second_numbers", "second_number")])
+def test_free_format_columns_agree_with_data_line(as_bytes, column, method):
+    indicators = {"N", "SC", "UP"}
+    raw = [line.encode() for line in _FREE_LINES] if as_bytes else _FREE_LINES
+
+    lines = DataColumns(raw, free_format=True, indicators=indicators)
+    expected = [getattr(DataLine(line, True, indicators), method)()
+                for line in _FREE_LINES]
+
+    if column.endswith("numbers"):
+        assert_almost_equal(getattr(lines, column), expected)
+    else:
+        assert_equal(getattr(lines, column), expected)
+
+
+def test_free_format_columns():
+    lines = DataColumns(_FREE_LINES,
+                        free_format=True,
+                        indicators={"N", "SC", "UP"})
+
+    assert_equal(lines.indicators, ["N", "", "", "", "SC", "UP"])
+    assert_equal(lines.second_names[1], "COST")
+    assert_equal(lines.third_names[1], "LIMIT_NUMBER_ONE")
+    assert_equal(lines.third_names[3], "'INTORG'")
+    assert_almost_equal(lines.first_numbers[4], 0.333333)
+    assert_equal(lines.first_names[5], "BND1")
@@ -2,6 +2,7 @@ import pytest
 from numpy.testing import (assert_, assert_almost_equal, assert_equal)
 
 from smps.classes import DataLine
+from smps.classes.DataLine import is_free_format, is_free_header
 
 # These are used to parametrise testing the text fields (i.e., the first,
 # second, and third name fields).
@@ -240,4 +241,66 @@ def test_second_header_word(line, expected):
     assert_(header_line.is_header())
     assert_equal(header_line.second_header_word(), expected)
 
+
+@pytest.mark.parametrize("line,expected", [
+    (" SC SCENARIO_ONE ROOT 0.5 STAGE-2",
+     ("SC", "SCENARIO_ONE", "ROOT", 0.5, "STAGE-2")),
+    (" VARIABLE_ONE CONSTRAINT_ONE 1.5 CONSTRAINT_TWO 2",
+     ("", "VARIABLE_ONE", "CONSTRAINT_ONE", 1.5, "CONSTRAINT_TWO")),
+    (" MARKER 'MARKER' 'INTORG'", ("", "MARKER", "'MARKER'", None, "'INTORG'")),
+    ("\tX1\tC1\tPERIOD1", ("", "X1", "C1", None, "PERIOD1"))])
+def test_free_format_fields(line, expected):
+    """
+    Tests if free format data lines are split into the fields on white space,
+    regardless of their column positions.
+    """
+    data_line = DataLine(line, free_format=True, indicators={"SC"})
+    indicator, first, second, number, third = expected
+
+    assert_(data_line.is_free_format())
+    assert_equal(data_line.indicator(), indicator)
+    assert_equal(data_line.first_name(), first)
+    assert_equal(data_line.second_name(), second)
+    assert_equal(data_line.third_name(), third)
+
+    if number is None:
+        assert_(not data_line.has_second_number())
+        assert_equal(data_line.first_number(), float("nan"))
+    else:
+        assert_almost_equal(data_line.first_number(), number)
+
+
+def test_free_format_header():
+    data_line = DataLine("BLOCKS DISCRETE MULTIPLY", free_format=True)
+
+    assert_equal(data_line.first_header_word(), "BLOCKS")
+    assert_equal(data_line.second_header_word(), "DISCRETE MULTIPLY")
+    assert_equal(data_line.second_name(), "DISCRETE")
+    assert_equal(data_line.third_name(), "MULTIPLY")
+
+
+@pytest.mark.parametrize("lines,expected", [
+    ([" N  COST", "    XONE      COST                1    LIM1         1"],
+     False),
+    ([" N COST", " XONE COST 1 LIM1 1"], True),
+    (["    VARIABLE_ONE  COST                1"], True),  # name is too long
+    ([b"    XONE      COST                1"], False),
+    ([b"    XONE COST 1"], True),  # two names in the first name field
+    (["    XÉÉN      COST                1"], False),
+    (["    XÉÉN COST 1"], True),
+    ([" N  COST"] * 5000 + [" L  A_LONG_CONSTRAINT_NAME"], True),
+    ([], False)])
+def test_is_free_format(lines, expected):
+    assert_equal(is_free_format(lines), expected)
+
+
+@pytest.mark.parametrize("line,expected", [
+    ("NAME          TESTPROB", False),
+    ("PERIODS       IMPLICIT", False),
+    ("ROWS", False),
+    ("NAME TESTPROB", True),
+    (b"PERIODS IMPLICIT", True)])
+def test_is_free_header(line, expected):
+    assert_equal(is_free_header(line), expected)
+
 # TODO
@@ -0,0 +1,88 @@
+import numpy as np
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from smps.classes import DiscreteDistribution
+
+
+def _distribution() -> DiscreteDistribution:
+    # Same as the first part of the LandS stoch file.
+    return DiscreteDistribution(np.array([3, 5, 7]), np.array([0.3, 0.4, 0.3]))
+
+
+def test_support():
+    distr = _distribution()
+
+    assert_almost_equal(distr.xk, [3, 5, 7])
+    assert_almost_equal(distr.pk, [0.3, 0.4, 0.3])
+    assert_equal(distr.name, "discrete")
+    assert_equal(len(distr), 3)
+
+
+def test_moments_agree_with_scipy():
+    distr = _distribution()
+    scipy_distr = distr.to_scipy()
+
+    assert_almost_equal(distr.mean(), scipy_distr.mean())
+    assert_almost_equal(distr.var(), scipy_distr.var())
+
+
+def test_probabilities_are_normalised():
+    """
+    Rounding noise in the sum of the probabilities is normalised away, so that
+    the moments agree with the distribution function (and the sampler).
+    """
+    distr = DiscreteDistribution([3, 5, 7], [0.333333, 0.333333, 0.333333])
+
+    assert_almost_equal(distr.pk.sum(), 1)
+    assert_almost_equal(distr.mean(), 5)
+    assert_equal(distr.cdf(7), 1)
+
+
+def test_raises_probabilities_not_one():
+    with assert_raises(ValueError):
+        DiscreteDistribution([3, 5, 7], [0.6, 0.8, 0.6])
+
+    with assert_raises(ValueError):
+        DiscreteDistribution([3, 5], [0.3, 0.4])
+
+    with assert_raises(ValueError):
+        DiscreteDistribution([3, 5], [0, 0])
+
+    with assert_raises(ValueError):
+        DiscreteDistribution([], [])
+
+
+def test_cdf_and_ppf_agree_with_scipy():
+    distr = _distribution()
+    scipy_distr = distr.to_scipy()
+
+    x = np.array([2, 3, 4, 5, 6, 7, 8])
+    assert_almost_equal(distr.cdf(x), scipy_distr.cdf(x))
+
+    q = np.array([0.1, 0.3, 0.5, 0.7, 0.9, 1])
+    assert_almost_equal(distr.ppf(q), scipy_distr.ppf(q))
+
+
+def test_rvs():
+    """
+    Tests if random outcomes are drawn with (about) their probabilities, and if
+    the same seed gives the same outcomes.
+    """
+    distr = _distribution()
+
+    samples = distr.rvs(100_000, random_state=1)
+    values, counts = np.unique(samples, return_counts=True)
+
+    assert_almost_equal(values, [3, 5, 7])
+    assert_almost_equal(counts / len(samples), [0.3, 0.4, 0.3], decimal=2)
+
+    assert_almost_equal(distr.rvs(10, random_state=1), samples[:10])
+    assert_equal(np.shape(distr.rvs()), ())
+
+
+def test_to_scipy_is_cached():
+    distr = _distribution()
+
+    assert_(distr.to_scipy() is distr.to_scipy())
+    assert_equal(distr.to_scipy().name, "discrete")
@@ -0,0 +1,99 @@
+import numpy as np
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from smps.classes import Distrib
+from smps.constants import MODIFICATIONS
+
+
+def _distrib() -> Distrib:
+    distrib = Distrib("DEMAND", "STAGE-2", "MVNORMAL")
+
+    distrib.add_entry("RHS", "C2", 10)
+    distrib.add_entry("RHS", "C3", 20)
+
+    distrib.add_matrix_entry(0, 0, 4)
+    distrib.add_matrix_entry(0, 1, 3)
+    distrib.add_matrix_entry(1, 1, 9)
+
+    return distrib
+
+
+def test_raises_strange_modification_type():
+    with assert_raises(ValueError):
+        Distrib("DEMAND", "STAGE-2", "MVNORMAL", "strange modification")
+
+    for modification in MODIFICATIONS:
+        distrib = Distrib("DEMAND", "STAGE-2", "MVNORMAL", modification)
+        assert_equal(distrib.modification, modification)
+
+
+def test_raises_unknown_distribution():
+    with assert_raises(ValueError):
+        Distrib("DEMAND", "STAGE-2", "strange distribution")
+
+
+def test_str():
+    distrib = Distrib("DEMAND", "STAGE-2", "mvnormal")
+
+    assert_equal(str(distrib),
+                 "name=DEMAND, period=STAGE-2, distribution=MVNORMAL")
+    assert_equal(repr(distrib),
+                 "Distrib(name=DEMAND, period=STAGE-2, distribution=MVNORMAL)")
+
+
+def test_parameters_and_matrix():
+    """
+    Tests if the parameter matrix is symmetric, with zeroes for entries that
+    are not given.
+    """
+    distrib = _distrib()
+
+    assert_equal(len(distrib), 2)
+    assert_equal(distrib.elements, [("RHS", "C2"), ("RHS", "C3")])
+    assert_almost_equal(distrib.parameters, [10, 20])
+    assert_almost_equal(distrib.matrix, [[4, 3], [3, 9]])
+
+    distrib.add_entry("RHS", "C4", 30)
+    assert_almost_equal(distrib.matrix, [[4, 3, 0], [3, 9, 0], [0, 0, 0]])
+
+
+def test_raises_duplicate_element():
+    distrib = _distrib()
+
+    with assert_raises(ValueError):
+        distrib.add_entry("RHS", "C2", 15)
+
+
+def test_raises_matrix_entry_of_unknown_element():
+    distrib = _distrib()
+    distrib.add_matrix_entry(0, 2, 1)
+
+    with assert_raises(ValueError):
+        distrib.finalise()
+
+
+def test_sample():
+    """
+    Tests if sampling draws a whole batch of correlated realisations at once,
+    with (approximately) the given means and covariances.
+    """
+    distrib = _distrib()
+    samples = distrib.sample(100_000, np.random.default_rng(1))
+
+    assert_equal(samples.shape, (100_000, 2))
+    assert_almost_equal(samples.mean(axis=0), [10, 20], decimal=1)
+    assert_almost_equal(np.cov(samples.T), [[4, 3], [3, 9]], decimal=1)
+
+    # Same seed gives the same samples.
+    assert_almost_equal(distrib.sample(100_000, np.random.default_rng(1)),
+                        samples)
+
+
+def test_log_normal():
+    distrib = Distrib("DEMAND", "STAGE-2", "MVLOGNORM")
+    distrib.add_entry("RHS", "C2", 0)
+    distrib.add_matrix_entry(0, 0, 1)
+
+    samples = distrib.sample(1000, np.random.default_rng(1))
+    assert_(np.all(samples > 0))
@@ -0,0 +1,49 @@
+import numpy as np
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from smps.classes import ElementIndex
+
+
+def _index() -> ElementIndex:
+    elements = [("RHS", "C1"), ("X1", "OBJ"), ("X1", "C2"), ("X9", "C9")]
+    kinds = np.array([ElementIndex.RHS,
+                      ElementIndex.OBJECTIVE,
+                      ElementIndex.COEFFICIENT,
+                      ElementIndex.UNKNOWN])
+
+    return ElementIndex(elements, kinds, np.array([0, 0, 3, -1]))
+
+
+def test_raises_different_lengths():
+    with assert_raises(ValueError):
+        ElementIndex([("RHS", "C1")], [ElementIndex.RHS], [0, 1])
+
+
+def test_raises_duplicate_elements():
+    with assert_raises(ValueError):
+        ElementIndex([("RHS", "C1"), ("RHS", "C1")],
+                     [ElementIndex.RHS, ElementIndex.RHS],
+                     [0, 0])
+
+
+def test_look_up():
+    index = _index()
+
+    assert_equal(len(index), 4)
+    assert_(("X1", "C2") in index)
+    assert_(("X1", "C3") not in index)
+
+    assert_equal(index["RHS", "C1"], (ElementIndex.RHS, 0))
+    assert_equal(index["X1", "C2"], (ElementIndex.COEFFICIENT, 3))
+    assert_equal(index["X9", "C9"], (ElementIndex.UNKNOWN, -1))
+
+
+def test_indices():
+    index = _index()
+    rows = index.indices([("X1", "C2"), ("RHS", "C1"), ("X1", "C2")])
+
+    assert_equal(rows, [2, 0, 2])
+    assert_equal(index.slots[rows], [3, 0, 3])
+
+    with assert_raises(KeyError):
+        index.indices([("X1", "C3")])
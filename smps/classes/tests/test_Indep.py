@@ -1,8 +1,9 @@
 import numpy as np
 import pytest
-from numpy.testing import assert_almost_equal, assert_equal, assert_raises
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
 
-from smps.classes import DataLine, Indep
+from smps.classes import DataLine, Indep, NameTable
 from smps.constants import DISTRIBUTIONS, MODIFICATIONS
 
 
@@ -182,3 +183,152 @@ def test_discrete():
     assert_almost_equal(distr.xk, [3, 5, 7])
 
     assert_equal(distr.name, "discrete")
+
+
+def test_elements():
+    indep = Indep("NORMAL")
+
+    lines = ["    RHS       DEMAND2   7.0            PERIOD2   2",
+             "    RHS       DEMAND1   7.0            PERIOD2   2"]
+
+    for line in lines:
+        indep.add_entry(DataLine(line))
+
+    assert_equal(indep.elements, [("RHS", "DEMAND2"), ("RHS", "DEMAND1")])
+
+
+def test_sample_discrete():
+    """
+    Tests if sampling a discrete section draws each outcome with (about) its
+    probability, independently for each element.
+    """
+    indep = Indep("DISCRETE")
+
+    lines = ["    RHS       DEMAND1   3.0            PERIOD2   0.3",
+             "    RHS       DEMAND1   5.0            PERIOD2   0.7",
+             "    RHS       DEMAND2   2.0            PERIOD2   0.1",
+             "    RHS       DEMAND2   3.0            PERIOD2   0.4",
+             "    RHS       DEMAND2   4.0            PERIOD2   0.5"]
+
+    for line in lines:
+        indep.add_entry(DataLine(line))
+
+    samples = indep.sample(100_000, np.random.default_rng(1))
+    assert_equal(samples.shape, (100_000, 2))
+
+    values, counts = np.unique(samples[:, 0], return_counts=True)
+    assert_almost_equal(values, [3, 5])
+    assert_almost_equal(counts / len(samples), [0.3, 0.7], decimal=2)
+
+    values, counts = np.unique(samples[:, 1], return_counts=True)
+    assert_almost_equal(values, [2, 3, 4])
+    assert_almost_equal(counts / len(samples), [0.1, 0.4, 0.5], decimal=2)
+
+
+@pytest.mark.parametrize("distr,line", [
+    ("UNIFORM", "    VAR       CONSTR    0.0                      5.0"),
+    ("NORMAL", "    VAR       CONSTR    7.0                      2.0"),
+    ("GAMMA", "    VAR       CONSTR    5.0                      2.0"),
+    ("BETA", "    VAR       CONSTR    5.0                      3.0"),
+    ("LOGNORM", "    VAR       CONSTR    0.5                      0.2")])
+def test_sample_continuous(distr, line):
+    """
+    Tests if the sample moments agree with those of the scipy.stats
+    distribution returned by ``get_for``.
+    """
+    indep = Indep(distr)
+    indep.add_entry(DataLine(line))
+
+    samples = indep.sample(200_000, np.random.default_rng(1))
+    assert_equal(samples.shape, (200_000, 1))
+
+    distr = indep.get_for("VAR", "CONSTR")
+    assert_almost_equal(samples.mean() / distr.mean(), 1, decimal=2)
+    assert_almost_equal(samples.var() / distr.var(), 1, decimal=1)
+
+
+def test_sample_is_reproducible():
+    indep = Indep("UNIFORM")
+
+    line = DataLine("    VAR       CONSTR    0.0                      5.0")
+    indep.add_entry(line)
+
+    first = indep.sample(10, np.random.default_rng(42))
+    second = indep.sample(10, np.random.default_rng(42))
+
+    assert_almost_equal(first, second)
+
+
+def test_discrete_is_cached():
+    """
+    Discrete distributions are created once, and then returned as-is.
+    """
+    indep = Indep("DISCRETE")
+
+    # Outcomes are not sorted, but the distribution's outcomes should be.
+    lines = ["    RHS       DEMAND1   7.0            PERIOD2   0.3",
+             "    RHS       DEMAND1   3.0            PERIOD2   0.3",
+             "    RHS       DEMAND1   5.0            PERIOD2   0.4"]
+
+    for line in lines:
+        indep.add_entry(DataLine(line))
+
+    indep.finalise()
+    distr = indep.get_for("RHS", "DEMAND1")
+
+    assert_(distr is indep.get_for("RHS", "DEMAND1"))
+    assert_almost_equal(distr.xk, [3, 5, 7])
+    assert_almost_equal(distr.pk, [0.3, 0.4, 0.3])
+
+    scipy_distr = distr.to_scipy()
+    assert_almost_equal(scipy_distr.mean(), distr.mean())
+
+
+def test_discrete_entries_after_finalise():
+    """
+    Adding outcomes after the discrete distributions have been created should
+    update those distributions.
+    """
+    indep = Indep("DISCRETE")
+
+    line = DataLine("    RHS       DEMAND1   3.0            PERIOD2   1")
+    indep.add_entry(line)
+
+    distr = indep.get_for("RHS", "DEMAND1")
+    assert_almost_equal(distr.xk, [3])
+
+    line = DataLine("    RHS       DEMAND1   5.0            PERIOD2   0")
+    indep.add_entry(line)
+
+    distr = indep.get_for("RHS", "DEMAND1")
+    assert_almost_equal(distr.xk, [3, 5])
+
+
+def test_get_for_raises_unknown_element():
+    indep = Indep("DISCRETE")
+
+    line = DataLine("    RHS       DEMAND1   3.0            PERIOD2   1")
+    indep.add_entry(line)
+
+    with assert_raises(KeyError):
+        indep.get_for("RHS", "DEMAND2")
+
+
+def test_elements_are_stored_by_name_ids():
+    """
+    The elements should be keyed by the IDs of their names in the given table,
+    while the public methods still take and return names.
+    """
+    names = NameTable(["DEMAND1"])
+    indep = Indep("NORMAL", names=names)
+
+    for line in ["    RHS       DEMAND1   3.0            PERIOD2   1",
+                 "    X1        DEMAND1   2.0            PERIOD2   4"]:
+        indep.add_entry(DataLine(line))
+
+    assert_(indep.name_table is names)
+    assert_equal(names.names, ["DEMAND1", "RHS", "X1"])
+    assert_equal(list(indep._randomness), [(1, 0), (2, 0)])
+
+    assert_equal(indep.elements, [("RHS", "DEMAND1"), ("X1", "DEMAND1")])
+    assert_almost_equal(indep.get_for("X1", "DEMAND1").std(), 2)
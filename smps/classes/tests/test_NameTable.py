@@ -0,0 +1,73 @@
+import pickle
+
+import numpy as np
+from numpy.testing import assert_, assert_equal
+
+from smps.classes import NameTable
+
+
+def test_add_assigns_ids_in_order():
+    table = NameTable()
+
+    assert_equal(table.add("x1"), 0)
+    assert_equal(table.add("c1"), 1)
+    assert_equal(table.add("x1"), 0)  # already known
+
+    assert_equal(len(table), 2)
+    assert_equal(table.names, ["x1", "c1"])
+    assert_equal(table[1], "c1")
+
+
+def test_initial_names():
+    table = NameTable(["x1", "x2", "x1"])
+
+    assert_equal(table.names, ["x1", "x2"])
+    assert_("x2" in table)
+    assert_("x3" not in table)
+
+
+def test_intern_returns_shared_copy():
+    table = NameTable()
+
+    first = table.intern("".join(["x", "1"]))
+    second = table.intern("".join(["x", "1"]))
+
+    assert_(first is second)
+    assert_equal(len(table), 1)
+
+
+def test_ids_and_add_many():
+    table = NameTable(["x1", "x2"])
+
+    assert_equal(table.ids(["x2", "x3", "x1"]), [1, -1, 0])
+    assert_equal(len(table), 2)  # ids does not add names
+
+    assert_equal(table.add_many(["x2", "x3", "x1"]), [1, 2, 0])
+    assert_equal(len(table), 3)
+
+
+def test_pool_round_trip():
+    table = NameTable(["x1", "", "constraint", "naïve"])
+    pool, offsets = table.pool()
+
+    assert_(isinstance(pool, bytes))
+    assert_equal(offsets, [0, 2, 2, 12, 18])
+
+    copy = NameTable.from_pool(pool, offsets)
+    assert_equal(copy.names, table.names)
+
+
+def test_empty_pool():
+    pool, offsets = NameTable().pool()
+
+    assert_equal(pool, b"")
+    assert_equal(offsets, [0])
+    assert_equal(len(NameTable.from_pool(pool, offsets)), 0)
+
+
+def test_pickle_round_trip():
+    table = NameTable([f"x{idx}" for idx in range(100)])
+    copy = pickle.loads(pickle.dumps(table))
+
+    assert_equal(copy.names, table.names)
+    assert_equal(copy.ids(["x42", "y"]), np.array([42, -1]))
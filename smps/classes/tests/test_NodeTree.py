@@ -0,0 +1,136 @@
+import numpy as np
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from smps.classes import NameTable, NodeTree
+
+
+def _tree() -> NodeTree:
+    tree = NodeTree()
+
+    tree.add_node("root", "ROOT", 1, "STAGE-1")
+    tree.add_node("n1", "root", 0.4, "STAGE-2")
+    tree.add_modification("C2", "RHS", 21)
+    tree.add_node("n2", "root", 0.6, "STAGE-2")
+    tree.add_modification("C2", "RHS", 22)
+    tree.add_modification("C3", "RHS", 32)
+    tree.add_node("n11", "n1", 0.5, "STAGE-3")
+    tree.add_node("n21", "n2", 0.3, "STAGE-3")
+    tree.add_node("n22", "n2", 0.7, "STAGE-3")
+
+    return tree
+
+
+def test_raises_unknown_parent():
+    tree = NodeTree()
+
+    with assert_raises(KeyError):
+        tree.add_node("n1", "unknown", 0.5, "STAGE-2")
+
+
+def test_raises_modification_without_node():
+    tree = NodeTree()
+
+    with assert_raises(ValueError):
+        tree.add_modification("C1", "RHS", 1)
+
+
+def test_arrays():
+    tree = _tree()
+
+    assert_equal(len(tree), 6)
+    assert_equal(tree.parents, [-1, 0, 0, 1, 2, 2])
+    assert_equal(tree.stages, [0, 1, 1, 2, 2, 2])
+    assert_equal(tree.period_names, ["STAGE-1", "STAGE-2", "STAGE-3"])
+    assert_equal(tree.depths, [0, 1, 1, 2, 2, 2])
+
+
+def test_probabilities():
+    tree = _tree()
+
+    assert_almost_equal(tree.conditional_probabilities,
+                        [1, 0.4, 0.6, 0.5, 0.3, 0.7])
+    assert_almost_equal(tree.probabilities,
+                        [1, 0.4, 0.6, 0.2, 0.18, 0.42])
+
+
+def test_modifications():
+    """
+    Modifications are stored in CSR fashion, with offsets into flat arrays.
+    """
+    tree = _tree()
+
+    assert_equal(tree.offsets, [0, 0, 1, 3, 3, 3, 3])
+    assert_almost_equal(tree.modification_values, [21, 22, 32])
+
+    assert_equal(tree.modifications(0), [])
+    assert_equal(tree.modifications(2), [("C2", "RHS", 22), ("C3", "RHS", 32)])
+
+
+def test_ancestors():
+    tree = _tree()
+
+    assert_equal(tree.ancestors(np.array([0, 3, 5])), [[0, -1, -1],
+                                                       [0, 1, 3],
+                                                       [0, 2, 5]])
+    assert_equal(tree.path(4), [0, 2, 4])
+    assert_equal(tree.path(0), [0])
+
+
+def test_traversals():
+    tree = _tree()
+
+    assert_equal(tree.children(2), [4, 5])
+    assert_equal(tree.leaves(), [3, 4, 5])
+    assert_equal(tree.stage_nodes(1), [1, 2])
+
+
+def test_subtree_sums():
+    """
+    The unconditional probabilities of the leaves in each subtree should sum
+    to the probability of the subtree's root.
+    """
+    tree = _tree()
+
+    leaf_probs = np.zeros(len(tree))
+    leaf_probs[tree.leaves()] = tree.probabilities[tree.leaves()]
+
+    assert_almost_equal(tree.subtree_sums(leaf_probs),
+                        [0.8, 0.2, 0.6, 0.2, 0.18, 0.42])
+    assert_equal(tree.subtree_sums(np.ones(len(tree))), [6, 2, 3, 1, 1, 1])
+
+
+def test_deep_tree():
+    """
+    Tests the vectorised traversals on a long path, which requires many
+    pointer jumping steps.
+    """
+    tree = NodeTree()
+    tree.add_node("0", "ROOT", 1, "STAGE-0")
+
+    for node in range(1, 1000):
+        tree.add_node(str(node), str(node - 1), 0.99, f"STAGE-{node}")
+
+    assert_equal(tree.depths, np.arange(1000))
+    assert_almost_equal(tree.probabilities, 0.99 ** np.arange(1000))
+    assert_equal(tree.path(999), np.arange(1000))
+    assert_equal(tree.subtree_sums(np.ones(1000)), np.arange(1000, 0, -1))
+
+
+def test_modifications_are_stored_by_name_ids():
+    names = NameTable(["C3"])
+    tree = NodeTree(names)
+
+    tree.add_node("root", "ROOT", 1, "STAGE-1")
+    tree.add_modification("C2", "RHS", 21)
+    tree.add_modification("C3", "RHS", 31)
+
+    assert_(tree.name_table is names)
+
+    constrs, variables = tree.modification_ids
+    assert_equal(constrs, [names.add("C2"), names.add("C3")])
+    assert_equal(variables, [names.add("RHS"), names.add("RHS")])
+
+    assert_equal(tree.modification_constraints, ["C2", "C3"])
+    assert_equal(tree.modification_variables, ["RHS", "RHS"])
+    assert_equal(tree.modifications(0), [("C2", "RHS", 21), ("C3", "RHS", 31)])
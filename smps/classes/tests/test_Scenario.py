@@ -1,20 +1,11 @@
+import pickle
+
 import numpy as np
 import pytest
 from numpy.testing import (assert_, assert_almost_equal, assert_equal,
-                           assert_raises)
-
-from smps.classes import Scenario
+                           assert_raises, assert_warns)
 
-
-@pytest.fixture(autouse=True, scope="function")
-def clear_scenarios():
-    """
-    Clears the global, static scenarios mapping between test runs. This ensures
-    each test executes independently.
-    """
-    Scenario.clear()  # before test
-    yield
-    Scenario.clear()  # after test
+from smps.classes import Scenario, ScenarioTree
 
 
 def test_str():
@@ -58,8 +49,14 @@ def test_parent_name_strips(parent_name, read_name):
     Tests if the Scenario class strips the parent field of any excess white
     space.
     """
+    tree = ScenarioTree()
+
     parent = Scenario(parent_name, "root", "", 0.5)
+    tree.add(parent)
+
     scen = Scenario("test", read_name, "", 0.2)
+    tree.add(scen)
+
     assert_(scen.parent is parent)
 
 
@@ -77,12 +74,32 @@ def test_branch_period_strips(period, expected):
 
 
 def test_returns_parent_instance():
+    tree = ScenarioTree()
+
     parent = Scenario("parent", "root", "", 0.5)
+    tree.add(parent)
+
     scen = Scenario("test", "parent", "", 0.2)
+    tree.add(scen)
 
     assert_(parent.parent is None)  # branches from root
     assert_(scen.parent is parent)  # branches from parent
 
+    assert_equal(parent.parent_index, -1)
+    assert_equal(scen.parent_index, parent.index)
+
+
+def test_raises_parent_outside_tree():
+    """
+    The parent of a scenario that is not part of any tree cannot be looked-up.
+    """
+    scen = Scenario("test", "parent", "", 0.2)
+
+    assert_equal(scen.index, None)
+
+    with assert_raises(KeyError):
+        scen.parent
+
 
 @pytest.mark.parametrize("prob", [0, 1, 10, -1])
 def test_raises_probability(prob):
@@ -96,22 +113,6 @@ def test_probability(prob: float):
     assert_almost_equal(scen.probability, prob)
 
 
-@pytest.mark.parametrize("num_scenarios", [5, 25, 50])
-def test_clear(num_scenarios):
-    # Creates a number of scenarios - these are not interesting, per se, only
-    # that they are properly cleared from the cache once clear() is called.
-    scenarios = [Scenario(f"Scen {idx}", "", "", 1 / num_scenarios)
-                 for idx in range(num_scenarios)]
-
-    assert_equal(Scenario.num_scenarios(), num_scenarios)
-    assert_equal(Scenario.scenarios(), scenarios)
-
-    Scenario.clear()
-
-    assert_equal(Scenario.num_scenarios(), 0)
-    assert_equal(Scenario.scenarios(), [])
-
-
 @pytest.mark.parametrize("num_modifications", [5, 25, 50])
 def test_modifications(num_modifications):
     scen = Scenario("test", "", "", 0.5)
@@ -153,13 +154,17 @@ def test_modifications_from_root_gets_all():
     Tests if modifications_from_root gets all modifications, both from the
     child scenario, and its parent.
     """
+    tree = ScenarioTree()
+
     parent = Scenario("parent", "root", "", 0.5)
+    tree.add(parent)
     assert_(parent.branches_from_root())
 
     parent.add_modification("constr1", "row1", 1)
     parent.add_modification("constr2", "row2", 2.5)
 
     scen = Scenario("test", "parent", "", 0.5)
+    tree.add(scen)
     scen.add_modification("constr3", "row3", 8.1)
 
     expected = parent.modifications + scen.modifications
@@ -171,16 +176,94 @@ def test_modifications_from_root_overwrites_parent():
     Tests if child modifications of the same constraint/variable pair overwrite
     parent modifications, as they should (the child is more specific).
     """
+    tree = ScenarioTree()
+
     parent = Scenario("parent", "root", "", 0.5)
+    tree.add(parent)
     assert_(parent.branches_from_root())
 
     parent.add_modification("constr1", "row1", 1)
     parent.add_modification("constr2", "row2", 2.5)
 
     scen = Scenario("test", "parent", "", 0.5)
+    tree.add(scen)
     scen.add_modification("constr2", "row2", 8.1)
 
     expected = [("constr1", "row1", 1), ("constr2", "row2", 8.1)]
     assert_equal(scen.modifications_from_root(), expected)
 
+
+def test_pickle_round_trip():
+    """
+    Scenarios store their modifications as IDs into the tree's name table.
+    This should not be visible after unpickling.
+    """
+    tree = ScenarioTree()
+
+    parent = Scenario("parent", "root", "stage-2", 0.5)
+    parent.add_modification("constr1", "row1", 1)
+    tree.add(parent)
+
+    child = Scenario("child", "parent", "stage-3", 0.5)
+    child.add_modification("constr2", "row2", 2.5)
+    tree.add(child)
+
+    copy = pickle.loads(pickle.dumps(tree))
+
+    assert_equal(copy[1].name, "child")
+    assert_equal(copy[1].modifications, [("constr2", "row2", 2.5)])
+    assert_equal(copy[1].parent.name, "parent")
+    assert_(copy[1].name_table is copy.names)
+    assert_equal(copy[1].modifications_from_root(),
+                 [("constr1", "row1", 1), ("constr2", "row2", 2.5)])
+
+    # Further modifications are simply added to the unpickled ones.
+    copy[0].add_modification("constr3", "row3", 3)
+    assert_equal(len(copy[0].modifications), 2)
+
+
+def test_deprecated_class_methods():
+    """
+    The class methods that used to look at the global scenario store should
+    still work, on the trees that scenarios were added to, but warn.
+    """
+    with assert_warns(DeprecationWarning):
+        Scenario.clear()
+
+    tree = ScenarioTree()
+    scenarios = [Scenario(f"Scen {idx}", "root", "", 0.25) for idx in range(4)]
+
+    for scen in scenarios:
+        tree.add(scen)
+
+    with assert_warns(DeprecationWarning):
+        assert_equal(Scenario.num_scenarios(), 4)
+
+    with assert_warns(DeprecationWarning):
+        assert_equal(Scenario.scenarios(), scenarios)
+
+    with assert_warns(DeprecationWarning):
+        Scenario.clear()
+
+    with assert_warns(DeprecationWarning):
+        assert_equal(Scenario.num_scenarios(), 0)
+
+    with assert_warns(DeprecationWarning):
+        assert_equal(Scenario.scenarios(), [])
+
+    assert_equal(len(tree), 4)  # the tree itself is not changed.
+
+
+def test_modification_ids():
+    scen = Scenario("test", "root", "stage-2", 0.5)
+    scen.add_modification("constr1", "row1", 1)
+    scen.add_modification("constr1", "row2", 2)
+
+    constrs, variables, values = scen.modification_ids
+    names = scen.name_table
+
+    assert_equal([names[idx] for idx in constrs], ["constr1", "constr1"])
+    assert_equal([names[idx] for idx in variables], ["row1", "row2"])
+    assert_almost_equal(values, [1, 2])
+
 # TODO
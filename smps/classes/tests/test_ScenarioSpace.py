@@ -0,0 +1,149 @@
+import itertools
+
+import numpy as np
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from smps.classes import Block, DataLine, Indep, ScenarioSpace
+
+
+def _landS() -> Indep:
+    # Same as the INDEP section of the LandS stoch file.
+    indep = Indep("DISCRETE")
+
+    for constr, values in [("DEMAND1", [3, 5, 7]),
+                           ("DEMAND2", [2, 3, 4]),
+                           ("DEMAND3", [1, 2, 3])]:
+        for value, prob in zip(values, [0.3, 0.4, 0.3]):
+            line = f"    RHS       {constr:<8}  {value:<12}   PERIOD2   {prob}"
+            indep.add_entry(DataLine(line))
+
+    return indep
+
+
+def test_from_indep():
+    space = ScenarioSpace.from_indep([_landS()])
+
+    assert_equal(len(space), 27)
+    assert_equal(space.num_factors, 3)
+    assert_equal(space.num_elements, 3)
+    assert_equal(space.radices, [3, 3, 3])
+    assert_equal(space.elements, [("RHS", "DEMAND1"),
+                                  ("RHS", "DEMAND2"),
+                                  ("RHS", "DEMAND3")])
+
+
+def test_raises_continuous_indep():
+    indep = Indep("NORMAL")
+
+    with assert_raises(ValueError):
+        ScenarioSpace.from_indep([indep])
+
+
+def test_indexing_agrees_with_product():
+    """
+    Scenarios are numbered as by ``itertools.product``, with the last factor
+    varying fastest.
+    """
+    space = ScenarioSpace.from_indep([_landS()])
+    expected = list(itertools.product([3, 5, 7], [2, 3, 4], [1, 2, 3]))
+
+    assert_almost_equal(space[np.arange(27)], expected)
+
+    for idx in [0, 5, 26]:
+        assert_almost_equal(space[idx], expected[idx])
+
+
+def test_probabilities():
+    space = ScenarioSpace.from_indep([_landS()])
+    probs = space.probabilities(np.arange(27))
+
+    assert_almost_equal(probs.sum(), 1)
+    assert_almost_equal(probs[0], 0.3 ** 3)
+    assert_almost_equal(probs[4], 0.3 * 0.4 * 0.4)
+
+
+def test_raises_index_out_of_range():
+    space = ScenarioSpace.from_indep([_landS()])
+
+    with assert_raises(IndexError):
+        space[27]
+
+    with assert_raises(IndexError):
+        space[-1]
+
+
+def test_iter_chunks():
+    space = ScenarioSpace.from_indep([_landS()])
+    chunks = list(space.iter_chunks(chunk_size=10))
+
+    assert_equal([len(indices) for indices, _, _ in chunks], [10, 10, 7])
+
+    indices = np.concatenate([indices for indices, _, _ in chunks])
+    values = np.vstack([values for _, values, _ in chunks])
+    probs = np.concatenate([probs for _, _, probs in chunks])
+
+    assert_equal(indices, np.arange(27))
+    assert_almost_equal(values, space[np.arange(27)])
+    assert_almost_equal(probs, space.probabilities(np.arange(27)))
+
+
+def test_multivariate_factors():
+    """
+    Factors can have several random elements, whose outcomes are selected
+    together.
+    """
+    space = ScenarioSpace([([[1, 2], [3, 4]], [0.5, 0.5]),
+                           ([5, 6, 7], [0.2, 0.3, 0.5])])
+
+    assert_equal(len(space), 6)
+    assert_equal(space.num_elements, 3)
+    assert_almost_equal(space[4], [3, 4, 6])
+    assert_almost_equal(space.probabilities(4), [0.5 * 0.3])
+
+
+def test_enormous_space():
+    """
+    The space need not fit in memory, or even its size in a machine integer.
+    """
+    space = ScenarioSpace([([1, 2, 3], [0.2, 0.3, 0.5])] * 100)
+
+    assert_equal(space.num_scenarios, 3 ** 100)
+
+    with assert_raises(OverflowError):
+        len(space)
+
+    # Index 3 ** 2 + 2 selects outcome 1 for the third-last factor, 2 for the
+    # last, and 0 for all others.
+    expected = np.ones(100)
+    expected[-3] = 2
+    expected[-1] = 3
+
+    assert_almost_equal(space[3 ** 2 + 2], expected)
+    assert_(0 < space.probabilities(3 ** 2 + 2)[0] < 1e-60)
+
+
+def test_from_blocks_and_product():
+    first = Block("BLOCK1", "STAGE-2")
+    first.add_realisation(0.5)
+    first.add_entry("RHS", "C1", 1)
+    first.add_entry("RHS", "C2", 2)
+    first.add_realisation(0.5)
+    first.add_entry("RHS", "C1", 3)
+
+    second = Block("BLOCK2", "STAGE-2")
+    second.add_realisation(1)
+    second.add_entry("RHS", "C3", 4)
+
+    space = ScenarioSpace.from_blocks([first, second])
+
+    assert_equal(len(space), 2)
+    assert_equal(space.elements, [("RHS", "C1"), ("RHS", "C2"), ("RHS", "C3")])
+    assert_almost_equal(space[np.arange(2)], [[1, 2, 4], [3, 2, 4]])
+
+    product = ScenarioSpace.from_indep([_landS()]).product(space)
+
+    assert_equal(len(product), 27 * 2)
+    assert_equal(product.num_elements, 6)
+    assert_almost_equal(product[1], [3, 2, 1, 3, 2, 4])
+    assert_almost_equal(product.probabilities(np.arange(54)).sum(), 1)
@@ -0,0 +1,291 @@
+import numpy as np
+import pytest
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from smps.classes import NameTable, Scenario, ScenarioTree
+
+
+@pytest.mark.parametrize("num_scenarios", [5, 25, 50])
+def test_add(num_scenarios):
+    tree = ScenarioTree()
+
+    scenarios = [Scenario(f"Scen {idx}", "root", "", 1 / num_scenarios)
+                 for idx in range(num_scenarios)]
+
+    for idx, scen in enumerate(scenarios):
+        assert_equal(tree.add(scen), idx)
+        assert_equal(scen.index, idx)
+
+    assert_equal(len(tree), num_scenarios)
+    assert_equal(tree.scenarios, scenarios)
+    assert_equal(list(tree), scenarios)
+
+
+def test_look_up_by_index_and_name():
+    tree = ScenarioTree()
+
+    parent = Scenario("parent", "root", "", 0.5)
+    tree.add(parent)
+
+    scen = Scenario("child", "parent", "", 0.5)
+    tree.add(scen)
+
+    assert_equal(tree.index("child"), 1)
+    assert_(tree[0] is parent)
+    assert_(tree[1] is scen)
+
+    with assert_raises(KeyError):
+        tree.index("unknown")
+
+    with assert_raises(KeyError):
+        tree[2]
+
+
+def test_raises_unknown_parent():
+    tree = ScenarioTree()
+
+    with assert_raises(KeyError):
+        tree.add(Scenario("child", "parent", "", 0.5))
+
+
+def test_trees_are_independent():
+    """
+    Scenarios with the same name in different trees should not interfere.
+    """
+    first = ScenarioTree()
+    first.add(Scenario("parent", "root", "", 0.5))
+
+    second = ScenarioTree()
+    parent = Scenario("parent", "root", "", 0.5)
+    second.add(parent)
+
+    scen = Scenario("child", "parent", "", 0.5)
+    second.add(scen)
+
+    assert_(scen.parent is parent)
+    assert_equal(len(first), 1)
+    assert_equal(len(second), 2)
+
+
+def test_bounded_tree():
+    tree = ScenarioTree(max_size=2)
+
+    for idx in range(5):
+        tree.add(Scenario(f"Scen {idx}", "root", "", 0.2))
+
+    assert_equal(tree.max_size, 2)
+    assert_equal(len(tree), 2)
+    assert_equal([scen.name for scen in tree], ["Scen 3", "Scen 4"])
+
+
+def test_bounded_tree_keeps_looked_up_parents():
+    """
+    Looking up a scenario by name (e.g., as a parent) should count as use of
+    the scenario, so that it is not evicted before less recently used ones.
+    """
+    tree = ScenarioTree(max_size=2)
+    tree.add(Scenario("parent", "root", "STAGE-2", 0.5))
+    tree.add(Scenario("other", "root", "STAGE-2", 0.5))
+
+    assert_equal(tree.index("parent"), 0)
+
+    tree.add(Scenario("child", "parent", "STAGE-3", 0.5))
+
+    assert_equal([scen.name for scen in tree], ["parent", "child"])
+    assert_(tree[2].parent is tree[0])
+
+
+def _three_stage_tree() -> ScenarioTree:
+    tree = ScenarioTree()
+
+    tree.add(Scenario("first", "root", "STAGE-2", 0.5))
+    tree.add(Scenario("second", "first", "STAGE-3", 0.25))
+    tree.add(Scenario("third", "second", "STAGE-4", 0.125))
+    tree.add(Scenario("fourth", "root", "STAGE-2", 0.5))
+
+    return tree
+
+
+def test_parents_and_depths():
+    tree = _three_stage_tree()
+
+    assert_equal(tree.parents, [-1, 0, 1, -1])
+    assert_equal(tree.depths, [0, 1, 2, 0])
+
+
+def test_inherit():
+    """
+    Tests if modifications are inherited from parents, and overwritten where
+    a child modifies the same key.
+    """
+    tree = _three_stage_tree()
+
+    scenarios = np.array([0, 0, 1, 2, 3])
+    keys = np.array([5, 7, 5, 9, 7])
+    values = np.array([1., 2., 3., 4., 5.])
+
+    res_scen, res_keys, res_vals = tree.inherit(scenarios, keys, values)
+
+    assert_equal(res_scen, [0, 0, 1, 1, 2, 2, 2, 3])
+    assert_equal(res_keys, [5, 7, 5, 7, 5, 7, 9, 7])
+    assert_almost_equal(res_vals, [1, 2, 3, 2, 3, 2, 4, 5])
+
+
+def test_inherit_last_value_wins():
+    tree = ScenarioTree()
+    tree.add(Scenario("first", "root", "STAGE-2", 0.5))
+
+    res = tree.inherit(np.array([0, 0]), np.array([1, 1]), np.array([1., 2.]))
+
+    assert_equal(res[1], [1])
+    assert_almost_equal(res[2], [2])
+
+
+def test_branch_stages():
+    tree = _three_stage_tree()
+
+    assert_equal(tree.period_names, ["STAGE-2", "STAGE-3", "STAGE-4"])
+    assert_equal(tree.branch_stages, [0, 1, 2, 0])
+
+
+def test_ancestors_and_path():
+    tree = _three_stage_tree()
+
+    assert_equal(tree.ancestors, [[0, -1, -1],
+                                  [0, 1, -1],
+                                  [0, 1, 2],
+                                  [3, -1, -1]])
+
+    assert_equal(tree.path(2), [0, 1, 2])
+    assert_equal(tree.path(3), [3])
+
+
+def test_arrays_are_reset_when_adding():
+    tree = _three_stage_tree()
+    assert_equal(tree.depths, [0, 1, 2, 0])
+
+    tree.add(Scenario("fifth", "fourth", "STAGE-3", 0.25))
+    assert_equal(tree.depths, [0, 1, 2, 0, 1])
+    assert_equal(tree.path(4), [3, 4])
+
+
+def test_deep_tree():
+    """
+    Tests the flat arrays on a long path of scenarios, which should not hit
+    the recursion limit.
+    """
+    tree = ScenarioTree()
+    tree.add(Scenario("0", "root", "STAGE-1", 0.5))
+    tree[0].add_modification("constr", "var", 1.)
+
+    for idx in range(1, 1000):
+        scen = Scenario(str(idx), str(idx - 1), f"STAGE-{idx + 1}", 0.5)
+        tree.add(scen)
+
+    assert_equal(tree.depths, np.arange(1000))
+    assert_equal(tree.path(999), np.arange(1000))
+
+    res_scen, res_keys, _ = tree.inherit(np.array([0, 999]),
+                                         np.array([1, 2]),
+                                         np.array([1., 2.]))
+
+    assert_equal(res_scen, np.concatenate((np.arange(1000), [999])))
+    assert_equal(res_keys, np.concatenate((np.ones(1000), [2])))
+
+    assert_equal(tree[999].modifications_from_root(),
+                 [("constr", "var", 1.)])
+
+
+def test_memo_counts_hits_and_misses():
+    tree = _three_stage_tree()
+    tree[0].add_modification("constr1", "var1", 1.)
+    tree[2].add_modification("constr2", "var2", 2.)
+
+    assert_equal(tree.memo_info(), (0, 0, 1024, 0))
+
+    # Resolving the deepest scenario also memoises its ancestors.
+    assert_equal(tree.modifications_from_root(2),
+                 [("constr1", "var1", 1.), ("constr2", "var2", 2.)])
+    assert_equal(tree.memo_info(), (0, 1, 1024, 3))
+
+    assert_equal(tree.modifications_from_root(1), [("constr1", "var1", 1.)])
+    assert_equal(tree.memo_info(), (1, 1, 1024, 3))
+
+
+def test_memo_is_cleared_when_modifying():
+    tree = _three_stage_tree()
+    tree[0].add_modification("constr1", "var1", 1.)
+
+    assert_equal(len(tree[1].modifications_from_root()), 1)
+
+    tree[0].add_modification("constr2", "var2", 2.)
+
+    assert_equal(tree.memo_info().size, 0)
+    assert_equal(len(tree[1].modifications_from_root()), 2)
+
+
+def test_bounded_memo():
+    """
+    Resolving all scenarios of a path, in order, should resolve each scenario
+    only once, even when the memo is small.
+    """
+    tree = ScenarioTree(memo_size=2)
+    tree.add(Scenario("0", "root", "STAGE-1", 0.5))
+
+    for idx in range(1, 100):
+        tree.add(Scenario(str(idx), str(idx - 1), f"STAGE-{idx + 1}", 0.5))
+
+    for idx, scen in enumerate(tree):
+        scen.add_modification(f"constr{idx}", "var", idx)
+
+    for idx, scen in enumerate(tree):
+        assert_equal(len(scen.modifications_from_root()), idx + 1)
+
+    assert_equal(tree.memo_info(), (0, 100, 2, 2))
+
+
+def test_add_maps_foreign_name_table():
+    """
+    Scenarios created with a different name table (e.g., in a worker process)
+    are moved to the tree's table when they are added.
+    """
+    tree = ScenarioTree(names=NameTable(["row2", "constr1"]))
+
+    foreign = NameTable()
+    parent = Scenario("parent", "root", "stage-2", 0.5, foreign)
+    parent.add_modification("constr1", "row1", 1)
+
+    child = Scenario("child", "parent", "stage-3", 0.5, foreign)
+    child.add_modification("constr2", "row2", 2)
+
+    tree.add(parent)
+    tree.add(child)
+
+    for scen in tree:
+        assert_(scen.name_table is tree.names)
+
+    assert_equal(child.parent_index, 0)
+    assert_equal(parent.modifications, [("constr1", "row1", 1)])
+    assert_equal(child.modifications_from_root(),
+                 [("constr1", "row1", 1), ("constr2", "row2", 2)])
+
+
+def test_modification_arrays():
+    tree = _three_stage_tree()
+    tree[0].add_modification("c1", "x1", 1)
+    tree[3].add_modification("c2", "x1", 2)
+    tree[3].add_modification("c1", "x2", 3)
+
+    scens, constrs, variables, values = tree.modification_arrays()
+    names = tree.names
+
+    assert_equal(scens, [0, 3, 3])
+    assert_equal([names[idx] for idx in constrs], ["c1", "c2", "c1"])
+    assert_equal([names[idx] for idx in variables], ["x1", "x1", "x2"])
+    assert_almost_equal(values, [1, 2, 3])
+
+
+def test_empty_modification_arrays():
+    for array in ScenarioTree().modification_arrays():
+        assert_equal(len(array), 0)
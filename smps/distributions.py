@@ -0,0 +1,133 @@
+import logging
+import pickle
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A sampler takes a random number generator, the parameter vector and the
+# parameter matrix of a DISTRIB distribution, and the number of draws n. It
+# returns all n draws at once, as an (n, num_elements) array.
+Sampler = Callable[[np.random.Generator, np.ndarray, np.ndarray, int],
+                   np.ndarray]
+
+
+def _mv_normal(rng: np.random.Generator,
+               mean: np.ndarray,
+               cov: np.ndarray,
+               n: int) -> np.ndarray:
+    return rng.multivariate_normal(mean, cov, size=n)
+
+
+def _mv_log_normal(rng: np.random.Generator,
+                   mean: np.ndarray,
+                   cov: np.ndarray,
+                   n: int) -> np.ndarray:
+    # As for LOGNORM in INDEP sections, the parameters are those of the
+    # underlying normal distribution.
+    return np.exp(rng.multivariate_normal(mean, cov, size=n))
+
+
+_SAMPLERS: Dict[str, Sampler] = {
+    "MVNORMAL": _mv_normal,
+    "MVLOGNORM": _mv_log_normal,
+}
+
+
+def register_distribution(name: str, sampler: Sampler, overwrite: bool = False):
+    """
+    Registers a sampler for DISTRIB sections of the given distribution type.
+    The sampler is called as ``sampler(rng, parameters, matrix, n)``, where
+    ``parameters`` is the vector of the parameters of each element (e.g., the
+    means), and ``matrix`` is the (symmetric) matrix given by the CV lines
+    (e.g., the covariances). It should return all n draws at once, as an (n,
+    num_elements) array.
+
+    Samplers are registered in the current process only. When a STOCH file is
+    parsed in a process pool by ``aio.parse`` (e.g., by ``aread_smps``), the
+    registered samplers are sent to the worker process, which requires them
+    to be picklable (e.g., module-level functions rather than lambdas). Other
+    worker processes only know the samplers that are registered when a module
+    they import is imported, so register samplers there.
+
+    Parameters
+    ----------
+    name : str
+        Distribution type, as used in the DISTRIB section header. This is
+        case insensitive.
+    sampler : Sampler
+        Vectorised sampler for this distribution type.
+    overwrite : bool
+        When True, an existing sampler of the same name is replaced. Default
+        False.
+
+    Raises
+    ------
+    ValueError
+        When a sampler of this name already exists, and overwrite is False.
+    """
+    name = name.upper()
+
+    if name in _SAMPLERS and not overwrite:
+        msg = f"Distribution {name} is already registered."
+        logger.error(msg)
+        raise ValueError(msg)
+
+    logger.debug(f"Registering a sampler for distribution {name}.")
+    _SAMPLERS[name] = sampler
+
+
+def get_sampler(name: str) -> Sampler:
+    """
+    Returns the sampler registered for the given distribution type.
+
+    Raises
+    ------
+    ValueError
+        When no sampler is registered for this distribution type.
+    """
+    name = name.upper()
+
+    if name not in _SAMPLERS:
+        msg = f"Distribution {name} is not understood."
+        logger.error(msg)
+        raise ValueError(msg)
+
+    return _SAMPLERS[name]
+
+
+def _portable_samplers() -> Dict[str, Sampler]:
+    """
+    Returns the registered samplers that can be sent to worker processes, that
+    is, those that can be pickled. See ``_install``.
+    """
+    samplers = {}
+
+    for name, sampler in _SAMPLERS.items():
+        try:
+            pickle.dumps(sampler)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            logger.debug(f"Cannot send the sampler of {name} to workers.")
+            continue
+
+        samplers[name] = sampler
+
+    return samplers
+
+
+def _install(samplers: Dict[str, Sampler]):
+    """
+    Registers the given samplers in this (worker) process, see
+    ``_portable_samplers``. Samplers that are already registered are kept.
+    """
+    for name, sampler in samplers.items():
+        _SAMPLERS.setdefault(name, sampler)
+
+
+def registered_distributions() -> List[str]:
+    """
+    Returns the names of all distribution types that can be used in DISTRIB
+    sections.
+    """
+    return list(_SAMPLERS.keys())
@@ -0,0 +1,50 @@
+import logging
+from pathlib import Path
+from typing import Generator, Optional, Union
+
+from smps.classes import Scenario
+from smps.parsers import StochParser
+
+logger = logging.getLogger(__name__)
+
+
+def iter_scenarios(location: Union[str, Path],
+                   mmap: bool = False,
+                   cache_size: int = 1024,
+                   memo_size: Optional[int] = 1024
+                   ) -> Generator[Scenario, None, None]:
+    """
+    Incrementally parses the SCENARIOS of a STOCH file (generator). Each
+    scenario is yielded as soon as its data block has been read, and is not
+    stored afterwards. This allows processing files with many more scenarios
+    than fit in memory, and consumers can start work right away.
+
+    Parameters
+    ----------
+    location : Union[str, Path]
+        File-system location of the STOCH file. If no extension is given, it
+        is inferred (one of .sto or .stoch).
+    mmap : bool
+        When True, the file is read through a memory map. Default False.
+    cache_size : int
+        Number of (most recently used) scenarios kept around for looking up
+        parent scenarios. Default 1024.
+    memo_size : Optional[int]
+        Number of (most recently used) resolved modification lists memoised
+        by ``Scenario.modifications_from_root``. When None, the memo is
+        unbounded. Default 1024.
+
+    Yields
+    ------
+    Scenario
+        The scenarios in the order they are defined in the STOCH file.
+
+    Raises
+    ------
+    FileNotFoundError
+        When the STOCH file does not exist.
+    """
+    logger.debug(f"Iterating over the scenarios in {location}.")
+
+    stoch = StochParser(location, memo_size=memo_size)
+    yield from stoch.iter_scenarios(mmap, cache_size)
@@ -1,12 +1,14 @@
 import logging
+import math
 import warnings
+from array import array
 from functools import lru_cache
-from typing import Dict, List, Tuple
+from typing import Dict, List
 
 import numpy as np
 from scipy.sparse import coo_matrix
 
-from smps.classes import DataLine
+from smps.classes import DataColumns
 from .Parser import Parser
 
 logger = logging.getLogger(__name__)
@@ -18,24 +20,32 @@ _CONSTRAINT_SENSES = {'N', 'L', 'E', 'G'}
 class MpsParser(Parser):
     _file_extensions = [".mps", ".MPS"]
     _steps = {
-        "NAME": lambda self, data_line: self._process_name(data_line),
-        "ROWS": lambda self, data_line: self._process_rows(data_line),
-        "COLUMNS": lambda self, data_line: self._process_columns(data_line),
-        "RHS": lambda self, data_line: self._process_rhs(data_line),
-        "BOUNDS": lambda self, data_line: self._process_bounds(data_line),
-        "RANGES": lambda self, data_line: self._process_ranges(data_line),
+        "NAME": lambda self, lines: self._process_name(lines),
+        "ROWS": lambda self, lines: self._process_rows(lines),
+        "COLUMNS": lambda self, lines: self._process_columns(lines),
+        "RHS": lambda self, lines: self._process_rhs(lines),
+        "BOUNDS": lambda self, lines: self._process_bounds(lines),
+        "RANGES": lambda self, lines: self._process_ranges(lines),
+    }
+    _indicators = {
+        "ROWS": _CONSTRAINT_SENSES,
+        "BOUNDS": _BOUNDS_TYPES,
     }
 
-    def __init__(self, location):
-        super().__init__(location)
+    def __init__(self, location, free_format=None, names=None):
+        super().__init__(location, free_format, names)
 
-        # This list will contain all elements of the constrain matrix, as a list
-        # of (constraint, variable, value)-tuples.
-        self._elements: List[Tuple[str, str, float]] = []
+        # These typed buffers contain all elements of the constraint matrix, in
+        # coordinate (COO) format: the row and column indices are resolved
+        # while parsing, so the matrix can be built without a second pass.
+        self._rows = array('i')
+        self._cols = array('i')
+        self._values = array('d')
 
-        # This list contains all objective coefficients, as a list of
-        # (variable, value)-tuples.
-        self._obj_coeffs: List[Tuple[str, float]] = []
+        # These contain all objective coefficients, as variable indices and
+        # their values.
+        self._obj_cols = array('i')
+        self._obj_values = array('d')
         self._objective_name = ""
 
         # Constraints.
@@ -97,14 +107,11 @@ class MpsParser(Parser):
         Builds and returns a sparse matrix of the coefficient data. This
         represents the entire tableau, for all stages. Cached after first call.
         """
-        data = []
-        rows = []
-        cols = []
-
-        for constr, var, val in self._elements:
-            data.append(val)
-            rows.append(self._constr2idx[constr])
-            cols.append(self._var2idx[var])
+        # These are zero-copy views on the buffers that were filled while
+        # parsing. That does mean the buffers cannot grow after this call.
+        data = np.frombuffer(self._values, dtype=np.float64)
+        rows = np.frombuffer(self._rows, dtype=np.intc)
+        cols = np.frombuffer(self._cols, dtype=np.intc)
 
         shape = (len(self.constraint_names), len(self.variable_names))
         return coo_matrix((data, (rows, cols)), shape=shape)
@@ -118,8 +125,8 @@ class MpsParser(Parser):
         """
         coeffs = np.zeros(len(self.variable_names))
 
-        for var, val in self._obj_coeffs:
-            coeffs[self._var2idx[var]] = val
+        cols = np.frombuffer(self._obj_cols, dtype=np.intc)
+        coeffs[cols] = np.frombuffer(self._obj_values, dtype=np.float64)
 
         return coeffs
 
@@ -159,54 +166,61 @@ class MpsParser(Parser):
         """
         return self._ub
 
-    def _process_name(self, data_line: DataLine):
-        if not data_line.has_second_header_word():
-            msg = "MPS file has no value for the NAME field."
-            warnings.warn(msg)
-            logger.warning(msg)
-        else:
-            self._name = data_line.second_header_word()
-
-    def _process_rows(self, data_line: DataLine):
-        indicator = data_line.indicator()
-        name = data_line.first_name()
-
-        assert indicator in _CONSTRAINT_SENSES
-
-        # This is a "no restriction" row, which indicates an objective function.
-        # There can be more than one such row, but there can only be one
-        # objective. We take the first such row as the objective, and then
-        # ignore any subsequent "no restriction" rows.
-        if indicator == 'N':
-            if self.objective_name == "":
-                logger.debug(f"Setting {name} as objective.")
-                self._objective_name = name
-
-            return
-        else:
-            self._constr_names.append(name)
-            self._senses.append(indicator)
-            self._constr2idx[name] = len(self._constr_names) - 1
-
-    def _process_columns(self, data_line: DataLine):
-        name = data_line.second_name()
-
-        if "MARKER" in name.upper():
-            self._parse_marker(data_line)
-        else:
-            self._parse_column(data_line)
-
-    def _process_rhs(self, data_line: DataLine):
+    def _process_name(self, lines: DataColumns):
+        for data_line in lines:
+            if not data_line.has_second_header_word():
+                msg = "MPS file has no value for the NAME field."
+                warnings.warn(msg)
+                logger.warning(msg)
+            else:
+                self._name = data_line.second_header_word()
+
+    def _process_rows(self, lines: DataColumns):
+        for indicator, name in zip(lines.indicators, lines.first_names):
+            assert indicator in _CONSTRAINT_SENSES
+
+            # This is a "no restriction" row, which indicates an objective
+            # function. There can be more than one such row, but there can only
+            # be one objective. We take the first such row as the objective,
+            # and then ignore any subsequent "no restriction" rows.
+            if indicator == 'N':
+                if self.objective_name == "":
+                    logger.debug(f"Setting {name} as objective.")
+                    self._objective_name = name
+            else:
+                self._constr_names.append(name)
+                self._senses.append(indicator)
+                self._constr2idx[name] = len(self._constr_names) - 1
+
+    def _process_columns(self, lines: DataColumns):
+        fields = zip(lines.first_names,
+                     lines.second_names,
+                     lines.first_numbers,
+                     lines.third_names,
+                     lines.second_numbers)
+
+        for var, constr, value, constr2, value2 in fields:
+            if "MARKER" in constr.upper():
+                self._parse_marker(var, constr2)
+            else:
+                self._parse_column(var, constr, value, constr2, value2)
+
+    def _process_rhs(self, lines: DataColumns):
         if len(self._rhs) != len(self.constraint_names):
             self._rhs = np.zeros(len(self.constraint_names))
 
-        self._add_rhs(data_line.second_name(), data_line.first_number())
+        fields = zip(lines.second_names,
+                     lines.first_numbers,
+                     lines.third_names,
+                     lines.second_numbers)
 
-        if data_line.has_third_name() and data_line.has_second_number():
-            self._add_rhs(data_line.third_name(),
-                          data_line.second_number())
+        for constr, value, constr2, value2 in fields:
+            self._add_rhs(constr, value)
 
-    def _process_bounds(self, data_line: DataLine):
+            if constr2 and not math.isnan(value2):
+                self._add_rhs(constr2, value2)
+
+    def _process_bounds(self, lines: DataColumns):
         """
         There are a ton of bound types, but the most common are listed below,
         originally due to http://lpsolve.sourceforge.net/5.5/mps-format.htm. A
@@ -231,69 +245,72 @@ class MpsParser(Parser):
             self._lb = np.zeros(len(self.variable_names))
             self._ub = np.full(len(self.variable_names), np.inf)
 
-        bound_type = data_line.indicator()
-
-        if bound_type not in _BOUNDS_TYPES:
-            msg = f"Bounds of type {bound_type} are not understood."
-            logger.error(msg)
-            raise ValueError(msg)
+        fields = zip(lines.indicators,
+                     lines.second_names,
+                     lines.first_numbers)
 
-        var = data_line.second_name()
-        idx = self._var2idx[var]
+        for bound_type, var, value in fields:
+            if bound_type not in _BOUNDS_TYPES:
+                msg = f"Bounds of type {bound_type} are not understood."
+                logger.error(msg)
+                raise ValueError(msg)
 
-        # The value is clear from the type, and need not have been specified.
-        # Hence we treat these separately, and then return.
-        if bound_type in {"FR", "MI", "PL", "BV"}:
-            if bound_type == "FR":  # free variable
-                self._lb[idx] = -np.inf
-                self._ub[idx] = np.inf
+            idx = self._var2idx[var]
 
-            if bound_type == "MI":  # -inf lower bound
-                self._lb[idx] = -np.inf
+            # The value is clear from the type, and need not have been
+            # specified. Hence we treat these separately, and then continue.
+            if bound_type in {"FR", "MI", "PL", "BV"}:
+                if bound_type == "FR":  # free variable
+                    self._lb[idx] = -np.inf
+                    self._ub[idx] = np.inf
 
-            if bound_type == "PL":  # +inf upper bound
-                self._ub[idx] = np.inf
+                if bound_type == "MI":  # -inf lower bound
+                    self._lb[idx] = -np.inf
 
-            if bound_type == "BV":  # binary variable
-                self._lb[idx] = 0
-                self._ub[idx] = 1
-                self._types[idx] = 'B'
+                if bound_type == "PL":  # +inf upper bound
+                    self._ub[idx] = np.inf
 
-            return
+                if bound_type == "BV":  # binary variable
+                    self._lb[idx] = 0
+                    self._ub[idx] = 1
+                    self._types[idx] = 'B'
 
-        value = data_line.first_number()
+                continue
 
-        if bound_type == "LO":  # lower bound
-            self._lb[idx] = value
+            if bound_type == "LO":  # lower bound
+                self._lb[idx] = value
 
-        if bound_type == "UP":  # upper bound
-            self._ub[idx] = value
+            if bound_type == "UP":  # upper bound
+                self._ub[idx] = value
 
-        if bound_type == "FX":  # fixed variable
-            self._lb[idx] = value
-            self._ub[idx] = value
+            if bound_type == "FX":  # fixed variable
+                self._lb[idx] = value
+                self._ub[idx] = value
 
-        if bound_type == "LI":  # integer variable, lower bound
-            self._lb[idx] = value
-            self._types[idx] = 'I'
+            if bound_type == "LI":  # integer variable, lower bound
+                self._lb[idx] = value
+                self._types[idx] = 'I'
 
-        if bound_type == "UI":  # integer variable, upper bound
-            self._ub[idx] = value
-            self._types[idx] = 'I'
+            if bound_type == "UI":  # integer variable, upper bound
+                self._ub[idx] = value
+                self._types[idx] = 'I'
 
-    def _process_ranges(self, data_line: DataLine):
+    def _process_ranges(self, lines: DataColumns):
         if len(self._lb) != len(self.variable_names) != len(self._ub):
             self._lb = np.zeros(len(self.variable_names))
             self._ub = np.full(len(self.variable_names), np.inf)
 
         # TODO see https://github.com/N-Wouda/SMPS/issues/5
 
-    def _add_value(self, constr: str, var: str, value: float):
+    def _add_value(self, constr: str, var_idx: int, value: float):
         if constr == self.objective_name:
-            self._obj_coeffs.append((var, value))
+            self._obj_cols.append(var_idx)
+            self._obj_values.append(value)
 
         if constr in self._constr2idx:
-            self._elements.append((constr, var, value))
+            self._rows.append(self._constr2idx[constr])
+            self._cols.append(var_idx)
+            self._values.append(value)
 
         if constr != self.objective_name and constr not in self._constr2idx:
             # This is likely a "no restriction" row other than the objective.
@@ -311,11 +328,8 @@ class MpsParser(Parser):
             logger.warning(msg)
             warnings.warn(msg)
 
-    def _parse_marker(self, data_line: DataLine):
-        assert data_line.has_third_name()
-
-        name = data_line.first_name()
-        marker_type = data_line.third_name()
+    def _parse_marker(self, name: str, marker_type: str):
+        assert marker_type != ""
 
         logger.debug(f"Encountered a {marker_type} marker named {name}.")
 
@@ -325,19 +339,19 @@ class MpsParser(Parser):
         if "INTEND" in marker_type.upper():
             self._parse_ints = False
 
-    def _parse_column(self, data_line: DataLine):
-        var = data_line.first_name()
-
+    def _parse_column(self,
+                      var: str,
+                      constr: str,
+                      value: float,
+                      constr2: str,
+                      value2: float):
         if var not in self._var2idx:
             self._variable_names.append(var)
             self._types.append('I' if self._parse_ints else 'C')
             self._var2idx[var] = len(self._variable_names) - 1
 
-        constr = data_line.second_name()
-        value = data_line.first_number()
-        self._add_value(constr, var, value)
+        var_idx = self._var2idx[var]
+        self._add_value(constr, var_idx, value)
 
-        if data_line.has_third_name() and data_line.has_second_number():
-            constr = data_line.third_name()
-            value = data_line.second_number()
-            self._add_value(constr, var, value)
+        if constr2 and not math.isnan(value2):
+            self._add_value(constr2, var_idx, value2)
@@ -1,13 +1,76 @@
 import logging
+import mmap
+import os
 import warnings
 from abc import ABC
 from pathlib import Path
-from typing import Callable, Dict, Generator, List, Optional, Union
+from typing import (IO, Any, Callable, Collection, Dict, Generator, Iterable,
+                    List, Optional, Union)
 
-from smps.classes import DataLine
+from smps.classes import DataColumns, DataLine, NameTable
+from smps.classes.DataLine import is_free_format, is_free_header
+from .compression import (COMPRESSION_EXTENSIONS, Buffer, is_compressed,
+                          is_compressed_buffer, open_binary, open_buffer,
+                          open_text)
 
 logger = logging.getLogger(__name__)
 
+# Anything that can be parsed: a file-system location, the contents of a file
+# in memory, or a file-like object.
+Source = Union[str, Path, Buffer, IO]
+
+_BLANK = (" ", b" ", "\t", b"\t")
+_COMMENT = ("*", b"*")
+
+# Number of bytes after which pages of a memory-mapped file that have already
+# been read are released again.
+_RELEASE_SIZE = 64 * 2 ** 20
+
+
+def _decode(line: Union[str, bytes]) -> str:
+    return line.decode() if isinstance(line, bytes) else line
+
+
+def _is_data(line: Union[str, bytes]) -> bool:
+    return len(line) != 0 and line[:1] in _BLANK \
+        and line.lstrip()[:1] not in _COMMENT
+
+
+def _describe(location: Source) -> str:
+    if isinstance(location, (bytes, bytearray, memoryview)):
+        return f"<{memoryview(location).nbytes} bytes>"
+
+    if hasattr(location, "read"):
+        return f"<{type(location).__name__}>"
+
+    return str(location)
+
+
+def _read_stream(source: Source) -> Source:
+    """
+    Reads file-like objects into memory, so that their contents can be hashed,
+    or sent to other processes. Text streams are encoded to bytes. Other
+    sources are returned as they are.
+    """
+    if not hasattr(source, "read"):
+        return source
+
+    data = source.read()  # type: ignore
+    return data.encode() if isinstance(data, str) else data
+
+
+def _release(mm: mmap.mmap, position: int) -> int:
+    """
+    Releases the pages of the memory map before position, which are no longer
+    needed. Returns the (page-aligned) offset up to which pages were released.
+    """
+    offset = position - position % mmap.PAGESIZE
+
+    if hasattr(mmap, "MADV_DONTNEED"):  # not available on all platforms.
+        mm.madvise(mmap.MADV_DONTNEED, 0, offset)
+
+    return offset
+
 
 class Parser(ABC):
     """
@@ -15,10 +78,24 @@ class Parser(ABC):
 
     Arguments
     ---------
-    location : Union[str, Path]
+    location : Source
         The location to be parsed. This can either be a fully formed file,
         including file extension, or a general location identifying an SMPS
-        triplet. In case of the latter, the extension is inferred.
+        triplet. In case of the latter, the extension is inferred. Files may
+        be compressed (e.g., .sto.gz, .cor.xz, or .sto.zst), in which case
+        they are decompressed while they are parsed. Alternatively, this can
+        be the file contents in memory (bytes, bytearray or memoryview), which
+        may be compressed as well, or a file-like object that is read line by
+        line. These in-memory sources are parsed only once, and released
+        afterwards.
+    free_format : Optional[bool]
+        Whether the file is in free format. Default None, in which case the
+        format is detected while parsing (see ``free_format``).
+    names : Optional[NameTable]
+        Table in which the names in the file are interned. Parsers of files
+        that belong together (e.g., an SMPS triplet) may share one table, so
+        that each distinct name is stored only once. Default None (a new
+        table).
 
     Raises
     ------
@@ -30,81 +107,372 @@ class Parser(ABC):
 
     # Parsing functions for each header section. Since we cannot forward declare
     # these nicely, this dict is a bit ugly in the implementing classes.
-    _steps: Dict[str, Callable[["Parser", DataLine], None]]
+    _steps: Dict[str, Callable[["Parser", DataColumns], None]]
+
+    # Indicators that may start a data line, for sections that have these.
+    # These are needed to tell indicators and names apart in free format.
+    _indicators: Dict[str, Collection[str]] = {}
 
-    def __init__(self, location: Union[str, Path]):
+    # Sections whose names are not interned in the parser's name table, e.g.
+    # because their handlers store names in some other way.
+    _uninterned: Collection[str] = ()
+
+    # Maximum number of data lines that are tokenised and processed at once.
+    # This bounds memory use for very large sections.
+    _batch_size = 4096
+
+    def __init__(self,
+                 location: Source,
+                 free_format: Optional[bool] = None,
+                 names: Optional[NameTable] = None):
         typ = type(self).__name__
-        logger.debug(f"Creating {typ}('{location}').")
+        logger.debug(f"Creating {typ}('{_describe(location)}').")
 
         # Insertion order is a CPython implementation detail in Py3.6, but from
         # Py3.7+ we can rely on insertion order as default behaviour.
         self._state = next(iter(self._steps.keys()))
-        self._location = Path(location)
 
-        if self.file_location() is None:
-            msg = f"{typ}: {location} does not define an appropriate file."
-            logger.error(msg)
-            raise FileNotFoundError(msg)
+        self._location: Optional[Path] = None
+        self._buffer: Optional[Buffer] = None
+        self._stream: Optional[IO] = None
+
+        if isinstance(location, (bytes, bytearray, memoryview)):
+            self._buffer = location
+        elif hasattr(location, "read"):
+            self._stream = location  # type: ignore
+        else:
+            self._location = Path(location)  # type: ignore
+
+            if self.file_location() is None:
+                msg = f"{typ}: {location} does not define an appropriate file."
+                logger.error(msg)
+                raise FileNotFoundError(msg)
 
         self._name = ""  # each file defines this field.
 
+        # Unless the format is given, it is detected while parsing: the file
+        # is parsed in fixed format until some lines do not fit it.
+        self._free_format = free_format
+        self._detect_format = free_format is None
+
+        # All names in the file are interned in this table, so that each
+        # distinct name is stored only once.
+        self._names = NameTable() if names is None else names
+
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def name_table(self) -> NameTable:
+        """
+        Returns the table in which the names in this file are interned.
+        """
+        return self._names
+
+    @property
+    def free_format(self) -> Optional[bool]:
+        """
+        Whether the file is in free format. Unless this was given explicitly,
+        it is None until the file is parsed, and is detected while parsing: a
+        file is in free format when any of its lines does not fit the fixed
+        column positions (see ``DataLine.is_free_format``).
+        """
+        return self._free_format
+
     def file_location(self) -> Optional[Path]:
         """
         Returns a Python path to the file this parser processes. Assumes
         existence has been checked before calling this method. Returns None
-        if the file could not be found.
+        if the file could not be found, or when parsing from memory.
         """
-        if self._location.exists():
-            logger.debug(f"Found existing file {self._location}.")
-            return self._location
+        if self._location is None:
+            return None
+
+        candidates = [self._location]
+        candidates += [self._location.with_suffix(extension)
+                       for extension in self._file_extensions]
 
-        for extension in self._file_extensions:
-            file = self._location.with_suffix(extension)
+        for candidate in candidates:
+            # Each file may also be compressed, e.g. file.sto.gz.
+            if candidate.exists():
+                logger.debug(f"Found existing file {candidate}.")
+                return candidate
 
-            if file.exists():
-                logger.debug(f"Found existing file {file}.")
-                return file
+            for extension in COMPRESSION_EXTENSIONS:
+                file = candidate.with_name(candidate.name + extension)
+
+                if file.exists():
+                    logger.debug(f"Found existing file {file}.")
+                    return file
 
         return None
 
-    def parse(self):
+    def is_compressed(self) -> bool:
+        """
+        Tests if the file (or in-memory data) this parser processes is
+        compressed. File-like objects are read as they are, and are never
+        considered compressed.
+        """
+        if self._buffer is not None:
+            return is_compressed_buffer(self._buffer)
+
+        if self._location is None:
+            return False
+
+        return is_compressed(self._file())
+
+    def is_in_memory(self) -> bool:
+        """
+        Tests if this parser processes data in memory, or a file-like object,
+        rather than a file on the file-system. This is also the case for files
+        that have been loaded into memory (see ``load``), until they are
+        parsed.
+        """
+        return self._location is None or self._buffer is not None
+
+    def load(self):
+        """
+        Reads the file (or file-like object) this parser processes into memory,
+        so that parsing does not perform any further I/O. Compressed files are
+        read as they are, and decompressed while they are parsed. The file
+        location is retained, but the file is read only once: parsing again
+        afterwards reads the file itself.
+        """
+        if self._stream is not None:
+            data = self._stream.read()
+            self._buffer = data.encode() if isinstance(data, str) else data
+            self._stream = None
+        elif self._buffer is None and self._location is not None:
+            with open(str(self.file_location()), "rb") as fh:
+                self._buffer = fh.read()
+
+    def parse(self, mmap: bool = False):
+        """
+        Parses the given file location. Consecutive data lines belonging to
+        the same section are collected into batches, which are tokenised at
+        once (see DataColumns) and handed to the section's processing step.
+
+        Parameters
+        ----------
+        mmap : bool
+            When True, the file is memory-mapped and read as raw bytes, and
+            only those fields that are needed are decoded. This keeps memory
+            use low for very large files. Compressed files cannot be
+            memory-mapped, and are instead read as raw bytes while they are
+            decompressed. Default False.
+        """
+        for _ in self._iter_parse(mmap):
+            pass
+
+    def _iter_parse(self,
+                    mmap: bool = False,
+                    lines: Optional[Iterable[Union[str, bytes]]] = None
+                    ) -> Generator[None, None, None]:
         """
-        Parses the given file location.
+        Incrementally parses the given file location (generator). Control is
+        returned to the caller after each batch of data lines is processed,
+        so that the results so far can be consumed. See ``parse``. When lines
+        are passed, those (stripped) lines are parsed instead of the file.
         """
-        for data_line in self._read_file():
-            # If any of these conditions is True, this data line is not
-            # processed further.
-            skip_when = (data_line.is_comment(),
-                         self._state == "SKIP",
-                         data_line.is_header() and self._transition(data_line))
+        batch: list = []
 
-            if any(skip_when):
+        if lines is None:
+            if self.is_in_memory():
+                lines = self._read_memory()
+            else:
+                lines = self._read_mmap() if mmap else self._read_file()
+
+        for line in lines:
+            # Lines are either str or bytes, so these checks are written to
+            # work for both (see DataLine.is_comment and DataLine.is_header).
+            if len(line) == 0 or line.lstrip()[:1] in _COMMENT:
+                continue
+
+            if line[:1] not in _BLANK:  # header
+                self._process_batch(batch)
+                batch = []
+                yield
+
+                # This might never get hit as ENDATA is generally the last line
+                # of an SMPS file, but any data beyond it should be ignored.
+                line = _decode(line)
+                free_format = self._check_format(lambda: is_free_header(line))
+                header = DataLine(line, free_format)
+
+                if self._transition(header):
+                    if self._state == "ENDATA":
+                        return
+
+                    continue
+
+            if self._state == "SKIP":
                 continue
 
-            # This might never get hit as ENDATA is generally the last line of
-            # an SMPS file, so the ``continue`` above should end the parse.
-            if self._state == "ENDATA":
-                break
+            batch.append(line)
+
+            if len(batch) >= self._batch_size:
+                self._process_batch(batch)
+                batch = []
+                yield
+
+        self._process_batch(batch)
+        yield
+
+    def _process_batch(self, batch: list):
+        """
+        Tokenises the given batch of data lines, and passes the resulting
+        columns to the processing step of the current section.
+        """
+        if len(batch) != 0 and self._state not in {"SKIP", "ENDATA"}:
+            indicators = self._indicators.get(self._state, ())
 
             func = self._steps[self._state]
-            func(self, data_line)
+            names = None if self._state in self._uninterned else self._names
+
+            # The header of the initial section is processed as data as well
+            # (see _transition), but is checked as a header.
+            data = batch if _is_data(batch[0]) else batch[1:]
+            free_format = self._check_format(lambda: is_free_format(data))
+            columns = DataColumns(batch, free_format, indicators, names)
+
+            func(self, columns)
+
+    def _check_format(self, is_free: Callable[[], bool]) -> bool:
+        """
+        Returns whether the next lines should be parsed in free format. Unless
+        the format was given explicitly, these lines are tested with is_free as
+        long as the file has been in fixed format so far. Once some lines are
+        in free format, so is the remainder of the file. Lines that fit the
+        fixed format are parsed alike in either format.
+        """
+        if self._detect_format and not self._free_format:
+            self._free_format = is_free()
+
+            if self._free_format:
+                logger.info("Detected free format.")
+
+        return bool(self._free_format)
 
-    def _read_file(self) -> Generator[DataLine, None, None]:
+    def _read_memory(self) -> Generator[Union[str, bytes], None, None]:
+        """
+        Reads the in-memory data or file-like object, one line at a time
+        (generator). The source is released once it has been read.
+
+        Yields
+        ------
+        Union[str, bytes]
+            A single line in the input, stripped of trailing white space. This
+            is a str only when a file-like object yields text.
+
+        Raises
+        ------
+        ValueError
+            When the source has already been parsed (and released).
+        """
+        fh: IO
+
+        if self._buffer is not None:
+            fh = open_buffer(self._buffer)
+        elif self._stream is not None:
+            fh = self._stream
+        else:
+            msg = "The in-memory source has already been parsed."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        try:
+            for line in fh:
+                yield line.rstrip()
+        finally:
+            self._buffer = None
+            self._stream = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # File-like objects cannot be sent to other processes, but the data
+        # in memory can (as bytes, since memoryviews cannot be pickled).
+        if self._stream is not None:
+            msg = "Parsers of file-like objects cannot be pickled."
+            logger.error(msg)
+            raise TypeError(msg)
+
+        state = self.__dict__.copy()
+
+        if self._buffer is not None and not isinstance(self._buffer, bytes):
+            state["_buffer"] = bytes(self._buffer)
+
+        return state
+
+    def _file(self) -> Path:
+        """
+        Returns the location of the file this parser processes, see
+        ``file_location``.
+
+        Raises
+        ------
+        FileNotFoundError
+            When the file no longer exists.
+        """
+        location = self.file_location()
+
+        if location is None:
+            msg = f"{self._location} does not define an appropriate file."
+            logger.error(msg)
+            raise FileNotFoundError(msg)
+
+        return location
+
+    def _read_file(self) -> Generator[str, None, None]:
         """
         Reads the file, one line at a time (generator).
 
         Yields
         ------
-        DataLine
-            A DataLine wrapping a single line in the input file.
+        str
+            A single line in the input file, stripped of trailing white space.
         """
-        with open(str(self.file_location())) as fh:
+        with open_text(self._file()) as fh:
             for line in fh:
-                yield DataLine(line)
+                yield line.rstrip()
+
+    def _read_mmap(self) -> Generator[bytes, None, None]:
+        """
+        Reads the file via a read-only memory map, one line at a time
+        (generator). Lines are not decoded, and pages that have been read are
+        released back to the operating system as we go, so that memory use
+        does not grow with the file size.
+
+        Yields
+        ------
+        bytes
+            A single line in the input file, stripped of trailing white space.
+        """
+        if self.is_compressed():
+            with open_binary(self._file()) as fh:
+                for line in fh:
+                    yield line.rstrip()
+
+            return
+
+        with open(str(self.file_location()), "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+
+            if size == 0:  # empty files cannot be memory-mapped.
+                return
+
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise"):  # Py3.8+, and platform dependent.
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+
+                released = 0
+
+                for line in iter(mm.readline, b""):
+                    yield line.rstrip()
+
+                    position = mm.tell()
+
+                    if position - released >= _RELEASE_SIZE:
+                        released = _release(mm, position)
 
     def _transition(self, data_line: DataLine) -> bool:
         """
@@ -124,7 +492,7 @@ class Parser(ABC):
         assert data_line.is_header()
         header = data_line.first_header_word()
 
-        if header == self._state:
+        if header == self._state == next(iter(self._steps.keys())):
             # This is the initial state, which has a name attribute that should
             # be parsed.
             return False
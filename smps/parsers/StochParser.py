@@ -1,81 +1,584 @@
 import logging
+import math
+import mmap
+import os
+import re
 import warnings
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Generator, List, Optional, Tuple, Union
 
-from smps.classes import DataLine, Indep, Scenario
-from .Parser import Parser
+from smps.classes import (Block, DataColumns, Distrib, Indep, NameTable,
+                          NodeTree, Scenario, ScenarioTree)
+from smps.classes.DataLine import is_free_format
+from smps.constants import MODIFICATIONS
+from smps.distributions import registered_distributions
+from .Parser import Parser, _COMMENT
 
 logger = logging.getLogger(__name__)
 
+# Section header lines start with anything other than white space or a comment.
+_HEADER = re.compile(rb"^[^ \t*\r\n].*$", re.MULTILINE)
+
+# Indicator of the lines that start a new scenario in a SCENARIOS section.
+_SCENARIO_INDICATORS = {"SC"}
+
+# Line break preceding such a line. In fixed format, the indicator is in
+# columns 2-3; anywhere else, SC may be the name of a variable. In free format,
+# the indicator is the first word, and may be preceded by any white space.
+_SC_LINE_FIXED = re.compile(rb"\n SC ")
+_SC_LINE_FREE = re.compile(rb"\n[ \t]+SC[ \t]")
+
+# Number of chunks each worker receives, on average, when the SCENARIOS data
+# is parsed in parallel. More chunks than workers balances the load better.
+_CHUNKS_PER_WORKER = 4
+
+
+def _parse_scenarios(lines: DataColumns,
+                     current: Optional[Scenario],
+                     names: NameTable) -> List[Scenario]:
+    """
+    Parses the given SCENARIOS data lines. Any modifications preceding the
+    first SC line are added to the current scenario. Returns the scenarios that
+    were started in these lines, in order. Their names are interned in the
+    given name table.
+    """
+    scenarios = []
+
+    fields = zip(lines.indicators,
+                 lines.first_names,
+                 lines.second_names,
+                 lines.first_numbers,
+                 lines.third_names,
+                 lines.second_numbers)
+
+    for indicator, var, constr, value, constr2, value2 in fields:
+        if indicator == "SC":  # new scenario
+            # For these lines, the fields hold the scenario name, parent
+            # name, probability and branching period, respectively.
+            current = Scenario(var, constr, constr2, value, names)
+            scenarios.append(current)
+            continue
+
+        assert current is not None
+        current.add_modification(constr, var, value)
+
+        if constr2 and not math.isnan(value2):
+            current.add_modification(constr2, var, value2)
+
+    return scenarios
+
+
+def _parse_scenario_chunk(location: Path,
+                          start: int,
+                          end: int,
+                          free_format: Optional[bool] = None
+                          ) -> Tuple[List[Scenario], bool]:
+    """
+    Parses the SCENARIOS data in the given byte range of the file. The range
+    should start at an SC line. Runs in a worker process, see
+    ``StochParser.parse`` and ``_parse_scenario_data``.
+    """
+    with open(str(location), "rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+
+    return _parse_scenario_data(data, free_format)
+
+
+def _parse_scenario_data(data: bytes,
+                         free_format: Optional[bool] = None
+                         ) -> Tuple[List[Scenario], bool]:
+    """
+    Parses the given SCENARIOS data, which should start at an SC line. Runs in
+    a worker process, see ``StochParser.parse``. The scenarios share a name
+    table of their own, which is mapped to the parser's table once they are
+    added to its scenario tree. When free_format is None, the format is
+    detected from the data. Returns the scenarios, and whether the data was
+    parsed in free format.
+    """
+    lines = [line.rstrip() for line in data.splitlines()]
+    lines = [line for line in lines
+             if len(line) != 0 and line.lstrip()[:1] not in _COMMENT]
+
+    if free_format is None:
+        free_format = is_free_format(lines)
+
+    columns = DataColumns(lines, free_format, _SCENARIO_INDICATORS)
+    return _parse_scenarios(columns, None, NameTable()), free_format
+
+
+def _chunk(data: Union[bytes, mmap.mmap],
+           start: int,
+           end: int,
+           num_chunks: int,
+           free_format: bool = False) -> List[Tuple[int, int]]:
+    """
+    Splits the byte range [start, end) of the data into (at most) num_chunks
+    ranges of about equal size. Each range but the first starts at an SC line.
+    """
+    sc_line = _SC_LINE_FREE if free_format else _SC_LINE_FIXED
+    boundaries = [start]
+
+    for idx in range(1, num_chunks):
+        target = start + idx * (end - start) // num_chunks
+        match = sc_line.search(data, max(target, boundaries[-1]), end)
+
+        if match is None:
+            break
+
+        if match.start() + 1 > boundaries[-1]:
+            boundaries.append(match.start() + 1)
+
+    boundaries.append(end)
+
+    return [(lower, upper) for lower, upper in zip(boundaries, boundaries[1:])
+            if lower < upper]
+
+
+def _split_scenarios(data: Union[bytes, mmap.mmap],
+                     num_chunks: int,
+                     free_format: bool = False
+                     ) -> Tuple[List[bytes], List[Tuple[int, int]]]:
+    """
+    Splits the STOCH file data into the data lines of the SCENARIOS sections,
+    as byte ranges of about num_chunks chunks per section, and all other
+    lines (including the SCENARIOS section headers). Unless free_format is
+    set, the data is only split at SC lines that are valid in fixed format.
+    """
+    lines: List[bytes] = []
+    chunks: List[Tuple[int, int]] = []
+
+    headers = [(match.start(), match.end()) for match in _HEADER.finditer(data)]
+    section_ends = [start for start, _ in headers[1:]] + [len(data)]
+
+    if headers:
+        lines.extend(data[:headers[0][0]].splitlines())
+
+    for (start, end), section_end in zip(headers, section_ends):
+        header = data[start:end].rstrip()
+        lines.append(header)
+
+        word = header.split()[0]  # also in free format.
+        body_start = min(end + 1, section_end)
+
+        if word == b"ENDATA":  # anything beyond this is ignored.
+            break
+
+        if word == b"SCENARIOS":
+            chunks.extend(_chunk(data, body_start, section_end, num_chunks,
+                                 free_format))
+        else:
+            lines.extend(data[body_start:section_end].splitlines())
+
+    return [line.rstrip() for line in lines], chunks
+
 
 class StochParser(Parser):
     _file_extensions = [".sto", ".STO", ".stoch", ".STOCH"]
     _steps = {
-        "STOCH": lambda self, data_line: self._process_stoch(data_line),
-        "INDEP": lambda self, data_line: self._process_indep(data_line),
-        "BLOCKS": lambda self, data_line: self._process_blocks(data_line),
-        "SCENARIOS": lambda self, data_line: self._process_scenarios(data_line),
-        "NODES": lambda self, data_line: self._process_nodes(data_line),
-        "DISTRIB": lambda self, data_line: self._process_distrib(data_line),
+        "STOCH": lambda self, lines: self._process_stoch(lines),
+        "INDEP": lambda self, lines: self._process_indep(lines),
+        "BLOCKS": lambda self, lines: self._process_blocks(lines),
+        "SCENARIOS": lambda self, lines: self._process_scenarios(lines),
+        "NODES": lambda self, lines: self._process_nodes(lines),
+        "DISTRIB": lambda self, lines: self._process_distrib(lines),
     }
+    _indicators = {
+        "SCENARIOS": _SCENARIO_INDICATORS,
+        "BLOCKS": {"BL"},
+        "NODES": {"ND"},
+        "DISTRIB": {"DS", "CV"},
+    }
+
+    # Scenarios intern their modifications themselves, and keep their own
+    # names out of the name table, which thus does not grow with the number
+    # of (streamed) scenarios.
+    _uninterned = {"SCENARIOS"}
 
-    def __init__(self, location):
-        super().__init__(location)
+    def __init__(self,
+                 location,
+                 free_format=None,
+                 memo_size=1024,
+                 names=None):
+        super().__init__(location, free_format, names)
+
+        # Number of resolved modification lists the scenario tree memoises,
+        # see ``ScenarioTree``. None for an unbounded memo.
+        self._memo_size = memo_size
 
         self._current_scen: Optional[Scenario] = None
         self._indep_sections: List[Indep] = []
+
+        # Blocks by name, across all BLOCKS sections. Each BLOCKS section sets
+        # the modification type of the blocks that are first defined in it.
+        self._blocks: Dict[str, Block] = {}
+        self._current_block: Optional[Block] = None
+        self._block_modification = "REPLACE"
+
+        # Joint distributions by name, across all DISTRIB sections. As for
+        # blocks, each section sets the type of the distributions that are
+        # first defined in it.
+        self._distribs: Dict[str, Distrib] = {}
+        self._current_distrib: Optional[Distrib] = None
+        self._distrib_type = ""
+        self._distrib_modification = "REPLACE"
+
+        self._nodes = NodeTree(self._names)
+
+        # Each parser owns its scenarios. When streaming scenarios (see
+        # iter_scenarios), the tree is bounded, and scenarios are collected in
+        # the completed queue once their data block has been fully parsed.
+        # They are only added to the tree when they are yielded.
+        self._tree = ScenarioTree(memo_size=memo_size, names=self._names)
+        self._streaming = False
+        self._completed: Deque[Scenario] = deque()
         # TODO
 
     @property
     def scenarios(self) -> List[Scenario]:
-        return Scenario.scenarios()
+        return self._tree.scenarios
 
-    def _process_stoch(self, data_line: DataLine):
-        if not data_line.has_second_header_word():
-            msg = "Stoch file has no value for the STOCH field."
-            warnings.warn(msg)
+    @property
+    def indep_sections(self) -> List[Indep]:
+        """
+        Returns the INDEP sections in this file, in the order they were
+        defined.
+        """
+        return self._indep_sections
+
+    @property
+    def blocks(self) -> List[Block]:
+        """
+        Returns the blocks in this file, in the order they were first defined.
+        """
+        return list(self._blocks.values())
+
+    @property
+    def distribs(self) -> List[Distrib]:
+        """
+        Returns the joint distributions of the DISTRIB sections in this file,
+        in the order they were first defined.
+        """
+        return list(self._distribs.values())
+
+    @property
+    def node_tree(self) -> NodeTree:
+        """
+        Returns the tree of all nodes parsed from the NODES section(s).
+        """
+        return self._nodes
+
+    @property
+    def scenario_tree(self) -> ScenarioTree:
+        """
+        Returns the tree of all scenarios parsed from this file.
+        """
+        return self._tree
+
+    def parse(self,
+              mmap: bool = False,
+              workers: int = 1,
+              executor: Optional[Executor] = None):
+        """
+        Parses the STOCH file. See ``Parser.parse``.
+
+        Parameters
+        ----------
+        mmap : bool
+            When True, the file is read through a memory map. Default False.
+        workers : int
+            Number of processes used to parse the SCENARIOS section(s). When
+            larger than one, these sections are split into chunks at the SC
+            lines, which are parsed in a process pool, and merged in their
+            original order. The file is then always memory-mapped to find the
+            chunks (in-memory data is split directly). Compressed data and
+            file-like objects are always parsed with a single worker.
+            Default 1 (everything is parsed in this process).
+        executor : Optional[Executor]
+            Process pool in which the chunks are parsed, when workers is larger
+            than one. This lets callers share a single pool between several
+            parsers (see ``read_smps``). The number of chunks is still based on
+            workers. Default None, in which case a pool of workers processes
+            is created for this call.
+
+        Raises
+        ------
+        ValueError
+            When the number of workers is not positive.
+        """
+        if workers < 1:
+            msg = f"Cannot parse with {workers} workers."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if workers > 1 and (self.is_compressed() or self._stream is not None):
+            msg = ("Compressed data and file-like objects cannot be split into"
+                   " chunks; parsing with a single worker.")
             logger.warning(msg)
+            warnings.warn(msg)
+
+            workers = 1
+
+        if workers == 1:
+            super().parse(mmap)
+        else:
+            self._parse_parallel(workers, executor)
+
+    def iter_scenarios(self,
+                       mmap: bool = False,
+                       cache_size: int = 1024
+                       ) -> Generator[Scenario, None, None]:
+        """
+        Incrementally parses the SCENARIOS section(s), and yields each scenario
+        as soon as its data block has been read. Scenarios are not stored after
+        they have been yielded, so this uses little memory even for very large
+        STOCH files.
+
+        Parameters
+        ----------
+        mmap : bool
+            When True, the file is read through a memory map. Default False.
+        cache_size : int
+            Number of (most recently used) scenarios kept around for parent
+            look-ups. This should be at least the number of ancestors that are
+            still referenced by later scenarios. Default 1024.
+
+        Yields
+        ------
+        Scenario
+            The scenarios in the order they are defined in the file.
+
+        Raises
+        ------
+        KeyError
+            When a parent scenario is looked-up after it has been evicted from
+            the cache.
+        """
+        self._tree = ScenarioTree(cache_size, self._memo_size, self._names)
+        self._streaming = True
+
+        for _ in self._iter_parse(mmap):
+            yield from self._yield_completed()
+
+        self._complete_scenario()  # in case the file did not end in ENDATA.
+        yield from self._yield_completed()
+
+    def _yield_completed(self) -> Generator[Scenario, None, None]:
+        """
+        Adds the completed scenarios to the (bounded) tree, and yields them,
+        one at a time. A batch of data lines can hold many more scenarios than
+        the tree, so adding them all at once could evict scenarios (and their
+        parents) before they are yielded.
+        """
+        while self._completed:
+            scenario = self._completed.popleft()
+            self._tree.add(scenario)
+
+            yield scenario
+
+    def _parse_parallel(self,
+                        workers: int,
+                        executor: Optional[Executor] = None):
+        num_chunks = workers * _CHUNKS_PER_WORKER
+
+        # Unless the format is settled, each worker detects the format of its
+        # own chunk, as this parser does for the other lines. Until the format
+        # is known to be free, the data is only split at SC lines that are
+        # valid in fixed format, as SC may otherwise be a variable name. Such
+        # lines are SC lines in free format as well.
+        if self._detect_format and not self._free_format:
+            free_format = None
+        else:
+            free_format = self._free_format
+
+        split_free = bool(free_format)
+
+        if self._buffer is not None:
+            data = bytes(self._buffer)
+            self._buffer = None  # in-memory sources are only parsed once.
+
+            lines, chunks = _split_scenarios(data, num_chunks, split_free)
+            tasks: List[tuple]
+            tasks = [(_parse_scenario_data, data[start:end], free_format)
+                     for start, end in chunks]
         else:
-            self._name = data_line.second_header_word()
+            location = self.file_location()
+
+            with open(str(location), "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:  # cannot be mapped.
+                    return
+
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    lines, chunks = _split_scenarios(mm, num_chunks,
+                                                     split_free)
+
+            tasks = [(_parse_scenario_chunk, location, *chunk, free_format)
+                     for chunk in chunks]
+
+        logger.debug(f"Parsing {len(chunks)} SCENARIOS chunks with {workers}"
+                     f" workers.")
+
+        if executor is None:
+            with ProcessPoolExecutor(workers) as pool:
+                self._parse_chunks(pool, tasks, lines)
+        else:
+            self._parse_chunks(executor, tasks, lines)
+
+    def _parse_chunks(self, executor: Executor, tasks: list, lines: list):
+        futures = [executor.submit(*task) for task in tasks]
 
-    def _process_indep(self, data_line: DataLine):
+        # The other sections are parsed here while the workers parse the
+        # scenarios. The SCENARIOS headers are still parsed here as well, but
+        # their data lines are not.
+        for _ in self._iter_parse(lines=lines):
+            pass
+
+        # Parents precede their children, so scenarios are added in their
+        # original order. This also resolves parents across chunks.
+        for future in futures:
+            scenarios, free_format = future.result()
+            self._check_format(lambda: free_format)
+
+            for scenario in scenarios:
+                self._tree.add(scenario)
+
+    def _process_stoch(self, lines: DataColumns):
+        for data_line in lines:
+            if not data_line.has_second_header_word():
+                msg = "Stoch file has no value for the STOCH field."
+                warnings.warn(msg)
+                logger.warning(msg)
+            else:
+                self._name = data_line.second_header_word()
+
+    def _process_indep(self, lines: DataColumns):
         assert len(self._indep_sections) >= 1
         indep = self._indep_sections[-1]
-        indep.add_entry(data_line)
+        indep.add_entries(lines)
+
+    def _process_blocks(self, lines: DataColumns):
+        fields = zip(lines.indicators,
+                     lines.first_names,
+                     lines.second_names,
+                     lines.first_numbers,
+                     lines.third_names,
+                     lines.second_numbers)
+
+        for indicator, var, constr, value, constr2, value2 in fields:
+            if indicator == "BL":  # new realisation of a block
+                # For these lines, the fields hold the block name, period,
+                # and probability of this realisation, respectively.
+                if var not in self._blocks:
+                    block = Block(var, constr, self._block_modification)
+                    self._blocks[var] = block
+
+                self._current_block = self._blocks[var]
+                self._current_block.add_realisation(value)
+                continue
+
+            assert self._current_block is not None
+            self._current_block.add_entry(var, constr, value)
+
+            if constr2 and not math.isnan(value2):
+                self._current_block.add_entry(var, constr2, value2)
+
+    def _process_scenarios(self, lines: DataColumns):
+        scenarios = _parse_scenarios(lines, self._current_scen, self._names)
+
+        for scenario in scenarios:
+            self._complete_scenario()
+            self._current_scen = scenario
+
+            if not self._streaming:  # else added once complete.
+                self._tree.add(scenario)
+
+    def _complete_scenario(self):
+        """
+        Marks the current scenario as complete, when scenarios are streamed.
+        """
+        if self._streaming and self._current_scen is not None:
+            self._completed.append(self._current_scen)
+
+        self._current_scen = None
 
-    def _process_blocks(self, data_line: DataLine):
-        pass  # TODO
+    def _process_nodes(self, lines: DataColumns):
+        fields = zip(lines.indicators,
+                     lines.first_names,
+                     lines.second_names,
+                     lines.first_numbers,
+                     lines.third_names,
+                     lines.second_numbers)
 
-    def _process_scenarios(self, data_line: DataLine):
-        if data_line.indicator() == "SC":  # new scenario
-            scen = Scenario(data_line.first_name(),
-                            data_line.second_name(),
-                            data_line.third_name(),
-                            data_line.first_number())
+        for indicator, var, constr, value, constr2, value2 in fields:
+            if indicator == "ND":  # new node
+                # For these lines, the fields hold the node name, parent name,
+                # conditional probability and period, respectively.
+                self._nodes.add_node(var, constr, value, constr2)
+                continue
 
-            self._current_scen = scen
-            return
+            self._nodes.add_modification(constr, var, value)
 
-        var = data_line.first_name()
-        constr = data_line.second_name()
-        value = data_line.first_number()
+            if constr2 and not math.isnan(value2):
+                self._nodes.add_modification(constr2, var, value2)
 
-        assert self._current_scen is not None
-        self._current_scen.add_modification(constr, var, value)
+    def _process_distrib(self, lines: DataColumns):
+        fields = zip(lines.indicators,
+                     lines.first_names,
+                     lines.second_names,
+                     lines.first_numbers,
+                     lines.third_names,
+                     lines.second_numbers)
 
-        if data_line.has_third_name() and data_line.has_second_number():
-            constr = data_line.third_name()
-            value = data_line.second_number()
+        for indicator, var, constr, value, constr2, value2 in fields:
+            if indicator == "DS":  # new joint distribution
+                # For these lines, the fields hold the distribution name and
+                # period, respectively.
+                if var not in self._distribs:
+                    distrib = Distrib(var,
+                                      constr,
+                                      self._distrib_type,
+                                      self._distrib_modification)
+                    self._distribs[var] = distrib
 
-            self._current_scen.add_modification(constr, var, value)
+                self._current_distrib = self._distribs[var]
+                continue
 
-    def _process_nodes(self, data_line: DataLine):
-        raise NotImplementedError  # TODO maybe at some point in the future
+            assert self._current_distrib is not None
 
-    def _process_distrib(self, data_line: DataLine):
-        raise NotImplementedError  # TODO maybe at some point in the future
+            if indicator == "CV":  # parameter matrix entry
+                # For these lines, the name fields hold the (1-based)
+                # positions of the two elements.
+                self._current_distrib.add_matrix_entry(int(var) - 1,
+                                                       int(constr) - 1,
+                                                       value)
+                continue
+
+            self._current_distrib.add_entry(var, constr, value)
+
+            if constr2 and not math.isnan(value2):
+                self._current_distrib.add_entry(var, constr2, value2)
 
     def _transition(self, data_line):
+        if self._state == "SCENARIOS":  # the last scenario block has ended.
+            self._complete_scenario()
+
+        if self._state == "INDEP":  # the INDEP section has ended.
+            self._indep_sections[-1].finalise()
+
+        if self._state == "BLOCKS":  # the BLOCKS section has ended.
+            for block in self._blocks.values():
+                block.finalise()
+
+            self._current_block = None
+
+        if self._state == "DISTRIB":  # the DISTRIB section has ended.
+            for distrib in self._distribs.values():
+                distrib.finalise()
+
+            self._current_distrib = None
+
         res = super()._transition(data_line)
 
         if self._state == "STOCH" or self._state == "ENDATA":
@@ -83,9 +586,9 @@ class StochParser(Parser):
             # modification keywords.
             return res
 
-        if self._state == "SCENARIOS":
-            # For SCENARIOS, only DISCRETE and REPLACE are understood (and
-            # documented in the manual), so we can quit early here.
+        if self._state in {"SCENARIOS", "NODES"}:
+            # For SCENARIOS and NODES, only DISCRETE and REPLACE are understood
+            # (and documented in the manual), so we can quit early here.
             return True
 
         distr = data_line.second_name().upper()
@@ -102,9 +605,34 @@ class StochParser(Parser):
             raise ValueError(msg)
 
         if self._state == "INDEP":
-            self._indep_sections.append(Indep(distr, mod))
+            self._indep_sections.append(Indep(distr, mod, self._names))
+
+        if self._state == "BLOCKS":
+            if distr != "DISCRETE":
+                msg = f"BLOCKS of type {distr} are not understood."
+                logger.error(msg)
+                raise ValueError(msg)
+
+            if mod not in MODIFICATIONS:
+                msg = f"Modification {mod} is not understood."
+                logger.error(msg)
+                raise ValueError(msg)
+
+            self._block_modification = mod
+
+        if self._state == "DISTRIB":
+            if distr not in registered_distributions():
+                msg = f"DISTRIB of type {distr} is not understood."
+                logger.error(msg)
+                raise ValueError(msg)
+
+            if mod not in MODIFICATIONS:
+                msg = f"Modification {mod} is not understood."
+                logger.error(msg)
+                raise ValueError(msg)
 
-        # TODO make Block/Node?
+            self._distrib_type = distr
+            self._distrib_modification = mod
 
         return res
 
@@ -2,7 +2,7 @@ import logging
 import warnings
 from typing import List, Tuple
 
-from smps.classes import DataLine
+from smps.classes import DataColumns
 from .Parser import Parser
 
 logger = logging.getLogger(__name__)
@@ -11,14 +11,14 @@ logger = logging.getLogger(__name__)
 class TimeParser(Parser):
     _file_extensions = [".tim", ".TIM", ".time", ".TIME"]
     _steps = {
-        "TIME": lambda self, data_line: self._process_time(data_line),
-        "PERIODS": lambda self, data_line: self._process_periods(data_line),
-        "ROWS": lambda self, data_line: self._process_rows(data_line),
-        "COLUMNS": lambda self, data_line: self._process_columns(data_line),
+        "TIME": lambda self, lines: self._process_time(lines),
+        "PERIODS": lambda self, lines: self._process_periods(lines),
+        "ROWS": lambda self, lines: self._process_rows(lines),
+        "COLUMNS": lambda self, lines: self._process_columns(lines),
     }
 
-    def __init__(self, location):
-        super().__init__(location)
+    def __init__(self, location, free_format=None, names=None):
+        super().__init__(location, free_format, names)
 
         self._param = "IMPLICIT"
         self._stage_names: List[str] = []
@@ -81,39 +81,49 @@ class TimeParser(Parser):
         assert self._param in {"IMPLICIT", "EXPLICIT"}
         return self._param
 
-    def _process_time(self, data_line: DataLine):
-        if not data_line.has_second_header_word():
-            msg = "Time file has no value for the TIME field."
-            warnings.warn(msg)
-            logger.warning(msg)
-        else:
-            self._name = data_line.second_header_word()
-
-    def _process_periods(self, data_line: DataLine):
-        assert data_line.has_third_name()
-
-        period = data_line.third_name()
-        self._stage_names.append(period)
+    def _process_time(self, lines: DataColumns):
+        for data_line in lines:
+            if not data_line.has_second_header_word():
+                msg = "Time file has no value for the TIME field."
+                warnings.warn(msg)
+                logger.warning(msg)
+            else:
+                self._name = data_line.second_header_word()
 
+    def _process_periods(self, lines: DataColumns):
         if self._param == "IMPLICIT":
             # In the IMPLICIT formulation, the PERIODS section also contains
-            # the (var, constr) offsets of this stage's CORE data.
-            var = data_line.first_name()
-            constr = data_line.second_name()
-
-            self._stage_offsets.append((var, constr))
+            # the (var, constr) offsets of this stage's CORE data, and the
+            # period name is the third name.
+            periods = lines.third_names
+
+            for var, constr, period in zip(lines.first_names,
+                                           lines.second_names,
+                                           periods):
+                if not period:
+                    msg = f"Period with offset ({var}, {constr}) has no name."
+                    logger.error(msg)
+                    raise ValueError(msg)
+
+            offsets = zip(lines.first_names, lines.second_names)
+            self._stage_offsets.extend(offsets)
+        else:
+            # In the EXPLICIT formulation, only the period name is given. In
+            # free format, that is then the first (and only) name on the line.
+            periods = [third or first for first, third
+                       in zip(lines.first_names, lines.third_names)]
 
-    def _process_rows(self, data_line: DataLine):
-        constr = data_line.first_name()
-        period = data_line.second_name()
+            assert all(period != "" for period in periods)
 
-        self._explicit_constraints.append((constr, period))
+        self._stage_names.extend(periods)
 
-    def _process_columns(self, data_line: DataLine):
-        var = data_line.first_name()
-        period = data_line.second_name()
+    def _process_rows(self, lines: DataColumns):
+        constraints = zip(lines.first_names, lines.second_names)
+        self._explicit_constraints.extend(constraints)
 
-        self._explicit_variables.append((var, period))
+    def _process_columns(self, lines: DataColumns):
+        variables = zip(lines.first_names, lines.second_names)
+        self._explicit_variables.extend(variables)
 
     def _transition(self, data_line):
         res = super()._transition(data_line)
@@ -0,0 +1,138 @@
+import bz2
+import gzip
+import io
+import logging
+import lzma
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Size of the chunks in which compressed files are read and decompressed.
+_CHUNK_SIZE = 2 ** 20
+
+
+def _zstd_reader(fh: BinaryIO) -> BinaryIO:
+    try:  # Py3.14+ ships with zstd support in the standard library.
+        from compression import zstd  # type: ignore
+        return zstd.ZstdFile(fh)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        msg = "Reading zstd compressed data requires the zstandard package."
+        logger.error(msg)
+        raise ImportError(msg) from None
+
+    decompressor = zstandard.ZstdDecompressor()
+    reader = decompressor.stream_reader(fh,
+                                        read_size=_CHUNK_SIZE,
+                                        closefd=True)
+
+    # The stream reader does not support reading lines, so it is buffered.
+    return io.BufferedReader(reader, _CHUNK_SIZE)  # type: ignore
+
+
+def _open_zstd(path: Path) -> BinaryIO:
+    try:
+        from compression import zstd  # type: ignore
+        return zstd.open(path, "rb")
+    except ImportError:
+        pass
+
+    fh = open(str(path), "rb")
+
+    try:
+        return _zstd_reader(fh)
+    except ImportError:
+        fh.close()
+        raise
+
+
+# Functions that open a compressed file for (binary) reading, by the file
+# extension of each supported compression format. Each decompresses the file
+# as a stream, in chunks, while it is read.
+_OPENERS: Dict[str, Callable[[Path], BinaryIO]] = {
+    ".gz": lambda path: gzip.open(path, "rb"),  # type: ignore
+    ".bz2": lambda path: bz2.open(path, "rb"),  # type: ignore
+    ".xz": lambda path: lzma.open(path, "rb"),  # type: ignore
+    ".lzma": lambda path: lzma.open(path, "rb"),  # type: ignore
+    ".zst": _open_zstd,
+}
+
+# As above, but for compressed data in memory, by the magic bytes at the start
+# of the data of each supported compression format.
+_READERS: Dict[bytes, Callable[[BinaryIO], BinaryIO]] = {
+    b"\x1f\x8b": lambda fh: gzip.GzipFile(fileobj=fh),  # type: ignore
+    b"BZh": lambda fh: bz2.BZ2File(fh),  # type: ignore
+    b"\xfd7zXZ\x00": lambda fh: lzma.LZMAFile(fh),  # type: ignore
+    b"\x28\xb5\x2f\xfd": _zstd_reader,
+}
+
+COMPRESSION_EXTENSIONS: List[str] = list(_OPENERS.keys())
+
+
+def is_compressed(path: Path) -> bool:
+    """
+    Tests if the given file is compressed, based on its file extension.
+    """
+    return path.suffix.lower() in _OPENERS
+
+
+def is_compressed_buffer(buffer: Buffer) -> bool:
+    """
+    Tests if the given in-memory data is compressed, based on its first few
+    (magic) bytes.
+    """
+    return _compression_of(buffer) is not None
+
+
+def open_binary(path: Path) -> BinaryIO:
+    """
+    Opens the given file for reading bytes. Compressed files are decompressed
+    while they are read.
+    """
+    if is_compressed(path):
+        logger.debug(f"Decompressing {path} while reading.")
+        return _OPENERS[path.suffix.lower()](path)
+
+    return open(str(path), "rb")
+
+
+def open_buffer(buffer: Buffer) -> BinaryIO:
+    """
+    Opens the given in-memory data for reading bytes. Compressed data is
+    decompressed while it is read.
+    """
+    fh = io.BytesIO(buffer)
+    magic = _compression_of(buffer)
+
+    if magic is not None:
+        logger.debug("Decompressing in-memory data while reading.")
+        return _READERS[magic](fh)
+
+    return fh
+
+
+def open_text(path: Path) -> TextIO:
+    """
+    Opens the given file for reading text. See ``open_binary``.
+    """
+    if is_compressed(path):
+        return io.TextIOWrapper(open_binary(path))
+
+    return open(str(path))
+
+
+def _compression_of(buffer: Buffer) -> Optional[bytes]:
+    header = bytes(memoryview(buffer)[:6])
+
+    for magic in _READERS:
+        if header.startswith(magic):
+            return magic
+
+    return None
@@ -242,4 +242,24 @@ def test_raises_unknown_bound_type():
     with assert_raises(ValueError):
         parser.parse()
 
+
+def test_batch_size_does_not_change_result():
+    """
+    Data lines are processed in batches. Tests if the parsed result does not
+    depend on the size of these batches, even when a batch ends halfway a
+    section.
+    """
+    parser = CoreParser("data/electric/LandS.cor")
+    parser.parse()
+
+    small = CoreParser("data/electric/LandS.cor")
+    small._batch_size = 1
+    small.parse()
+
+    assert_equal(small.constraint_names, parser.constraint_names)
+    assert_equal(small.variable_names, parser.variable_names)
+    assert_almost_equal(small.rhs, parser.rhs)
+    assert_almost_equal(small.coefficients.toarray(),
+                        parser.coefficients.toarray())
+
 # TODO
@@ -1,9 +1,15 @@
+import gzip
+import io
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import pytest
-from numpy.testing import (assert_almost_equal, assert_equal,
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
                            assert_raises, assert_warns)
 
 from smps.classes import Scenario
 from smps.parsers import StochParser
+from smps.parsers.StochParser import _split_scenarios
 
 
 def _compare_scenarios(actual: Scenario, desired: Scenario):
@@ -47,8 +53,7 @@ def test_warns_raises_missing_stochasticity_parameter():
 
 @pytest.mark.parametrize('file', ['stoch_unknown_modification_type',
                                   'stoch_unknown_distribution_type',
-                                  # 'stoch_blocks_unknown_transformation_type'
-                                  ])
+                                  'stoch_blocks_unknown_transformation_type'])
 def test_raises_unknown_header_keywords(file):
     """
     Tests if parsing various files raises a ValueError, due to strange header
@@ -61,7 +66,6 @@ def test_raises_unknown_header_keywords(file):
         parser.parse()
 
 
-@pytest.mark.usefixtures("clear_scenarios")
 def test_parses_scenarios_sizes3():
     """
     Tests if the scenarios of the small sizes3.sto are parsed correctly.
@@ -87,7 +91,6 @@ def test_parses_scenarios_sizes3():
     _compare_scenarios(parser.scenarios[0], desired)
 
 
-@pytest.mark.usefixtures("clear_scenarios")
 def test_parses_scenarios_small_instance():
     """
     Tests if the parser correctly reads the scenarios of a small test instance.
@@ -102,8 +105,8 @@ def test_parses_scenarios_small_instance():
     #     X1        C1        5
     first = Scenario("SCEN01", "ROOT", "STAGE-2", 0.333333)
     first.add_modification("C1", "RHS", 1)
-    first.add_modification("C2", "RHS", 5.001)
-    first.add_modification("C1", "RHS", 5)
+    first.add_modification("C2", "RHS", 5.0001)
+    first.add_modification("C1", "X1", 5)
 
     _compare_scenarios(parser.scenarios[0], first)
 
@@ -112,9 +115,433 @@ def test_parses_scenarios_small_instance():
     #     X2        C2        7
     second = Scenario("SCEN02", "SCEN01", "STAGE-3", 0.666667)
     second.add_modification("C1", "RHS", 8)
-    second.add_modification("C1", "X2", 7)
+    second.add_modification("C2", "X2", 7)
 
     _compare_scenarios(parser.scenarios[1], second)
 
+
+def test_parses_scenarios_mmap():
+    """
+    Tests if reading the scenarios through a memory map gives the same result
+    as regular reading.
+    """
+    parser = StochParser("data/test/stoch_small_scenarios_problem.sto")
+    parser.parse()
+
+    expected = parser.scenarios
+
+    parser = StochParser("data/test/stoch_small_scenarios_problem.sto")
+    parser.parse(mmap=True)
+
+    assert_equal(parser.name, "Test")
+    assert_equal(len(parser.scenarios), len(expected))
+
+    for actual, desired in zip(parser.scenarios, expected):
+        _compare_scenarios(actual, desired)
+
+
+def test_scenarios_are_isolated_between_parsers():
+    """
+    Each parser owns its scenarios, so parsing different files (or the same
+    file twice) should not mix them.
+    """
+    first = StochParser("data/sizes/sizes3")
+    first.parse()
+
+    second = StochParser("data/test/stoch_small_scenarios_problem.sto")
+    second.parse()
+
+    assert_equal(len(first.scenarios), 3)
+    assert_equal(len(second.scenarios), 2)
+
+    assert_equal(second.scenarios[1].parent_index, 0)
+    assert_(second.scenarios[1].parent is second.scenarios[0])
+
+    again = StochParser("data/sizes/sizes3")
+    again.parse()
+
+    assert_equal(len(first.scenarios), 3)
+    assert_equal(len(again.scenarios), 3)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_parses_compressed(tmp_path, mmap):
+    """
+    Tests if a compressed STOCH file is found without its extensions, and
+    gives the same result as the uncompressed file.
+    """
+    parser = StochParser("data/test/stoch_small_scenarios_problem")
+    parser.parse()
+
+    source = parser.file_location()
+    file = tmp_path / (source.name + ".gz")
+    file.write_bytes(gzip.compress(source.read_bytes()))
+
+    compressed = StochParser(tmp_path / source.stem)
+    compressed.parse(mmap=mmap)
+
+    assert_equal(compressed.file_location(), file)
+    assert_(compressed.is_compressed())
+    assert_equal(compressed.name, parser.name)
+    assert_equal(len(compressed.scenarios), len(parser.scenarios))
+
+    for actual, desired in zip(compressed.scenarios, parser.scenarios):
+        _compare_scenarios(actual, desired)
+
+
+def test_compressed_parses_with_single_worker(tmp_path):
+    source = Path("data/sizes/sizes3.sto")
+    file = tmp_path / "sizes3.sto.gz"
+    file.write_bytes(gzip.compress(source.read_bytes()))
+
+    parser = StochParser(file)
+
+    with assert_warns(UserWarning):
+        parser.parse(workers=2)
+
+    assert_equal(len(parser.scenarios), 3)
+
+
+@pytest.mark.parametrize("wrap", [bytes,
+                                  memoryview,
+                                  gzip.compress,
+                                  io.BytesIO])
+def test_parses_in_memory(wrap):
+    """
+    Tests if the contents of a STOCH file in memory (possibly compressed), or
+    a file-like object, give the same result as parsing the file itself.
+    """
+    parser = StochParser("data/test/stoch_small_scenarios_problem")
+    parser.parse()
+
+    data = parser.file_location().read_bytes()
+    in_memory = StochParser(wrap(data))
+    in_memory.parse()
+
+    assert_(in_memory.is_in_memory())
+    assert_(in_memory.file_location() is None)
+    assert_equal(in_memory.name, parser.name)
+    assert_equal(len(in_memory.scenarios), len(parser.scenarios))
+
+    for actual, desired in zip(in_memory.scenarios, parser.scenarios):
+        _compare_scenarios(actual, desired)
+
+
+def test_raises_in_memory_parsed_twice():
+    parser = StochParser(Path("data/sizes/sizes3.sto").read_bytes())
+    parser.parse()
+
+    with assert_raises(ValueError):
+        parser.parse()
+
+
+def test_load_reads_file_into_memory():
+    """
+    A loaded parser should parse from memory, while keeping its location.
+    """
+    parser = StochParser("data/sizes/sizes3")
+    parser.load()
+
+    assert_(parser.is_in_memory())
+    assert_equal(parser.file_location(), Path("data/sizes/sizes3.sto"))
+
+    parser.parse()
+    assert_(not parser.is_in_memory())
+    assert_equal(len(parser.scenarios), 3)
+
+
+def test_in_memory_parallel_same_as_sequential():
+    data = Path("data/sslp/sslp_10_50_100.sto").read_bytes()
+
+    parser = StochParser(data)
+    parser.parse()
+
+    par_parser = StochParser(memoryview(data))
+    par_parser.parse(workers=2)
+
+    assert_equal(len(par_parser.scenarios), len(parser.scenarios))
+
+    for actual, desired in zip(par_parser.scenarios, parser.scenarios):
+        _compare_scenarios(actual, desired)
+
+
+def test_raises_workers_not_positive():
+    parser = StochParser("data/sizes/sizes3")
+
+    with assert_raises(ValueError):
+        parser.parse(workers=0)
+
+
+@pytest.mark.parametrize("location", ["data/sizes/sizes3",
+                                      "data/sslp/sslp_10_50_100",
+                                      "data/test/scenarios_realization"])
+def test_parallel_same_as_sequential(location):
+    """
+    Tests if parsing the SCENARIOS in parallel chunks gives the same scenarios,
+    in the same order and with the same parents, as sequential parsing.
+    """
+    parser = StochParser(location)
+    parser.parse()
+
+    par_parser = StochParser(location)
+    par_parser.parse(workers=2)
+
+    assert_equal(par_parser.name, parser.name)
+    assert_equal(len(par_parser.scenarios), len(parser.scenarios))
+
+    for actual, desired in zip(par_parser.scenarios, parser.scenarios):
+        _compare_scenarios(actual, desired)
+
+        assert_equal(len(actual.modifications), len(desired.modifications))
+        assert_equal(actual.parent_index, desired.parent_index)
+
+
+def test_parallel_in_shared_executor():
+    """
+    Scenario chunks can be parsed in a process pool that is also used for
+    other work, rather than in a pool of their own.
+    """
+    parser = StochParser("data/sslp/sslp_10_50_100")
+    parser.parse()
+
+    par_parser = StochParser("data/sslp/sslp_10_50_100")
+
+    with ProcessPoolExecutor(2) as executor:
+        par_parser.parse(workers=2, executor=executor)
+
+    assert_equal(len(par_parser.scenarios), len(parser.scenarios))
+
+    for actual, desired in zip(par_parser.scenarios, parser.scenarios):
+        _compare_scenarios(actual, desired)
+
+
+def test_split_scenarios_at_sc_lines():
+    """
+    The SCENARIOS data should be split into chunks that each start at an SC
+    line, while all other lines are kept for sequential parsing.
+    """
+    with open("data/test/stoch_small_scenarios_problem.sto", "rb") as fh:
+        data = fh.read()
+
+    lines, chunks = _split_scenarios(data, 10)
+
+    # There are two scenarios, so there cannot be more than two chunks.
+    assert_equal(len(chunks), 2)
+
+    for start, end in chunks:
+        assert_(data[start:end].startswith(b" SC "))
+
+    headers = [line.split()[0] for line in lines if line[:1] not in b" *"]
+    assert_equal(headers, [b"STOCH", b"SCENARIOS", b"ENDATA"])
+
+
+@pytest.mark.parametrize("indent", [b"\t", b"   ", b" \t"])
+def test_split_scenarios_at_free_format_sc_lines(indent):
+    """
+    In free format, SC lines may be indented by any white space. The data
+    should still be split at these lines.
+    """
+    scenarios = b"".join(indent + b"SC SCEN" + str(idx).encode()
+                         + b" ROOT 0.25 STAGE-2\n"
+                         + indent + b"RHS C1 " + str(idx).encode() + b"\n"
+                         for idx in range(4))
+
+    data = b"STOCH TEST\nSCENARIOS DISCRETE\n" + scenarios + b"ENDATA\n"
+    _, chunks = _split_scenarios(data, 10, free_format=True)
+
+    # There are four scenarios, so there cannot be more than four chunks.
+    assert_equal(len(chunks), 4)
+
+    for start, end in chunks:
+        assert_(data[start:end].startswith(indent + b"SC "))
+
+
+def test_split_scenarios_not_at_fixed_format_variable_sc():
+    """
+    In fixed format, a variable named SC starts in column 5. The data should
+    not be split at lines with such a variable, as these are not SC lines.
+    """
+    scenarios = b"".join(b" SC SCEN" + str(idx).encode()
+                         + b"     ROOT      0.25           STAGE-2\n"
+                         + b"    SC        C1        " + str(idx).encode()
+                         + b"\n" for idx in range(4))
+
+    data = b"STOCH TEST\nSCENARIOS DISCRETE\n" + scenarios + b"ENDATA\n"
+    _, chunks = _split_scenarios(data, 10)
+
+    assert_equal(len(chunks), 4)
+
+    for start, end in chunks:
+        assert_(data[start:end].startswith(b" SC SCEN"))
+
+
+def test_parallel_parse_variable_sc(tmp_path):
+    """
+    Scenarios that modify a variable named SC should be parsed in parallel
+    just as they are sequentially.
+    """
+    lines = ["STOCH         TEST", "SCENARIOS     DISCRETE"]
+
+    for idx in range(8):
+        lines.append(f" SC SCEN{idx}     ROOT      0.125          STAGE-2")
+        lines.append(f"    SC        C1        {idx + 1}")
+        lines.append(f"    RHS       C2        {idx + 2}")
+
+    lines.append("ENDATA")
+
+    location = tmp_path / "variable_sc.sto"
+    location.write_text("\n".join(lines) + "\n")
+
+    parser = StochParser(location)
+    parser.parse()
+
+    par_parser = StochParser(location)
+    par_parser.parse(workers=2)
+
+    assert_equal(len(par_parser.scenarios), 8)
+
+    for actual, desired in zip(par_parser.scenarios, parser.scenarios):
+        _compare_scenarios(actual, desired)
+
+    assert_equal(parser.scenarios[3].modifications,
+                 [("C1", "SC", 4.), ("C2", "RHS", 5.)])
+
+
+def test_parses_multiple_indep_sections():
+    """
+    Tests if INDEP sections that directly follow each other are parsed as
+    separate sections, and if discrete sections are finalised once they end.
+    """
+    parser = StochParser("data/test/stoch_multiple_indep")
+    parser.parse()
+
+    assert_equal(len(parser.indep_sections), 2)
+
+    discrete, normal = parser.indep_sections
+    assert_equal(discrete.distribution, "DISCRETE")
+    assert_equal(normal.distribution, "NORMAL")
+
+    assert_(discrete._arrays is not None)
+
+    distr = discrete.get_for("RHS", "DEMAND1")
+    assert_almost_equal(distr.xk, [3, 5])
+    assert_almost_equal(distr.pk, [0.6, 0.4])
+
+    assert_almost_equal(normal.get_for("RHS", "DEMAND2").mean(), 7)
+
+
+def test_parses_blocks():
+    """
+    Tests if a BLOCKS section is parsed correctly, including a realisation
+    that does not list all elements of its block.
+    """
+    parser = StochParser("data/test/blocks")
+    parser.parse()
+
+    assert_equal(len(parser.blocks), 2)
+
+    first, second = parser.blocks
+    assert_equal(first.name, "BLOCK1")
+    assert_equal(first.period, "STAGE-2")
+    assert_equal(first.elements, [("RHS", "C2"), ("RHS", "C3")])
+    assert_almost_equal(first.probabilities, [0.5, 0.25, 0.25])
+    assert_almost_equal(first.values, [[21, 31], [22, 31], [23, 33]])
+
+    assert_equal(second.elements, [("X2", "C3")])
+    assert_almost_equal(second.probabilities, [0.4, 0.6])
+    assert_almost_equal(second.values, [[4.5], [5.5]])
+
+
+def test_parses_distrib():
+    """
+    Tests if a DISTRIB section is parsed into joint distributions, with a
+    symmetric covariance matrix.
+    """
+    parser = StochParser("data/test/distrib")
+    parser.parse()
+
+    assert_equal(len(parser.distribs), 2)
+
+    first, second = parser.distribs
+    assert_equal(first.name, "DEMAND")
+    assert_equal(first.period, "STAGE-2")
+    assert_equal(first.distribution, "MVNORMAL")
+    assert_equal(first.modification, "REPLACE")
+    assert_equal(first.elements, [("RHS", "C2"), ("RHS", "C3")])
+    assert_almost_equal(first.parameters, [10, 20])
+    assert_almost_equal(first.matrix, [[4, 3], [3, 9]])
+
+    assert_equal(second.elements, [("X2", "OBJ")])
+    assert_almost_equal(second.matrix, [[1]])
+
+
+def test_parses_nodes():
+    """
+    Tests if a NODES section is parsed into a flat node tree.
+    """
+    parser = StochParser("data/test/stoch_nodes")
+    parser.parse()
+
+    tree = parser.node_tree
+
+    assert_equal(len(tree), 7)
+    assert_equal(tree.names, ["ROOTND", "N1", "N2", "N11", "N12", "N21",
+                              "N22"])
+    assert_equal(tree.parents, [-1, 0, 0, 1, 1, 2, 2])
+    assert_equal(tree.stages, [0, 1, 1, 2, 2, 2, 2])
+    assert_almost_equal(tree.probabilities,
+                        [1, 0.4, 0.6, 0.2, 0.2, 0.18, 0.42])
+
+    assert_equal(tree.modifications(2), [("C2", "RHS", 22),
+                                         ("C3", "RHS", 32)])
+    assert_equal(tree.modifications(3), [("C3", "X3", 5.5)])
+    assert_equal(tree.modifications(4), [])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scenarios_share_parser_name_table(workers):
+    """
+    All scenarios should use the parser's name table, also when they have been
+    parsed in worker processes, so that equal names are stored only once.
+    """
+    parser = StochParser("data/sslp/sslp_10_50_100")
+    parser.parse(workers=workers)
+
+    names = parser.name_table
+    assert_(parser.scenario_tree.names is names)
+
+    for scenario in parser.scenarios:
+        assert_(scenario.name_table is names)
+
+    first, second = parser.scenarios[:2]
+    assert_(first.modifications[0].variable
+            is second.modifications[0].variable)
+
+
+@pytest.mark.parametrize("location", ["data/test/realize",
+                                      "data/test/stoch_nodes"])
+def test_section_names_are_interned(location):
+    """
+    The names stored by the INDEP, BLOCKS and NODES sections should be the
+    strings interned in the parser's name table.
+    """
+    parser = StochParser(location)
+    parser.parse()
+
+    names = parser.name_table
+    elements = [element
+                for source in [*parser.indep_sections, *parser.blocks]
+                for element in source.elements]
+
+    for var, constr in elements:
+        assert_(names.intern(var) is var)
+        assert_(names.intern(constr) is constr)
+
+    node_tree = parser.node_tree
+
+    for name in [*node_tree.modification_variables,
+                 *node_tree.modification_constraints]:
+        assert_(names.intern(name) is name)
+
 # TODO
 # TODO test BLOCKS + LINTRAN/LINTR
@@ -33,6 +33,13 @@ def test_ignores_data_beyond_endata():
     assert_equal(parser.time_type, "IMPLICIT")
 
 
+def test_raises_missing_implicit_period_name():
+    parser = TimeParser("data/test/time_missing_period_name")
+
+    with assert_raises(ValueError):
+        parser.parse()
+
+
 def test_lands():
     """
     Tests if the LandS time file is parsed correctly.
@@ -94,3 +101,24 @@ def test_small_explicit_time_file():
     assert_equal(parser.explicit_variables, expected)
 
     assert_equal(parser.stage_names, ["PERIOD1", "PERIOD2"])
+
+
+def test_free_format_explicit_time_file():
+    """
+    Tests if the free format version of the small explicit time file is
+    detected, and gives the same result.
+    """
+    parser = TimeParser("data/test/time_small_explicit_problem")
+    parser.parse()
+
+    free = TimeParser("data/test/time_free_format_explicit")
+    free.parse()
+
+    assert_equal(free.free_format, True)
+    assert_equal(parser.free_format, False)
+
+    assert_equal(free.name, parser.name)
+    assert_equal(free.time_type, "EXPLICIT")
+    assert_equal(free.stage_names, parser.stage_names)
+    assert_equal(free.explicit_constraints, parser.explicit_constraints)
+    assert_equal(free.explicit_variables, parser.explicit_variables)
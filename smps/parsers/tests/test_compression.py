@@ -0,0 +1,59 @@
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+from typing import Callable, Dict
+
+import pytest
+from numpy.testing import assert_, assert_equal
+
+from smps.parsers.compression import is_compressed, open_binary, open_text
+
+_SOURCE = Path("data/test/stoch_small_scenarios_problem.sto")
+
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    ".gz": gzip.compress,
+    ".bz2": bz2.compress,
+    ".xz": lzma.compress,
+}
+
+
+def _compress(tmp_path: Path, extension: str) -> Path:
+    file = tmp_path / (_SOURCE.name + extension)
+    file.write_bytes(_COMPRESSORS[extension](_SOURCE.read_bytes()))
+
+    return file
+
+
+def test_is_compressed():
+    assert_(not is_compressed(_SOURCE))
+
+    for extension in [".gz", ".bz2", ".xz", ".lzma", ".zst", ".GZ"]:
+        assert_(is_compressed(Path("file.sto" + extension)))
+
+
+@pytest.mark.parametrize("extension", [".gz", ".bz2", ".xz"])
+def test_open_decompresses(tmp_path, extension):
+    file = _compress(tmp_path, extension)
+
+    with open_binary(file) as fh:
+        assert_equal(fh.read(), _SOURCE.read_bytes())
+
+    with open_text(file) as fh, open(str(_SOURCE)) as expected:
+        assert_equal(list(fh), list(expected))
+
+
+def test_open_uncompressed():
+    with open_binary(_SOURCE) as fh:
+        assert_equal(fh.read(), _SOURCE.read_bytes())
+
+
+def test_open_zstd(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+
+    file = tmp_path / (_SOURCE.name + ".zst")
+    compressor = zstandard.ZstdCompressor()
+    file.write_bytes(compressor.compress(_SOURCE.read_bytes()))
+
+    with open_text(file) as fh, open(str(_SOURCE)) as expected:
+        assert_equal(list(fh), list(expected))
@@ -1,21 +1,40 @@
 import logging
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
+from smps import aio, cache
 from smps.parsers import MpsParser
+from smps.parsers.Parser import Source, _read_stream
 from .MpsResult import MpsResult
 
 logger = logging.getLogger(__name__)
 
 
-def read_mps(location: Union[str, Path]) -> MpsResult:
+def read_mps(location: Source,
+             mmap: bool = False,
+             cache_dir: Optional[Union[str, Path]] = None) -> MpsResult:
     """
     Parses an MPS file.
 
     Parameters
     ----------
-    location : Union[str, Path]
-        File-system location(s) of the MPS file to parse.
+    location : Source
+        File-system location of the MPS file to parse. This may also be the
+        contents of the file in memory (bytes, bytearray or memoryview), or a
+        (binary or text) file-like object, which is then parsed without
+        touching the file-system. File-like objects are read into memory
+        first when caching.
+    mmap : bool
+        When True, the file is read through a memory map, which keeps memory
+        use low for very large files. Default False.
+    cache_dir : Optional[Union[str, Path]]
+        When given, the parsed result is stored in this directory, keyed by
+        the contents of the MPS file, and the version of the parser. A later
+        call on an unchanged file loads the stored result, rather than parsing
+        the file again. Stored results are unpickled, which can execute
+        arbitrary code: never use a directory that others can write to.
+        Default None (no caching).
 
     Returns
     -------
@@ -35,9 +54,80 @@ def read_mps(location: Union[str, Path]) -> MpsResult:
       a brief overview of various parts of the other SMPS file. Furthermore,
       we use Gassmann's extensive notes here: http://tiny.cc/b87ysz.
     """
-    logger.debug(f"Parsing MPS file at {location}")
+    if cache_dir is not None:
+        location = _read_stream(location)
 
     mps = MpsParser(location)
-    mps.parse()
+    logger.debug(f"Parsing MPS file at {mps.file_location() or 'memory'}.")
 
-    return MpsResult(mps)
+    if cache_dir is not None:
+        key = cache.cache_key(mps.file_location() or location)  # type: ignore
+        result = cache.load(cache_dir, key)
+
+        if result is not None:
+            logger.debug(f"Loaded MPS file from cache {cache_dir}.")
+            return result
+
+    mps.parse(mmap)
+    result = MpsResult(mps)
+
+    if cache_dir is not None:
+        cache.store(cache_dir, key, result)
+
+    return result
+
+
+async def aread_mps(location: Source,
+                    cache_dir: Optional[Union[str, Path]] = None,
+                    executor: Optional[Executor] = None,
+                    chunked: bool = False) -> MpsResult:
+    """
+    Asynchronously reads an MPS file, without blocking the event loop. The
+    file is read into memory in the loop's default executor, after which it is
+    parsed in the given executor. See ``read_mps`` for details.
+
+    Parameters
+    ----------
+    location : Source
+        File-system location of the MPS file to parse, or its contents. See
+        ``read_mps``.
+    cache_dir : Optional[Union[str, Path]]
+        Directory in which parsed files are cached. See ``read_mps``, and note
+        that its entries are unpickled. Default None (no caching).
+    executor : Optional[Executor]
+        Executor in which the file is parsed. Default None, which uses the
+        loop's default (thread pool) executor.
+    chunked : bool
+        When True, the file is processed in batches of data lines, and control
+        returns to the event loop between batches. Requires a thread pool
+        executor. Default False.
+
+    Returns
+    -------
+    MpsResult
+        The parsed MPS file.
+
+    Raises
+    ------
+    FileNotFoundError
+        When the MPS file does not exist.
+    ValueError
+        When parsing chunked in a process pool executor.
+    """
+    mps = await aio.open_parser(MpsParser, location)
+
+    if cache_dir is not None:
+        key = await aio.run(None, cache.cache_key, mps._buffer)
+        result = await aio.run(None, cache.load, cache_dir, key)
+
+        if result is not None:
+            logger.debug(f"Loaded MPS file from cache {cache_dir}.")
+            return result
+
+    mps = await aio.parse(mps, executor, chunked)
+    result = MpsResult(mps)
+
+    if cache_dir is not None:
+        await aio.run(None, cache.store, cache_dir, key, result)
+
+    return result
@@ -1,28 +1,85 @@
+import asyncio
 import logging
 import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Union
+from typing import List, Optional, TypeVar, Union
 
+from smps import aio, cache
+from smps.classes import NameTable
 from smps.parsers import CoreParser, StochParser, TimeParser
+from smps.parsers.Parser import Parser, Source, _describe, _read_stream
+from smps.parsers.compression import Buffer
 from .SmpsResult import SmpsResult
 
 logger = logging.getLogger(__name__)
 
+P = TypeVar("P", bound=Parser)
 
-def read_smps(*locations: Union[str, Path]) -> SmpsResult:
+
+def _parse(parser: P, mmap: bool) -> P:
+    parser.parse(mmap)
+    return parser
+
+
+def _contents(parser: Parser) -> Union[Path, Buffer]:
+    """
+    Returns the location of the file the parser processes, or, when parsing
+    from memory, its contents. File-like objects must have been read first.
+    """
+    location = parser.file_location()
+
+    if location is not None:
+        return location
+
+    assert parser._buffer is not None
+    return parser._buffer
+
+
+def read_smps(*locations: Source,
+              mmap: bool = False,
+              cache_dir: Optional[Union[str, Path]] = None,
+              workers: int = 1,
+              memo_size: Optional[int] = 1024) -> SmpsResult:
     """
     Parses a triplet of SMPS files.
 
     Parameters
     ----------
-    *locations : Union[str, Path]
+    *locations : Source
         File-system location(s) of the SMPS triplet of files. If only a single
         string is passed, it is assumed this identifies all three files (with
         extensions .cor or .core for the CORE file, .tim or .time for the
         TIME file, and .sto or .stoch for the STOCH file). If (more than) three
         locations are passed, it is assumed the first identifies the CORE file,
         the second the TIME file, and the third the STOCH file. Any remaining
-        arguments are ignored.
+        arguments are ignored. Each of these three may also be the contents of
+        the file in memory (bytes, bytearray or memoryview), or a binary
+        file-like object, which is then parsed without touching the
+        file-system. File-like objects are read into memory first when
+        caching, or when parsing with more than one worker.
+    mmap : bool
+        When True, the files are read through memory maps, which keeps memory
+        use low for very large (e.g., STOCH) files. Default False.
+    cache_dir : Optional[Union[str, Path]]
+        When given, the parsed result is stored in this directory, keyed by
+        the contents of the CORE, TIME, and STOCH files, and the version of
+        the parsers. A later call on unchanged files loads the stored result,
+        rather than parsing the files again. Stored results are unpickled,
+        which can execute arbitrary code: never use a directory that others
+        can write to. Default None (no caching).
+    workers : int
+        Number of worker processes. When larger than one, a single process
+        pool of this size is started. The CORE and TIME files are parsed in
+        this pool, while the STOCH file is parsed concurrently in this
+        process. The SCENARIOS section(s) of the STOCH file are split into
+        chunks that are parsed in the same pool, see ``StochParser.parse``.
+        At most ``workers`` processes are thus used besides this one. Default
+        1 (the files are parsed one after another, in this process).
+    memo_size : Optional[int]
+        Number of (most recently used) resolved modification lists memoised
+        by ``Scenario.modifications_from_root``, see ``ScenarioTree``. When
+        None, the memo is unbounded. Default 1024.
 
     Returns
     -------
@@ -35,7 +92,9 @@ def read_smps(*locations: Union[str, Path]) -> SmpsResult:
     FileNotFoundError
         When one of the CORE, TIME, or STOCH files does not exist.
     ValueError
-        When a number of locations other than 1 or 3(+) is received.
+        When a number of locations other than 1 or 3(+) is received, when a
+        single location is not a file-system location, or when the number of
+        workers is not positive.
 
     References
     ----------
@@ -48,32 +107,164 @@ def read_smps(*locations: Union[str, Path]) -> SmpsResult:
       a brief overview of various parts of the other SMPS file. Furthermore,
       we use Gassmann's extensive notes here: http://tiny.cc/b87ysz.
     """
-    logger.debug(f"Parsing an SMPS triplet at locations {locations}.")
+    sources = _sources(locations)
 
-    if len(locations) == 1:
-        location = Path(locations[0])
-
-        core_location = location
-        time_location = location
-        stoch_location = location
-    elif len(locations) >= 3:
-        core_location = Path(locations[0])
-        time_location = Path(locations[1])
-        stoch_location = Path(locations[2])
-    else:
-        msg = f"Received {len(locations)} locations, expected 1 or 3."
+    if workers < 1:
+        msg = f"Cannot parse with {workers} workers."
         logger.error(msg)
         raise ValueError(msg)
 
-    core = CoreParser(core_location)
-    core.parse()
+    if cache_dir is not None or workers > 1:
+        sources = [_read_stream(source) for source in sources]
+
+    # The names of the triplet are interned in a single table. Parsers that
+    # are sent to worker processes return with a copy of this table.
+    names = NameTable()
+
+    core = CoreParser(sources[0], names=names)
+    time = TimeParser(sources[1], names=names)
+    stoch = StochParser(sources[2], memo_size=memo_size, names=names)
+
+    if cache_dir is not None:
+        key = cache.cache_key(*[_contents(parser)
+                                for parser in (core, time, stoch)])
+
+        result = cache.load(cache_dir, key)
+
+        if result is not None:
+            logger.debug(f"Loaded SMPS triplet from cache {cache_dir}.")
+            return result
+
+    if workers > 1:
+        # Parsing is CPU-bound, so threads would not help here. The parsers
+        # are sent to the worker processes, and returned with their data.
+        with ProcessPoolExecutor(workers) as executor:
+            core_future = executor.submit(_parse, core, mmap)
+            time_future = executor.submit(_parse, time, mmap)
+
+            stoch.parse(mmap, workers, executor)
+            core, time = core_future.result(), time_future.result()
+    else:
+        core.parse(mmap)
+        time.parse(mmap)
+        stoch.parse(mmap)
+
+    result = _result(core, time, stoch)
+
+    if cache_dir is not None:
+        cache.store(cache_dir, key, result)
+
+    return result
+
+
+async def aread_smps(*locations: Source,
+                     cache_dir: Optional[Union[str, Path]] = None,
+                     executor: Optional[Executor] = None,
+                     chunked: bool = False,
+                     memo_size: Optional[int] = 1024) -> SmpsResult:
+    """
+    Asynchronously reads an SMPS triplet, without blocking the event loop. The
+    files are read into memory in the loop's default executor, after which the
+    CORE, TIME, and STOCH data are processed concurrently in the given
+    executor. See ``read_smps`` for details.
+
+    Parameters
+    ----------
+    *locations : Source
+        File-system location(s) of the SMPS triplet of files, or their
+        contents. See ``read_smps``.
+    cache_dir : Optional[Union[str, Path]]
+        Directory in which parsed triplets are cached. See ``read_smps``, and
+        note that its entries are unpickled. Default None (no caching).
+    executor : Optional[Executor]
+        Executor in which the files are parsed. When this is a process pool,
+        the files are parsed in parallel in other processes. Default None,
+        which uses the loop's default (thread pool) executor.
+    chunked : bool
+        When True, the files are processed in batches of data lines, and
+        control returns to the event loop between batches. This keeps a
+        single large (e.g., STOCH) file from holding up a shared executor,
+        and allows cancelling the parse while it runs. Requires a thread
+        pool executor. Default False.
+    memo_size : Optional[int]
+        Number of resolved modification lists memoised by the scenario tree.
+        See ``read_smps``. Default 1024.
+
+    Returns
+    -------
+    SmpsResult
+        The parsed SMPS triplet.
+
+    Raises
+    ------
+    FileNotFoundError
+        When one of the CORE, TIME, or STOCH files does not exist.
+    ValueError
+        When a number of locations other than 1 or 3(+) is received, when a
+        single location is not a file-system location, or when parsing
+        chunked in a process pool executor.
+    """
+    sources = _sources(locations)
+    names = NameTable()  # see read_smps.
+
+    core, time, stoch = await asyncio.gather(
+        aio.open_parser(CoreParser, sources[0], names=names),
+        aio.open_parser(TimeParser, sources[1], names=names),
+        aio.open_parser(StochParser, sources[2], memo_size=memo_size,
+                        names=names))
+
+    if cache_dir is not None:
+        # The parsers have loaded their files, so these can be hashed from
+        # memory, which gives the same key as hashing the files.
+        key = await aio.run(None, cache.cache_key, core._buffer, time._buffer,
+                            stoch._buffer)
+
+        result = await aio.run(None, cache.load, cache_dir, key)
+
+        if result is not None:
+            logger.debug(f"Loaded SMPS triplet from cache {cache_dir}.")
+            return result
+
+    core, time, stoch = await asyncio.gather(
+        aio.parse(core, executor, chunked),
+        aio.parse(time, executor, chunked),
+        aio.parse(stoch, executor, chunked))
+
+    result = _result(core, time, stoch)
+
+    if cache_dir is not None:
+        await aio.run(None, cache.store, cache_dir, key, result)
+
+    return result
+
+
+def _sources(locations) -> List[Source]:
+    """
+    Returns the sources of the CORE, TIME, and STOCH files, in that order. See
+    ``read_smps``.
+    """
+    described = ", ".join(_describe(location) for location in locations)
+    logger.debug(f"Parsing an SMPS triplet at locations {described}.")
+
+    if len(locations) == 1:
+        if not isinstance(locations[0], (str, Path)):
+            msg = "A single location should be a file-system location."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        return [locations[0]] * 3
+
+    if len(locations) >= 3:
+        return list(locations[:3])
 
-    time = TimeParser(time_location)
-    time.parse()
+    msg = f"Received {len(locations)} locations, expected 1 or 3."
+    logger.error(msg)
+    raise ValueError(msg)
 
-    stoch = StochParser(stoch_location)
-    stoch.parse()
 
+def _result(core: CoreParser,
+            time: TimeParser,
+            stoch: StochParser) -> SmpsResult:
     if len({core.name, time.name, stoch.name}) != 1:
         msg = "The names in the CORE, TIME, and STOCH files do not agree."
         logger.warning(msg)
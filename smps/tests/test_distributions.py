@@ -0,0 +1,94 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from smps import aio, register_distribution
+from smps.classes import Distrib
+from smps.distributions import get_sampler, registered_distributions
+from smps.parsers import StochParser
+
+
+def _constant(rng, parameters, matrix, n):
+    return np.tile(parameters, (n, 1))
+
+
+def test_built_in_distributions():
+    assert_("MVNORMAL" in registered_distributions())
+    assert_("MVLOGNORM" in registered_distributions())
+
+
+def test_raises_unknown_distribution():
+    with assert_raises(ValueError):
+        get_sampler("strange distribution")
+
+
+def test_register_distribution():
+    """
+    Tests if a registered sampler is used by DISTRIB distributions of that
+    type, irrespective of case.
+    """
+    register_distribution("test_constant", _constant)
+    assert_(get_sampler("TEST_CONSTANT") is _constant)
+
+    distrib = Distrib("DEMAND", "STAGE-2", "Test_Constant")
+    distrib.add_entry("RHS", "C2", 10)
+    distrib.add_entry("RHS", "C3", 20)
+
+    assert_almost_equal(distrib.sample(3), [[10, 20], [10, 20], [10, 20]])
+
+
+def test_raises_duplicate_registration():
+    register_distribution("test_duplicate", _constant)
+
+    with assert_raises(ValueError):
+        register_distribution("test_duplicate", _constant)
+
+    register_distribution("test_duplicate", _constant, overwrite=True)
+
+
+def test_raises_sampler_of_wrong_shape():
+    register_distribution("test_wrong_shape",
+                          lambda rng, parameters, matrix, n: np.zeros(n))
+
+    distrib = Distrib("DEMAND", "STAGE-2", "TEST_WRONG_SHAPE")
+    distrib.add_entry("RHS", "C2", 10)
+    distrib.add_entry("RHS", "C3", 20)
+
+    with assert_raises(ValueError):
+        distrib.sample(3)
+
+
+def test_registered_samplers_are_sent_to_workers():
+    """
+    A sampler registered at runtime should also be known in a (fresh) worker
+    process that parses a STOCH file in a process pool. Samplers that cannot
+    be pickled are not sent, but should not get in the way.
+    """
+    register_distribution("testpool", _constant)
+    register_distribution("test_unpicklable",
+                          lambda rng, parameters, matrix, n: np.zeros(n))
+
+    data = b"""STOCH         TEST
+DISTRIB       TESTPOOL
+ DS DEMAND    STAGE-2
+    RHS       C2        10.0           C3        20.0
+ENDATA
+"""
+
+    # Spawned workers do not inherit the registry of this process.
+    context = multiprocessing.get_context("spawn")
+    loop = asyncio.new_event_loop()  # asyncio.run is not available on Py3.6.
+
+    try:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            parser = loop.run_until_complete(
+                aio.parse(StochParser(data), executor))
+    finally:
+        loop.close()
+
+    assert_equal(len(parser.distribs), 1)
+    assert_almost_equal(parser.distribs[0].sample(2), [[10, 20], [10, 20]])
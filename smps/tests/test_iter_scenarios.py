@@ -0,0 +1,119 @@
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from smps import iter_scenarios
+from smps.parsers import StochParser
+
+
+def test_raises_file_does_not_exist():
+    with assert_raises(FileNotFoundError):
+        # Weird string that should not exist.
+        next(iter_scenarios("bogus_location/as2afsd76a"))
+
+
+def test_same_as_parse():
+    """
+    Tests if iterating over the scenarios gives the same scenarios, in the same
+    order, as parsing the whole file.
+    """
+    parser = StochParser("data/sizes/sizes10")
+    parser.parse()
+    expected = parser.scenarios
+
+    for actual, desired in zip(iter_scenarios("data/sizes/sizes10"), expected):
+        assert_equal(actual.name, desired.name)
+        assert_equal(actual.branch_period, desired.branch_period)
+        assert_equal(actual.modifications, desired.modifications)
+
+    assert_equal(len(list(iter_scenarios("data/sizes/sizes10"))),
+                 len(expected))
+
+
+def test_parent_look_up():
+    """
+    Tests if a streamed scenario can find its parent, and all modifications
+    relative to the root.
+    """
+    first, second = iter_scenarios("data/test/stoch_small_scenarios_problem")
+
+    assert_(second.parent is first)
+    assert_equal(len(second.modifications_from_root()), 4)
+
+
+def test_bounded_cache_evicts_parents():
+    """
+    When the cache is too small to hold all ancestors, looking up an evicted
+    parent should raise.
+    """
+    scenarios = iter_scenarios("data/test/stoch_small_scenarios_problem",
+                               cache_size=1)
+    _, second = scenarios
+
+    with assert_raises(KeyError):
+        second.parent
+
+
+def test_modifications_from_root_of_evicted_scenarios():
+    """
+    Scenarios that have already been evicted from the bounded cache should
+    still resolve their modifications, since they are resolved from the
+    scenario itself rather than from the cache.
+    """
+    parser = StochParser("data/sslp/sslp_10_50_100")
+    parser.parse()
+    expected = parser.scenarios
+
+    scenarios = iter_scenarios("data/sslp/sslp_10_50_100", cache_size=10)
+    num_scenarios = 0
+
+    for actual, desired in zip(scenarios, expected):
+        assert_equal(actual.modifications_from_root(),
+                     desired.modifications_from_root())
+
+        num_scenarios += 1
+
+    assert_equal(num_scenarios, 100)
+
+
+def test_scenarios_are_yielded_before_eviction():
+    """
+    Each scenario should be yielded as soon as its block ends, so that a small
+    cache suffices to resolve long chains of scenarios, even when many of them
+    are read in a single batch.
+    """
+    scenarios = iter_scenarios("data/test/stoch_scenario_chain",
+                               cache_size=2,
+                               memo_size=1)
+    num_scenarios = 0
+
+    for idx, scenario in enumerate(scenarios):
+        if idx != 0:
+            assert_equal(scenario.parent.name, f"SCEN{idx - 1:02}")
+
+        assert_equal(len(scenario.modifications_from_root()), idx + 1)
+
+        num_scenarios += 1
+
+    assert_equal(num_scenarios, 20)
+
+
+def test_name_table_does_not_grow_with_scenarios():
+    """
+    The parser's name table should only hold the names used in modifications,
+    and not the names of the (streamed) scenarios themselves.
+    """
+    parser = StochParser("data/sslp/sslp_10_50_100")
+    num_scenarios = sum(1 for _ in parser.iter_scenarios(cache_size=2))
+
+    names = parser.name_table
+
+    assert_equal(num_scenarios, 100)
+    assert_("SCEN1" not in names)
+    assert_(len(names) < num_scenarios)
+
+
+def test_memo_size():
+    first, second = iter_scenarios("data/test/stoch_small_scenarios_problem",
+                                   memo_size=1)
+
+    assert_equal(len(second.modifications_from_root()), 4)
+    assert_equal(second._tree.memo_info().max_size, 1)
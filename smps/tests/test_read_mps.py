@@ -1,9 +1,22 @@
+import asyncio
+import io
 from pathlib import Path
 
 import numpy as np
+import pytest
 from numpy.testing import assert_almost_equal, assert_equal, assert_raises
 
-from smps import read_mps
+from smps import aread_mps, read_mps
+
+
+def _run(coroutine):
+    # asyncio.run is not available on Py3.6.
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
 
 
 def test_raises_file_does_not_exist():
@@ -19,6 +32,32 @@ def test_file_location():
     assert_equal(res.mps_location, Path("data/test/mps_test_file_small.mps"))
 
 
+def test_in_memory(tmp_path):
+    data = Path("data/test/mps_test_file_small.mps").read_bytes()
+    res = read_mps("data/test/mps_test_file_small")
+
+    for source in [data, io.BytesIO(data), io.StringIO(data.decode())]:
+        mem_res = read_mps(source, cache_dir=tmp_path)
+
+        assert_equal(mem_res.mps_location, None)
+        assert_equal(mem_res.constraint_names, res.constraint_names)
+        assert_almost_equal(mem_res.rhs, res.rhs)
+
+
+def test_aread_mps(tmp_path):
+    res = read_mps("data/test/mps_test_file_small")
+
+    for chunked in [False, True]:
+        async_res = _run(aread_mps("data/test/mps_test_file_small",
+                                   cache_dir=tmp_path,
+                                   chunked=chunked))
+
+        assert_equal(async_res.mps_location, res.mps_location)
+        assert_equal(async_res.constraint_names, res.constraint_names)
+        assert_almost_equal(async_res.coefficients.toarray(),
+                            res.coefficients.toarray())
+
+
 def test_small_example():
     """
     Tests if a small example MPS file is parsed correctly.
@@ -40,3 +79,86 @@ def test_small_example():
                              [0, -1, 1]])
     assert_almost_equal(res.coefficients.toarray(), coefficients)
     assert_almost_equal(res.objective_coefficients, [1, 4, 9])
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_free_format(mmap):
+    """
+    Tests if a free format MPS file, with long names and integer markers, is
+    detected and parsed correctly.
+    """
+    res = read_mps("data/test/mps_free_format", mmap=mmap)
+
+    assert_equal(res.name, "TESTPROB")
+    assert_equal(res.constraint_names, ["LIMIT_NUMBER_ONE",
+                                        "LIMIT_NUMBER_TWO",
+                                        "MY_EQUALITY"])
+    assert_equal(res.senses, ['L', 'G', 'E'])
+    assert_almost_equal(res.rhs, [5, 10, 7])
+    assert_equal(res.variable_names, ["VARIABLE_ONE",
+                                      "VARIABLE_TWO",
+                                      "VARIABLE_THREE"])
+    assert_equal(res.types, ['C', 'I', 'C'])
+    assert_almost_equal(res.lower_bounds, [0, -1, 0])
+    assert_almost_equal(res.upper_bounds, [4, 1, np.inf])
+
+    expected = read_mps("data/test/mps_test_file_small")
+    assert_almost_equal(res.coefficients.toarray(),
+                        expected.coefficients.toarray())
+    assert_almost_equal(res.objective_coefficients,
+                        expected.objective_coefficients)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_free_format_detected_late(mmap):
+    """
+    Tests if a free format MPS file is detected, even when its first many data
+    lines also fit the fixed format.
+    """
+    res = read_mps("data/test/mps_free_format_late", mmap=mmap)
+
+    assert_equal(res.name, "LATE")
+    assert_equal(len(res.constraint_names), 40)
+    assert_equal(res.variable_names, ["long_variable_name_0",
+                                      "long_variable_name_1",
+                                      "long_variable_name_2"])
+
+    assert_almost_equal(res.coefficients.toarray()[:3], np.eye(3))
+    assert_almost_equal(res.objective_coefficients, [1, 2, 3])
+    assert_almost_equal(res.rhs[:2], [1, 0])
+
+
+def test_mmap_same_as_regular():
+    """
+    Tests if reading the MPS file through a memory map gives the same result
+    as regular reading.
+    """
+    res = read_mps("data/test/mps_test_file_small")
+    mmap_res = read_mps("data/test/mps_test_file_small", mmap=True)
+
+    assert_equal(mmap_res.name, res.name)
+    assert_equal(mmap_res.constraint_names, res.constraint_names)
+    assert_equal(mmap_res.variable_names, res.variable_names)
+    assert_almost_equal(mmap_res.rhs, res.rhs)
+    assert_almost_equal(mmap_res.lower_bounds, res.lower_bounds)
+    assert_almost_equal(mmap_res.upper_bounds, res.upper_bounds)
+    assert_almost_equal(mmap_res.coefficients.toarray(),
+                        res.coefficients.toarray())
+
+
+def test_cache_dir(tmp_path):
+    """
+    Tests if the result is stored in the cache directory, and loaded from there
+    the next time the (unchanged) file is read.
+    """
+    res = read_mps("data/test/mps_test_file_small", cache_dir=tmp_path)
+    assert_equal(len(list(tmp_path.iterdir())), 1)
+
+    cached = read_mps("data/test/mps_test_file_small", cache_dir=tmp_path)
+    assert_equal(len(list(tmp_path.iterdir())), 1)
+
+    assert_equal(cached.name, res.name)
+    assert_equal(cached.constraint_names, res.constraint_names)
+    assert_almost_equal(cached.rhs, res.rhs)
+    assert_almost_equal(cached.coefficients.toarray(),
+                        res.coefficients.toarray())
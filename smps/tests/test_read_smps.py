@@ -1,8 +1,25 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-from numpy.testing import assert_equal, assert_raises, assert_warns
+import numpy as np
+import pytest
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises, assert_warns)
 
-from smps import read_smps
+from smps import aread_smps, cache, read_smps
+from smps.classes import ElementIndex
+
+
+def _run(coroutine):
+    # asyncio.run is not available on Py3.6.
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
 
 
 def test_raises_files_do_not_exist():
@@ -75,4 +92,608 @@ def test_more_than_three_locations():
               "data/bogus/bogus",
               "data/bogus/bogus")
 
+
+def test_parallel_reads_are_isolated():
+    """
+    Parsing several instances concurrently in one process should not mix their
+    scenarios.
+    """
+    locations = ["data/sizes/sizes3", "data/sizes/sizes5", "data/sizes/sizes10"]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(read_smps, locations * 3))
+
+    for idx, res in enumerate(results):
+        num_scenarios = [3, 5, 10][idx % 3]
+
+        assert_equal(len(res.scenarios), num_scenarios)
+        assert_equal(len(res.scenario_tree), num_scenarios)
+
+
+def test_triplet_shares_name_table():
+    """
+    The CORE, TIME and STOCH parsers should intern their names in a single
+    table, so that each distinct name is stored once for the whole triplet.
+    """
+    result = read_smps("data/test/realize")
+    names = result.name_table
+
+    assert_(result._core.name_table is names)
+    assert_(result._time.name_table is names)
+    assert_(result.scenario_tree.names is names)
+
+    for name in result.constraint_names + result.variable_names:
+        assert_(names.intern(name) is name)
+
+    for indep in result.indep_sections:
+        assert_(indep.name_table is names)
+
+
+def test_scenario_realization():
+    """
+    Tests if the realized RHS, objective and constraint matrix data of each
+    scenario are correct, on a small three-stage instance where two scenarios
+    inherit modifications from their parent.
+    """
+    res = read_smps("data/test/scenarios_realization")
+
+    assert_almost_equal(res.scenario_probabilities, [0.5, 0.25, 0.25])
+
+    assert_almost_equal(res.scenario_rhs, [[10, 21, 30],
+                                           [10, 21, 31],
+                                           [10, 22, 30]])
+
+    assert_almost_equal(res.scenario_objective_coefficients, [[1, 2, 3],
+                                                              [1, 2.2, 3],
+                                                              [1, 2, 3]])
+
+    # The deltas are stored flattened, in row-major order. SCEN1 changes
+    # (C2, X1) from 2 to 2.5, and SCEN3 also changes (C3, X3) from 5 to 5.5.
+    deltas = res.scenario_coefficient_deltas.toarray()
+    expected = np.zeros((3, 9))
+    expected[:, 3] = 0.5
+    expected[2, 8] = 0.5
+
+    assert_almost_equal(deltas, expected)
+
+
+def test_scenario_realization_sizes3():
+    """
+    The sizes3 instance only modifies the RHS, so the constraint matrix is the
+    same in each scenario.
+    """
+    res = read_smps("data/sizes/sizes3")
+
+    assert_equal(res.scenario_rhs.shape, (3, len(res.constraint_names)))
+    assert_equal(res.scenario_coefficient_deltas.nnz, 0)
+
+    # Each row is the CORE RHS, with each scenario's modifications applied.
+    for idx, scen in enumerate(res.scenarios):
+        expected = res.rhs.copy()
+
+        for constr, _, value in scen.modifications:
+            expected[res.constraint_names.index(constr)] = value
+
+        assert_almost_equal(res.scenario_rhs[idx], expected)
+
+
+def test_scenario_realization_no_rhs():
+    """
+    When the CORE file has no RHS section, the right-hand sides are zero, and
+    scenarios can still modify them.
+    """
+    res = read_smps("data/test/no_rhs")
+
+    assert_equal(len(res.rhs), 0)
+    assert_almost_equal(res.scenario_rhs, [[0, 1], [0, 2]])
+
+
+@pytest.mark.parametrize("memo_size", [2, None])
+def test_memo_size(memo_size):
+    res = read_smps("data/sizes/sizes3", memo_size=memo_size)
+    assert_equal(res.scenario_tree.memo_info().max_size, memo_size)
+
+    res = _run(aread_smps("data/sizes/sizes3", memo_size=memo_size))
+    assert_equal(res.scenario_tree.memo_info().max_size, memo_size)
+
+
+def test_cache_dir(tmp_path):
+    """
+    Tests if a cached SMPS triplet is loaded correctly, and agrees with a
+    freshly parsed one.
+    """
+    res = read_smps("data/sizes/sizes3", cache_dir=tmp_path)
+    cached = read_smps("data/sizes/sizes3", cache_dir=tmp_path)
+
+    assert_equal(cached.core_location, res.core_location)
+    assert_equal(cached.constraint_names, res.constraint_names)
+    assert_almost_equal(cached.rhs, res.rhs)
+
+    assert_equal(len(cached.scenarios), len(res.scenarios))
+
+    for cached_scen, scen in zip(cached.scenarios, res.scenarios):
+        assert_equal(cached_scen.name, scen.name)
+        assert_equal(cached_scen.modifications, scen.modifications)
+
+    assert_almost_equal(cached.scenario_rhs, res.scenario_rhs)
+
+
+def test_cache_is_invalidated_when_file_changes(tmp_path):
+    """
+    The cache is keyed by file contents, so changing any of the files should
+    result in a different cache entry.
+    """
+    for extension in [".cor", ".tim", ".sto"]:
+        data = Path("data/test/scenarios_realization" + extension).read_bytes()
+        (tmp_path / ("instance" + extension)).write_bytes(data)
+
+    cache_dir = tmp_path / "cache"
+    location = tmp_path / "instance"
+
+    before = cache.cache_key(*sorted(tmp_path.glob("instance.*")))
+    read_smps(location, cache_dir=cache_dir)
+
+    # Changes the probability of the first scenario.
+    sto = location.with_suffix(".sto")
+    sto.write_text(sto.read_text().replace("0.5", "0.6"))
+
+    after = cache.cache_key(*sorted(tmp_path.glob("instance.*")))
+    assert_(before != after)
+
+    res = read_smps(location, cache_dir=cache_dir)
+    assert_almost_equal(res.scenario_probabilities, [0.6, 0.25, 0.25])
+    assert_equal(len(list(cache_dir.iterdir())), 2)
+
+
+def test_corrupt_cache_entry_is_reparsed(tmp_path):
+    """
+    A cache entry that cannot be read should result in a warning, after which
+    the files are parsed again.
+    """
+    read_smps("data/sizes/sizes3", cache_dir=tmp_path)
+
+    for file in tmp_path.iterdir():
+        file.write_bytes(b"not a pickle")
+
+    with assert_warns(UserWarning):
+        res = read_smps("data/sizes/sizes3", cache_dir=tmp_path)
+
+    assert_equal(len(res.scenarios), 3)
+
+
+@pytest.mark.parametrize("entry", [b"cbogus_module_as2afsd76a\nThing\n.",
+                                   b"cbuiltins\nint\n(S'a'\ntR."])
+def test_stale_cache_entry_is_reparsed(tmp_path, entry):
+    """
+    Cache entries that refer to objects that cannot be imported, or that fail
+    to be reconstructed, should also be parsed again.
+    """
+    read_smps("data/sizes/sizes3", cache_dir=tmp_path)
+
+    for file in tmp_path.iterdir():
+        file.write_bytes(entry)
+
+    with assert_warns(UserWarning):
+        res = read_smps("data/sizes/sizes3", cache_dir=tmp_path)
+
+    assert_equal(len(res.scenarios), 3)
+
+
+def _read_triplet(location: str):
+    return [Path(location + extension).read_bytes()
+            for extension in [".cor", ".tim", ".sto"]]
+
+
+def test_in_memory_sources():
+    """
+    Tests if the SMPS triplet can be parsed from memory (and file-like
+    objects), without any file-system locations.
+    """
+    res = read_smps("data/test/scenarios_realization")
+
+    core, time, stoch = _read_triplet("data/test/scenarios_realization")
+    mem_res = read_smps(core, memoryview(time), io.BytesIO(stoch))
+
+    assert_(mem_res.core_location is None)
+    assert_equal(mem_res.constraint_names, res.constraint_names)
+    assert_almost_equal(mem_res.coefficients.toarray(),
+                        res.coefficients.toarray())
+    assert_equal([scen.name for scen in mem_res.scenarios],
+                 [scen.name for scen in res.scenarios])
+    assert_almost_equal(mem_res.scenario_rhs, res.scenario_rhs)
+
+
+def test_raises_single_in_memory_source():
+    core, _, _ = _read_triplet("data/sizes/sizes3")
+
+    with assert_raises(ValueError):
+        read_smps(core)
+
+
+def test_in_memory_cache_and_workers(tmp_path):
+    """
+    In-memory sources should be keyed by their contents, so that the same
+    data results in the same cache entry. File-like objects are read into
+    memory first, so these can be used with multiple workers as well.
+    """
+    triplet = _read_triplet("data/sizes/sizes3")
+
+    res = read_smps(*triplet, cache_dir=tmp_path, workers=3)
+    cached = read_smps(*map(io.BytesIO, triplet), cache_dir=tmp_path)
+
+    assert_equal(len(list(tmp_path.iterdir())), 1)
+    assert_equal(cache.cache_key(*triplet),
+                 cache.cache_key("data/sizes/sizes3.cor",
+                                 "data/sizes/sizes3.tim",
+                                 "data/sizes/sizes3.sto"))
+
+    assert_equal(len(cached.scenarios), len(res.scenarios))
+    assert_almost_equal(cached.scenario_rhs, res.scenario_rhs)
+
+
+def _compare_results(actual, desired):
+    assert_equal(actual.name, desired.name)
+    assert_equal(actual.constraint_names, desired.constraint_names)
+    assert_equal(actual.variable_names, desired.variable_names)
+    assert_almost_equal(actual.coefficients.toarray(),
+                        desired.coefficients.toarray())
+
+    assert_equal([scen.name for scen in actual.scenarios],
+                 [scen.name for scen in desired.scenarios])
+    assert_almost_equal(actual.scenario_rhs, desired.scenario_rhs)
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_aread_smps_same_as_read_smps(chunked):
+    res = read_smps("data/test/scenarios_realization")
+    async_res = _run(aread_smps("data/test/scenarios_realization",
+                                chunked=chunked))
+
+    assert_equal(async_res.core_location, res.core_location)
+    _compare_results(async_res, res)
+
+
+def test_aread_smps_concurrently():
+    """
+    Tests if several triplets can be read concurrently on the same event loop,
+    from the file-system as well as from memory.
+    """
+    triplet = _read_triplet("data/sizes/sizes3")
+
+    async def read_all():
+        return await asyncio.gather(
+            aread_smps("data/sizes/sizes3", chunked=True),
+            aread_smps(*map(io.BytesIO, triplet)),
+            aread_smps("data/test/scenarios_realization"))
+
+    sizes3, in_memory, realization = _run(read_all())
+
+    _compare_results(sizes3, read_smps("data/sizes/sizes3"))
+    _compare_results(in_memory, sizes3)
+    _compare_results(realization, read_smps("data/test/scenarios_realization"))
+
+
+def test_aread_smps_process_pool_and_cache(tmp_path):
+    with ProcessPoolExecutor(2) as executor:
+        res = _run(aread_smps("data/sizes/sizes3",
+                              cache_dir=tmp_path,
+                              executor=executor))
+
+    # The in-memory contents should hash to the same cache entry.
+    cached = read_smps(*_read_triplet("data/sizes/sizes3"),
+                       cache_dir=tmp_path)
+
+    assert_equal(len(list(tmp_path.iterdir())), 1)
+    _compare_results(cached, res)
+
+
+def test_aread_smps_raises_chunked_process_pool():
+    with ProcessPoolExecutor(1) as executor:
+        with assert_raises(ValueError):
+            _run(aread_smps("data/sizes/sizes3",
+                            executor=executor,
+                            chunked=True))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_free_format(workers):
+    """
+    Tests if a free format SMPS triplet with long names gives the same result
+    as the fixed format version with short names.
+    """
+    res = read_smps("data/test/scenarios_realization")
+    free = read_smps("data/test/free_format", workers=workers)
+
+    assert_equal(free.name, "Free format realization")
+    assert_equal(free.constraint_names, ["first_constraint",
+                                         "second_constraint",
+                                         "third_constraint"])
+    assert_equal(free.stage_names, ["first_stage",
+                                    "second_stage",
+                                    "third_stage"])
+    assert_equal([scen.name for scen in free.scenarios],
+                 ["first_scenario", "second_scenario", "third_scenario"])
+
+    assert_almost_equal(free.coefficients.toarray(),
+                        res.coefficients.toarray())
+    assert_almost_equal(free.scenario_probabilities,
+                        res.scenario_probabilities)
+    assert_almost_equal(free.scenario_rhs, res.scenario_rhs)
+    assert_almost_equal(free.scenario_coefficient_deltas.toarray(),
+                        res.scenario_coefficient_deltas.toarray())
+
+
+def test_raises_workers_not_positive():
+    with assert_raises(ValueError):
+        read_smps("data/sizes/sizes3", workers=0)
+
+
+def test_workers_same_as_sequential():
+    """
+    Tests if parsing the CORE, TIME, and STOCH files concurrently in a process
+    pool gives the same result as parsing them one after another.
+    """
+    res = read_smps("data/test/scenarios_realization")
+    par_res = read_smps("data/test/scenarios_realization", workers=3)
+
+    assert_equal(par_res.name, res.name)
+    assert_equal(par_res.constraint_names, res.constraint_names)
+    assert_equal(par_res.variable_names, res.variable_names)
+    assert_almost_equal(par_res.coefficients.toarray(),
+                        res.coefficients.toarray())
+
+    assert_equal([scen.name for scen in par_res.scenarios],
+                 [scen.name for scen in res.scenarios])
+    assert_almost_equal(par_res.scenario_rhs, res.scenario_rhs)
+    assert_almost_equal(par_res.scenario_coefficient_deltas.toarray(),
+                        res.scenario_coefficient_deltas.toarray())
+
+
+def test_implicit_stages():
+    """
+    Tests if the stages are derived correctly from the IMPLICIT period offsets
+    in the TIME file.
+    """
+    res = read_smps("data/electric/LandS")
+
+    assert_equal(res.num_stages, 2)
+    assert_equal(res.constraint_stages, [0, 0, 1, 1, 1, 1, 1, 1, 1])
+    assert_equal(res.variable_stages, [0] * 4 + [1] * 12)
+
+    assert_equal(res.stage_constraints[0], [0, 1])
+    assert_equal(res.stage_variables[1], np.arange(4, 16))
+
+
+@pytest.mark.parametrize("time,constr_stages",
+                         [("stages_empty_period", [0, 0, 2]),
+                          ("stages_empty_last_period", [0, 1, 1])])
+def test_implicit_stages_period_without_constraints(time, constr_stages):
+    """
+    A period without constraints of its own has an IMPLICIT offset that
+    refers to the objective. Such a period should not claim any constraints.
+    """
+    res = read_smps("data/test/stages_empty_period.cor",
+                    f"data/test/{time}.tim",
+                    "data/test/stages_empty_period.sto")
+
+    assert_equal(res.num_stages, 3)
+    assert_equal(res.constraint_stages, constr_stages)
+    assert_equal(res.variable_stages, [0, 1, 2])
+
+
+def test_explicit_stages():
+    """
+    Tests if the stages are derived correctly from an EXPLICIT TIME file, where
+    the CORE file is not ordered by stage.
+    """
+    res = read_smps("data/test/stages_explicit")
+
+    assert_equal(res.constraint_stages, [1, 0, 1])
+    assert_equal(res.variable_stages, [1, 0, 1])
+
+    assert_equal(res.stage_constraints, [[1], [0, 2]])
+    assert_equal(res.stage_variables, [[1], [0, 2]])
+
+
+def test_stage_blocks():
+    """
+    Tests the A, T, and W blocks of the constraint matrix on a small instance
+    with an EXPLICIT TIME file.
+    """
+    res = read_smps("data/test/stages_explicit")
+
+    assert_almost_equal(res.first_stage_matrix.toarray(), [[3]])
+    assert_almost_equal(res.technology_matrix.toarray(), [[0], [4]])
+    assert_almost_equal(res.recourse_matrix.toarray(), [[1, 6], [0, 5]])
+
+    assert_almost_equal(res.stage_block(0, 1).toarray(), [[2, 0]])
+
+    # Blocks are cached after first call.
+    assert_(res.recourse_matrix is res.recourse_matrix)
+
+
+def test_stage_blocks_cover_matrix():
+    """
+    Together, the stage blocks of a three-stage problem should contain all
+    entries of the constraint matrix.
+    """
+    res = read_smps("data/test/scenarios_realization")
+
+    assert_equal(res.num_stages, 3)
+
+    nnz = sum(res.stage_block(row, col).nnz
+              for row in range(res.num_stages)
+              for col in range(res.num_stages))
+
+    assert_equal(nnz, res.coefficients.nnz)
+
+
+def test_raises_no_periods():
+    res = read_smps("data/test/test_explicit_smps_specification_core",
+                    "data/test/test_explicit_smps_specification_time",
+                    "data/test/test_explicit_smps_specification_stoch")
+
+    with assert_raises(ValueError):
+        res.constraint_stages
+
+
+def test_sample_scenarios():
+    """
+    Tests if sampling scenarios from the INDEP section of the LandS instance
+    gives realisations from the discrete demand distributions.
+    """
+    res = read_smps("data/electric/LandS")
+
+    samples = res.sample_scenarios(1000, seed=1)
+    assert_equal(samples.shape, (1000, 3))
+
+    for column, support in zip(samples.T, [[3, 5, 7], [2, 3, 4], [1, 2, 3]]):
+        assert_(np.isin(column, support).all())
+
+    # Same seed gives the same samples.
+    assert_almost_equal(res.sample_scenarios(1000, seed=1), samples)
+
+
+def test_sample_scenarios_without_indep():
+    res = read_smps("data/sizes/sizes3")
+    assert_equal(res.sample_scenarios(5).shape, (5, 0))
+
+
+def test_scenario_space():
+    """
+    The LandS instance has three independent random demands with three
+    outcomes each, so there are 27 scenarios.
+    """
+    res = read_smps("data/electric/LandS")
+    space = res.scenario_space
+
+    assert_equal(len(space), 27)
+    assert_almost_equal(space[0], [3, 2, 1])
+    assert_almost_equal(space[26], [7, 4, 3])
+    assert_almost_equal(space.probabilities(np.arange(27)).sum(), 1)
+
+
+def test_blocks():
+    """
+    Tests the scenario space and sampling of an instance with a BLOCKS section,
+    where the elements of each block are realised jointly.
+    """
+    res = read_smps("data/test/blocks")
+
+    assert_equal(len(res.blocks), 2)
+
+    space = res.scenario_space
+    assert_equal(len(space), 3 * 2)
+    assert_equal(space.elements, [("RHS", "C2"), ("RHS", "C3"), ("X2", "C3")])
+    assert_almost_equal(space[5], [23, 33, 5.5])
+
+    samples = res.sample_scenarios(1000, seed=1)
+    assert_equal(samples.shape, (1000, 3))
+
+    # Both right-hand sides are realised together, as a single block.
+    pairs = {tuple(row) for row in samples[:, :2]}
+    assert_(pairs <= {(21, 31), (22, 31), (23, 33)})
+
+
+def test_realize():
+    """
+    Tests if realizations are applied to the CORE data according to the
+    modification type of each random element.
+    """
+    res = read_smps("data/test/realize")
+
+    assert_equal(res.random_elements, [("RHS", "C2"),
+                                       ("X2", "OBJ"),
+                                       ("X2", "C2"),
+                                       ("X1", "C3")])
+
+    rhs, obj, data = res.realize([[1., 2., 0.5, 5.],
+                                  [2., 3., 0.5, 6.]])
+
+    assert_almost_equal(rhs, [[10, 21, 30], [10, 22, 30]])
+    assert_almost_equal(obj, [[1, 4], [1, 6]])
+
+    # X1's coefficient in C3 is not stored in the CORE matrix, so it is added
+    # to the shared structure of all realizations.
+    assert_equal(res.realization_structure.nnz, res.coefficients.nnz + 1)
+    assert_equal(data.shape, (2, res.coefficients.nnz + 1))
+
+    assert_almost_equal(res.realized_coefficients(data[0]).toarray(),
+                        [[1, 0], [2, 1.5], [5, 4]])
+    assert_almost_equal(res.realized_coefficients(data[1]).toarray(),
+                        [[1, 0], [2, 1.5], [6, 4]])
+
+    # The CORE data itself is not modified.
+    assert_almost_equal(res.rhs, [10, 20, 30])
+    assert_almost_equal(res.realization_structure.toarray(),
+                        res.coefficients.toarray())
+
+
+def test_realize_no_rhs():
+    """
+    When the CORE file has no RHS section, random right-hand sides are
+    applied to zeros.
+    """
+    res = read_smps("data/test/no_rhs.cor",
+                    "data/test/no_rhs.tim",
+                    "data/test/no_rhs_indep.sto")
+
+    rhs, _, _ = res.realize([[1.], [2.]])
+    assert_almost_equal(rhs, [[0, 1], [0, 2]])
+
+
+def test_element_index():
+    """
+    Each random element should map directly to its right-hand side slot,
+    objective slot, or position in the data of the realization structure.
+    """
+    res = read_smps("data/test/realize")
+
+    index = res.element_index
+    structure = res.realization_structure
+
+    assert_equal(index.elements, res.random_elements)
+    assert_equal(index["RHS", "C2"], (ElementIndex.RHS, 1))
+    assert_equal(index["X2", "OBJ"], (ElementIndex.OBJECTIVE, 1))
+
+    for var, constr in [("X2", "C2"), ("X1", "C3")]:
+        kind, slot = index[var, constr]
+        row = res.constraint_names.index(constr)
+        col = res.variable_names.index(var)
+
+        assert_equal(kind, ElementIndex.COEFFICIENT)
+        assert_(structure.indptr[row] <= slot < structure.indptr[row + 1])
+        assert_equal(structure.indices[slot], col)
+
+
+def test_element_index_does_not_modify_coefficients():
+    """
+    The CORE coefficients are cached and shared, so building the element index
+    should not modify them.
+    """
+    res = read_smps("data/test/realize")
+
+    coefficients = res.coefficients
+    indices = coefficients.indices.copy()
+    data = coefficients.data.copy()
+
+    res.element_index
+
+    assert_(res.coefficients is coefficients)
+    assert_equal(coefficients.indices, indices)
+    assert_almost_equal(coefficients.data, data)
+
+
+def test_realize_samples():
+    res = read_smps("data/test/realize")
+
+    samples = res.sample_scenarios(100, seed=1)
+    rhs, _, _ = res.realize(samples)
+
+    assert_equal(rhs.shape, (100, 3))
+    assert_(np.isin(rhs[:, 1], [21, 22]).all())
+
+    with assert_raises(ValueError):
+        res.realize(samples[:, :2])
+
 # TODO